@@ -0,0 +1,105 @@
+"""Пакетное зачисление на цифровую кафедру
+
+Запуск из каталога Bot_final (например, по cron после окончания приема заявок):
+    python DATABASE/admissions.py                  # все направления
+    python DATABASE/admissions.py --department 2   # одно направление
+"""
+import argparse
+import os
+import sys
+import time
+
+# Ранжирование и решения — один UPDATE: заявки в статусе pending упорядочиваются внутри
+# направления по среднему баллу (student_gpa), затем по времени подачи, и одобряются в пределах
+# свободных мест. Ниже минимального балла — отказ; не прошедшие по местам ждут следующего
+# запуска, а после дедлайна направления получают отказ. approved_count и уведомления
+# обновляют триггеры уровня оператора — по одному INSERT/UPDATE на весь пакет.
+RANK_AND_DECIDE = """
+    WITH ranked AS (
+        SELECT
+            a.application_id,
+            COALESCE(g.gpa, 0) >= d.min_gpa AS eligible,
+            d.available_places - d.approved_count AS free_places,
+            d.application_deadline < CURRENT_DATE AS closed,
+            ROW_NUMBER() OVER (
+                PARTITION BY a.department_id
+                ORDER BY COALESCE(g.gpa, 0) >= d.min_gpa DESC,
+                         g.gpa DESC NULLS LAST,
+                         a.application_date,
+                         a.application_id
+            ) AS place
+        FROM digital_department_applications a
+        JOIN digital_departments d ON d.department_id = a.department_id
+        LEFT JOIN student_gpa g ON g.user_id = a.user_id
+        WHERE a.status = 'pending'
+        AND (%(department_id)s::INTEGER IS NULL OR a.department_id = %(department_id)s::INTEGER)
+    ),
+    decided AS (
+        SELECT application_id,
+               CASE
+                   WHEN NOT eligible THEN 'rejected'
+                   WHEN place <= free_places THEN 'approved'
+                   WHEN closed THEN 'rejected'
+               END AS status
+        FROM ranked
+    ),
+    updated AS (
+        UPDATE digital_department_applications a
+        SET status = decided.status, decision_date = NOW()
+        FROM decided
+        WHERE a.application_id = decided.application_id
+        AND decided.status IS NOT NULL
+        RETURNING a.department_id, a.status
+    )
+    SELECT department_id,
+           COUNT(*) FILTER (WHERE status = 'approved') AS approved,
+           COUNT(*) FILTER (WHERE status = 'rejected') AS rejected
+    FROM updated
+    GROUP BY department_id
+    ORDER BY department_id
+"""
+
+
+def run_admissions(conn, department_id=None):
+    """Провести зачисление в одной транзакции: {department_id: (одобрено, отклонено)}"""
+    try:
+        with conn.cursor() as cur:
+            # Блокируем направления: параллельный запуск или ручное одобрение
+            # не займут те же места, пока идет ранжирование
+            cur.execute("""
+                SELECT department_id FROM digital_departments
+                WHERE %(department_id)s::INTEGER IS NULL OR department_id = %(department_id)s::INTEGER
+                ORDER BY department_id
+                FOR UPDATE
+            """, {'department_id': department_id})
+            cur.execute(RANK_AND_DECIDE, {'department_id': department_id})
+            results = {row[0]: (row[1], row[2]) for row in cur.fetchall()}
+        conn.commit()
+        return results
+    except Exception:
+        conn.rollback()
+        raise
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--department", type=int, default=None, help="id направления (по умолчанию все)")
+    args = parser.parse_args()
+
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from DATABASE.database import EducationDB
+
+    with EducationDB() as db:
+        started = time.perf_counter()
+        results = run_admissions(db.conn, args.department)
+        elapsed = time.perf_counter() - started
+
+    if not results:
+        print("Нет заявок, по которым можно принять решение")
+    for department_id, (approved, rejected) in results.items():
+        print(f"Направление {department_id}: одобрено {approved}, отклонено {rejected}")
+    print(f"Время: {elapsed:.2f} с")
+
+
+if __name__ == "__main__":
+    main()
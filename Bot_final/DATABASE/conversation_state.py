@@ -0,0 +1,76 @@
+import json
+from datetime import date, datetime, time
+from decimal import Decimal
+
+# Контрольная точка незавершенных диалогов: при остановке бота словари состояния
+# сохраняются в таблицу conversation_state, при запуске — читаются обратно и удаляются
+
+SESSION_STORE = '_session'
+
+
+def _encode(value):
+    """Типы из строк БД и дат диалогов, которых нет в JSON"""
+    if isinstance(value, datetime):
+        return {'__type__': 'datetime', 'value': value.isoformat()}
+    if isinstance(value, date):
+        return {'__type__': 'date', 'value': value.isoformat()}
+    if isinstance(value, time):
+        return {'__type__': 'time', 'value': value.isoformat()}
+    if isinstance(value, Decimal):
+        return {'__type__': 'decimal', 'value': str(value)}
+    raise TypeError(f"Не удается сохранить значение типа {type(value).__name__}")
+
+
+_DECODERS = {
+    'datetime': datetime.fromisoformat,
+    'date': date.fromisoformat,
+    'time': time.fromisoformat,
+    'decimal': Decimal,
+}
+
+
+def _decode(obj):
+    decoder = _DECODERS.get(obj.get('__type__'))
+    if decoder is not None and set(obj) == {'__type__', 'value'}:
+        return decoder(obj['value'])
+    return obj
+
+
+def save_state(conn, stores, sessions):
+    """Сохранить состояние диалогов и авторизаций одним пакетом (прошлая точка заменяется)
+
+    stores: {имя: {chat_id: данные}}, sessions: {chat_id: SessionRecord}
+    """
+    from psycopg2.extras import execute_values
+
+    rows = []
+    for name, store in stores.items():
+        for chat_id, data in list(store.items()):
+            rows.append((chat_id, name, json.dumps(data, default=_encode, ensure_ascii=False)))
+    for chat_id, session in list(sessions.items()):
+        data = {'user_id': session.user.user_id, 'authenticated_at': session.authenticated_at}
+        rows.append((chat_id, SESSION_STORE, json.dumps(data, default=_encode)))
+
+    try:
+        with conn.cursor() as cur:
+            cur.execute("DELETE FROM conversation_state")
+            if rows:
+                execute_values(cur, "INSERT INTO conversation_state (chat_id, store, data) VALUES %s", rows)
+        conn.commit()
+        return len(rows)
+    except Exception:
+        conn.rollback()
+        raise
+
+
+def load_state(conn):
+    """Прочитать и удалить сохраненное состояние: [(chat_id, store, data), ...]"""
+    try:
+        with conn.cursor() as cur:
+            cur.execute("DELETE FROM conversation_state RETURNING chat_id, store, data::text")
+            rows = cur.fetchall()
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return [(chat_id, store, json.loads(data, object_hook=_decode)) for chat_id, store, data in rows]
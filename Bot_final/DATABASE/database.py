@@ -3,6 +3,13 @@ import os
 import time
 import sys
 
+try:
+    from DATABASE.query_budget import CountingConnection
+    from DATABASE.prepared_statements import forget_prepared, prepare_all
+except ImportError:  # запуск как скрипта: python DATABASE/database.py
+    from query_budget import CountingConnection
+    from prepared_statements import forget_prepared, prepare_all
+
 
 class EducationDB:
     def __init__(self, max_retries=10, retry_delay=5):
@@ -20,12 +27,18 @@ class EducationDB:
         }
 
         self.connect_with_retry()
-        self.create_tables()
+        self.init_schema()
+        # Горячие запросы готовим один раз на соединение (см. prepared_statements.py)
+        prepare_all(self.conn)
 
     def connect(self):
         """Подключение к базе данных"""
+        # Подготовленные запросы живут в сессии: у нового соединения их нет
+        if self.conn is not None:
+            forget_prepared(self.conn)
         try:
-            self.conn = psycopg2.connect(**self.db_config)
+            # CountingConnection считает запросы для проверки бюджетов маршрутов
+            self.conn = psycopg2.connect(connection_factory=CountingConnection, **self.db_config)
             self.conn.autocommit = False
             print(f"Успешное подключение к базе данных: {self.db_config['host']}:{self.db_config['port']}")
             return True
@@ -123,6 +136,19 @@ class EducationDB:
             print(f"Ошибка выполнения файла {filename}: {e}")
             return False
 
+    def schema_exists(self):
+        """Проверка, создана ли уже схема (есть таблица users)"""
+        try:
+            with self.conn.cursor() as cur:
+                cur.execute("SELECT to_regclass('public.users') IS NOT NULL")
+                exists = cur.fetchone()[0]
+            self.conn.commit()
+            return exists
+        except Exception as e:
+            print(f"Ошибка проверки схемы: {e}")
+            self.conn.rollback()
+            return False
+
     def create_tables(self):
         """Создание таблиц (если не существуют)"""
         try:
@@ -152,6 +178,73 @@ class EducationDB:
             print(f"Общая ошибка создания таблиц: {e}")
             self.conn.rollback()
 
+    def init_schema(self):
+        """Создать схему на пустой базе и применить миграции.
+
+        schema.sql и начальные данные выполняются только на пустой базе (schema.sql пересоздает
+        таблицы); изменения схемы до рабочей базы доносят миграции из DATABASE/migrations.
+        Бот и certificate_worker стартуют одновременно: advisory lock на время проверки и
+        создания схемы заставляет второй процесс дождаться первого вместо гонки"""
+        with self.conn.cursor() as cur:
+            cur.execute("SELECT pg_advisory_lock(hashtext('schema_init'))")
+        self.conn.commit()
+        try:
+            if self.schema_exists():
+                print("Схема уже создана, пропускаем выполнение SQL файлов")
+            else:
+                self.create_tables()
+            self.apply_migrations()
+        finally:
+            with self.conn.cursor() as cur:
+                cur.execute("SELECT pg_advisory_unlock(hashtext('schema_init'))")
+            self.conn.commit()
+
+    def apply_migrations(self):
+        """Применить новые миграции из DATABASE/migrations по порядку номеров.
+
+        Каждая миграция идемпотентна (IF NOT EXISTS, CREATE OR REPLACE, DROP TRIGGER IF EXISTS)
+        и выполняется в своей транзакции вместе с записью в schema_migrations. На свежей базе,
+        где schema.sql уже содержит все изменения, миграции ничего не меняют. Advisory lock
+        не дает двум процессам применить одну миграцию одновременно"""
+        migrations_dir = self.get_schema_path('migrations')
+        if not os.path.isdir(migrations_dir):
+            return True
+
+        try:
+            with self.conn.cursor() as cur:
+                cur.execute("""
+                    CREATE TABLE IF NOT EXISTS schema_migrations (
+                        version VARCHAR(100) PRIMARY KEY,
+                        applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                    )
+                """)
+            self.conn.commit()
+        except Exception as e:
+            print(f"Ошибка создания таблицы миграций: {e}")
+            self.conn.rollback()
+            return False
+
+        for filename in sorted(f for f in os.listdir(migrations_dir) if f.endswith('.sql')):
+            version = filename[:-len('.sql')]
+            try:
+                with self.conn.cursor() as cur:
+                    cur.execute("SELECT pg_advisory_xact_lock(hashtext('schema_migrations'))")
+                    cur.execute("SELECT 1 FROM schema_migrations WHERE version = %s", (version,))
+                    if cur.fetchone():
+                        self.conn.rollback()
+                        continue
+                    with open(os.path.join(migrations_dir, filename), 'r', encoding='utf-8') as f:
+                        cur.execute(f.read())
+                    cur.execute("INSERT INTO schema_migrations (version) VALUES (%s)", (version,))
+                self.conn.commit()
+                print(f"Миграция {version} применена")
+            except Exception as e:
+                # Следующие миграции могут зависеть от этой: останавливаемся
+                print(f"Ошибка применения миграции {version}: {e}")
+                self.conn.rollback()
+                return False
+        return True
+
     def close(self):
         """Закрытие соединения"""
         if self.conn:
@@ -163,6 +256,7 @@ class EducationDB:
         print("Переподключение к базе данных...")
         self.close()
         self.connect_with_retry()
+        prepare_all(self.conn)
 
     def __enter__(self):
         """Поддержка контекстного менеджера"""
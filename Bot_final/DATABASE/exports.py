@@ -0,0 +1,184 @@
+"""Потоковая выгрузка архива новостей и данных дашборда ректора в CSV / XLSX
+
+Строки читаются серверным (именованным) курсором пачками по EXPORT_BATCH_SIZE и сразу
+пишутся в файл, поэтому память не зависит от размера архива. Выгрузка идет через отдельное
+соединение в режиме только чтения с REPEATABLE READ: файл — согласованный снимок,
+а общее соединение бота не держит долгую транзакцию.
+
+Из каталога Bot_final:
+    python DATABASE/exports.py news --format xlsx
+    python DATABASE/exports.py faculties --format csv --out /tmp
+"""
+import argparse
+import csv
+import os
+import sys
+import tempfile
+from datetime import datetime
+
+import psycopg2
+import psycopg2.extensions
+
+# Строк за один FETCH серверного курсора
+EXPORT_BATCH_SIZE = 2000
+
+# Куда складываются готовые файлы. Бот удаляет файл после отправки, поэтому по умолчанию —
+# временный каталог, а не каталог с кодом
+EXPORTS_DIR = os.getenv("EXPORTS_DIR", os.path.join(tempfile.gettempdir(), "education_bot_exports"))
+
+FORMATS = ('csv', 'xlsx')
+
+# Набор данных: название для пользователя, заголовки колонок и запрос
+EXPORTS = {
+    'news': {
+        'title': "Архив новостей",
+        'columns': ("ID", "Дата публикации", "Дата в выдаче", "Источник", "Заголовок", "Ссылка",
+                    "Тональность", "Оценка", "История", "Загружено"),
+        'sql': """
+            SELECT news_id, published_at, date_text, source, title, link,
+                   sentiment, sentiment_score, cluster_id, parsed_at
+            FROM news
+            ORDER BY news_id
+        """,
+    },
+    'news_daily': {
+        'title': "Тональность новостей по дням",
+        'columns': ("День", "Новостей", "Средняя оценка", "Положительных", "Нейтральных", "Негативных"),
+        'sql': """
+            SELECT day, news_count, ROUND(avg_score, 3), positive_count, neutral_count, negative_count
+            FROM news_sentiment_daily
+            WHERE news_count > 0
+            ORDER BY day
+        """,
+    },
+    'faculties': {
+        'title': "Показатели факультетов",
+        'columns': ("Факультет", "Групп", "Студентов", "Средний GPA", "Программ", "Бюджетных мест",
+                    "Средний проходной балл", "Регистраций на дни открытых дверей"),
+        'sql': """
+            SELECT f.faculty_name,
+                   (SELECT COUNT(*) FROM student_groups g WHERE g.faculty_id = f.faculty_id),
+                   (SELECT COUNT(*) FROM users u JOIN student_groups g ON g.group_id = u.group_id
+                    WHERE g.faculty_id = f.faculty_id AND u.role = 'student'),
+                   ROUND(fg.gpa, 2),
+                   ep.programs, ep.budget_places, ep.pass_score,
+                   (SELECT COALESCE(SUM(od.registered_count), 0) FROM open_days od
+                    WHERE od.faculty_id = f.faculty_id)
+            FROM faculties f
+            LEFT JOIN faculty_gpa fg ON fg.faculty_id = f.faculty_id
+            LEFT JOIN LATERAL (
+                SELECT COUNT(*) as programs, SUM(budget_places) as budget_places,
+                       ROUND(AVG(last_year_pass_score)) as pass_score
+                FROM educational_programs p WHERE p.faculty_id = f.faculty_id
+            ) ep ON TRUE
+            ORDER BY f.faculty_name
+        """,
+    },
+    'students': {
+        'title': "Успеваемость студентов",
+        'columns': ("ID", "Фамилия", "Имя", "Отчество", "Группа", "Факультет", "GPA", "Оценок"),
+        'sql': """
+            SELECT u.user_id, u.last_name, u.first_name, u.surname, g.group_name, f.faculty_name,
+                   ROUND(sg.gpa, 2), COALESCE(sg.grade_count, 0)
+            FROM users u
+            LEFT JOIN student_groups g ON g.group_id = u.group_id
+            LEFT JOIN faculties f ON f.faculty_id = g.faculty_id
+            LEFT JOIN student_gpa sg ON sg.user_id = u.user_id
+            WHERE u.role = 'student'
+            ORDER BY u.user_id
+        """,
+    },
+}
+
+
+def open_export_connection(db_config):
+    """Отдельное соединение для выгрузки: только чтение, один снимок на весь файл"""
+    conn = psycopg2.connect(**db_config)
+    conn.set_session(isolation_level=psycopg2.extensions.ISOLATION_LEVEL_REPEATABLE_READ, readonly=True)
+    return conn
+
+
+def stream_rows(conn, sql, params=None, batch_size=EXPORT_BATCH_SIZE):
+    """Строки запроса из серверного курсора, не больше batch_size в памяти одновременно"""
+    with conn.cursor(name='export_cursor') as cur:
+        cur.itersize = batch_size
+        cur.execute(sql, params)
+        while True:
+            rows = cur.fetchmany(batch_size)
+            if not rows:
+                return
+            yield from rows
+
+
+def write_csv(path, columns, rows):
+    """CSV для Excel (как save_to_csv: UTF-8 с BOM, разделитель «;»). Возвращает число строк"""
+    count = 0
+    with open(path, 'w', newline='', encoding='utf-8-sig') as f:
+        writer = csv.writer(f, delimiter=';')
+        writer.writerow(columns)
+        for row in rows:
+            writer.writerow(row)
+            count += 1
+    return count
+
+
+def write_xlsx(path, columns, rows, title):
+    """XLSX в режиме write_only: строки уходят во временный файл листа, а не в память"""
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet(title[:31])
+    sheet.append(columns)
+    count = 0
+    for row in rows:
+        sheet.append(row)
+        count += 1
+    workbook.save(path)
+    return count
+
+
+def export_dataset(conn, name, fmt, out_dir=EXPORTS_DIR, batch_size=EXPORT_BATCH_SIZE):
+    """Выгрузить набор данных в файл. Возвращает (путь, число строк)"""
+    dataset = EXPORTS[name]
+    if fmt not in FORMATS:
+        raise ValueError(f"Неизвестный формат выгрузки: {fmt}")
+
+    os.makedirs(out_dir, exist_ok=True)
+    path = os.path.join(out_dir, f"{name}_{datetime.now():%Y%m%d_%H%M%S}.{fmt}")
+    try:
+        rows = stream_rows(conn, dataset['sql'], batch_size=batch_size)
+        if fmt == 'csv':
+            count = write_csv(path, dataset['columns'], rows)
+        else:
+            count = write_xlsx(path, dataset['columns'], rows, dataset['title'])
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        if os.path.exists(path):
+            os.remove(path)
+        raise
+    return path, count
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("dataset", choices=EXPORTS)
+    parser.add_argument("--format", choices=FORMATS, default="csv")
+    parser.add_argument("--out", default=EXPORTS_DIR, help="каталог для файла")
+    parser.add_argument("--batch", type=int, default=EXPORT_BATCH_SIZE, help="строк за один FETCH")
+    args = parser.parse_args()
+
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from DATABASE.database import EducationDB
+
+    with EducationDB() as db:
+        conn = open_export_connection(db.db_config)
+    try:
+        path, count = export_dataset(conn, args.dataset, args.format, args.out, args.batch)
+    finally:
+        conn.close()
+    print(f"{EXPORTS[args.dataset]['title']}: {count} строк -> {path} ({os.path.getsize(path) / 1024:.0f} КБ)")
+
+
+if __name__ == "__main__":
+    main()
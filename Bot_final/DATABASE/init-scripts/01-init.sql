@@ -71,6 +71,33 @@ CREATE TABLE program_subjects (
     PRIMARY KEY (program_id, subject_id)
 );
 
+-- Версии справочников: счетчик растет при любом изменении таблицы, по нему бот
+-- сбрасывает закэшированные клавиатуры факультетов и программ
+DROP TABLE IF EXISTS reference_versions CASCADE;
+CREATE TABLE reference_versions (
+    table_name VARCHAR(63) PRIMARY KEY,
+    version BIGINT NOT NULL DEFAULT 0
+);
+
+CREATE OR REPLACE FUNCTION bump_reference_version()
+RETURNS TRIGGER AS $$
+BEGIN
+    INSERT INTO reference_versions (table_name, version) VALUES (TG_TABLE_NAME, 1)
+    ON CONFLICT (table_name) DO UPDATE SET version = reference_versions.version + 1;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER faculties_version_trigger
+    AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON faculties
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_reference_version();
+
+CREATE TRIGGER educational_programs_version_trigger
+    AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON educational_programs
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_reference_version();
+
+INSERT INTO reference_versions (table_name) VALUES ('faculties'), ('educational_programs');
+
 DROP TABLE IF EXISTS applicant_profiles CASCADE;
 -- 6. Профили абитуриентов
 CREATE TABLE applicant_profiles (
@@ -95,7 +122,9 @@ CREATE TABLE open_days (
     faculty_id INTEGER REFERENCES faculties(faculty_id),
     event_date TIMESTAMP NOT NULL,
     description TEXT,
-    max_participants INTEGER
+    max_participants INTEGER,
+    -- Поддерживается триггером на open_day_registrations, список событий не считает COUNT
+    registered_count INTEGER NOT NULL DEFAULT 0 CHECK (registered_count >= 0)
 );
 
 DROP TABLE IF EXISTS open_day_registrations CASCADE;
@@ -110,6 +139,36 @@ CREATE TABLE open_day_registrations (
     UNIQUE(event_id, max_id)
 );
 
+DROP TABLE IF EXISTS open_day_waitlist CASCADE;
+-- Лист ожидания на заполненные дни открытых дверей (очередь по waitlist_id)
+CREATE TABLE open_day_waitlist (
+    waitlist_id SERIAL PRIMARY KEY,
+    event_id INTEGER NOT NULL REFERENCES open_days(event_id),
+    max_id BIGINT NOT NULL,
+    chat_id BIGINT NOT NULL, -- куда написать, когда место освободится
+    first_name VARCHAR(50),
+    last_name VARCHAR(50),
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE(event_id, max_id)
+);
+
+-- Счетчик регистраций на событие
+CREATE OR REPLACE FUNCTION update_open_day_registered_count()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        UPDATE open_days SET registered_count = registered_count + 1 WHERE event_id = NEW.event_id;
+    ELSE
+        UPDATE open_days SET registered_count = registered_count - 1 WHERE event_id = OLD.event_id;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER open_day_registered_count_trigger
+    AFTER INSERT OR DELETE ON open_day_registrations
+    FOR EACH ROW EXECUTE FUNCTION update_open_day_registered_count();
+
 -- Создание таблиц для системы библиотеки
 
 -- Таблица книг
@@ -146,14 +205,34 @@ CREATE TABLE IF NOT EXISTS study_certificate_requests (
     request_id SERIAL PRIMARY KEY,
     user_id VARCHAR(100) NOT NULL,
     request_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-    status VARCHAR(20) DEFAULT 'pending', -- pending, processing, completed
+    -- Электронные: pending -> rendering -> completed (или failed); в деканате: processing -> ready_for_pickup
+    status VARCHAR(20) DEFAULT 'pending',
     delivery_type VARCHAR(20) DEFAULT 'digital' CHECK (delivery_type IN ('digital', 'office')),
     office_location TEXT,
     download_link TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0, -- попыток генерации PDF (certificate_worker.py)
+    locked_at TIMESTAMP, -- когда воркер взял заявку в работу
     completed_at TIMESTAMP,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
+-- Очередь генерации электронных справок: воркер забирает заявки через FOR UPDATE SKIP LOCKED
+CREATE INDEX IF NOT EXISTS idx_certificate_requests_queue ON study_certificate_requests(request_id)
+    WHERE delivery_type = 'digital' AND status IN ('pending', 'rendering');
+
+-- Будим воркер сразу после подачи заявки, а не на следующем опросе
+CREATE OR REPLACE FUNCTION notify_certificate_queue()
+RETURNS TRIGGER AS $$
+BEGIN
+    PERFORM pg_notify('certificate_requests', '');
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER certificate_queue_trigger
+    AFTER INSERT ON study_certificate_requests
+    FOR EACH STATEMENT EXECUTE FUNCTION notify_certificate_queue();
+
 
 -- Таблица для уведомлений
 DROP TABLE IF EXISTS notifications CASCADE;
@@ -177,7 +256,10 @@ CREATE TABLE digital_departments (
     available_places INTEGER NOT NULL,
     application_deadline DATE NOT NULL,
     min_gpa DECIMAL(3,2) NOT NULL CHECK (min_gpa >= 0 AND min_gpa <= 5),
-    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    -- Занятые места: поддерживается триггерами на digital_department_applications
+    approved_count INTEGER NOT NULL DEFAULT 0 CHECK (approved_count >= 0),
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    CHECK (approved_count <= available_places)
 );
 
 -- Таблица заявок на цифровую кафедру
@@ -203,6 +285,124 @@ CREATE TABLE student_grades (
     academic_year VARCHAR(10) NOT NULL
 );
 
+-- Средний балл студента: сумма и число оценок поддерживаются триггерами на student_grades,
+-- поэтому проверка на цифровую кафедру — чтение одной строки, а не AVG по всей истории
+DROP TABLE IF EXISTS student_gpa CASCADE;
+CREATE TABLE student_gpa (
+    user_id BIGINT PRIMARY KEY REFERENCES users(user_id),
+    grade_sum NUMERIC(12,1) NOT NULL DEFAULT 0,
+    grade_count INTEGER NOT NULL DEFAULT 0,
+    gpa NUMERIC GENERATED ALWAYS AS (CASE WHEN grade_count > 0 THEN grade_sum / grade_count END) STORED,
+    last_updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- То же по факультетам (по группе студента); faculty_id = 0 — студенты без группы
+DROP TABLE IF EXISTS faculty_gpa CASCADE;
+CREATE TABLE faculty_gpa (
+    faculty_id INTEGER PRIMARY KEY,
+    grade_sum NUMERIC(14,1) NOT NULL DEFAULT 0,
+    grade_count INTEGER NOT NULL DEFAULT 0,
+    gpa NUMERIC GENERATED ALWAYS AS (CASE WHEN grade_count > 0 THEN grade_sum / grade_count END) STORED,
+    last_updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Применить изменения сумм оценок по студентам (массивы одинаковой длины)
+CREATE OR REPLACE FUNCTION apply_gpa_deltas(p_user_ids BIGINT[], p_sums NUMERIC[], p_counts INTEGER[])
+RETURNS VOID AS $$
+BEGIN
+    INSERT INTO student_gpa (user_id, grade_sum, grade_count, last_updated)
+    SELECT d.user_id, d.grade_sum, d.grade_count, NOW()
+    FROM unnest(p_user_ids, p_sums, p_counts) AS d(user_id, grade_sum, grade_count)
+    ON CONFLICT (user_id) DO UPDATE SET
+        grade_sum = student_gpa.grade_sum + EXCLUDED.grade_sum,
+        grade_count = student_gpa.grade_count + EXCLUDED.grade_count,
+        last_updated = NOW();
+
+    INSERT INTO faculty_gpa (faculty_id, grade_sum, grade_count, last_updated)
+    SELECT COALESCE(g.faculty_id, 0), SUM(d.grade_sum), SUM(d.grade_count), NOW()
+    FROM unnest(p_user_ids, p_sums, p_counts) AS d(user_id, grade_sum, grade_count)
+    JOIN users u ON u.user_id = d.user_id
+    LEFT JOIN student_groups g ON g.group_id = u.group_id
+    GROUP BY COALESCE(g.faculty_id, 0)
+    ON CONFLICT (faculty_id) DO UPDATE SET
+        grade_sum = faculty_gpa.grade_sum + EXCLUDED.grade_sum,
+        grade_count = faculty_gpa.grade_count + EXCLUDED.grade_count,
+        last_updated = NOW();
+END;
+$$ LANGUAGE plpgsql;
+
+-- Триггеры уровня оператора: пакетная загрузка оценок обновляет агрегаты один раз
+CREATE OR REPLACE FUNCTION update_gpa_aggregates()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        PERFORM apply_gpa_deltas(array_agg(user_id), array_agg(grade_sum), array_agg(grade_count))
+        FROM (SELECT user_id, COALESCE(SUM(grade), 0) AS grade_sum, COUNT(grade)::INTEGER AS grade_count
+              FROM new_grades GROUP BY user_id) d;
+    END IF;
+    IF TG_OP IN ('DELETE', 'UPDATE') THEN
+        PERFORM apply_gpa_deltas(array_agg(user_id), array_agg(grade_sum), array_agg(grade_count))
+        FROM (SELECT user_id, -COALESCE(SUM(grade), 0) AS grade_sum, -COUNT(grade)::INTEGER AS grade_count
+              FROM old_grades GROUP BY user_id) d;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER student_grades_gpa_insert_trigger
+    AFTER INSERT ON student_grades
+    REFERENCING NEW TABLE AS new_grades
+    FOR EACH STATEMENT EXECUTE FUNCTION update_gpa_aggregates();
+
+CREATE TRIGGER student_grades_gpa_update_trigger
+    AFTER UPDATE ON student_grades
+    REFERENCING OLD TABLE AS old_grades NEW TABLE AS new_grades
+    FOR EACH STATEMENT EXECUTE FUNCTION update_gpa_aggregates();
+
+CREATE TRIGGER student_grades_gpa_delete_trigger
+    AFTER DELETE ON student_grades
+    REFERENCING OLD TABLE AS old_grades
+    FOR EACH STATEMENT EXECUTE FUNCTION update_gpa_aggregates();
+
+-- Студент перешел в группу другого факультета — переносим его оценки в сводке факультетов
+CREATE OR REPLACE FUNCTION move_student_faculty_gpa()
+RETURNS TRIGGER AS $$
+DECLARE
+    old_faculty INTEGER;
+    new_faculty INTEGER;
+    s student_gpa%ROWTYPE;
+BEGIN
+    SELECT * INTO s FROM student_gpa WHERE user_id = NEW.user_id;
+    IF NOT FOUND OR s.grade_count = 0 THEN
+        RETURN NULL;
+    END IF;
+
+    SELECT COALESCE((SELECT faculty_id FROM student_groups WHERE group_id = OLD.group_id), 0) INTO old_faculty;
+    SELECT COALESCE((SELECT faculty_id FROM student_groups WHERE group_id = NEW.group_id), 0) INTO new_faculty;
+    IF old_faculty = new_faculty THEN
+        RETURN NULL;
+    END IF;
+
+    UPDATE faculty_gpa
+    SET grade_sum = grade_sum - s.grade_sum, grade_count = grade_count - s.grade_count, last_updated = NOW()
+    WHERE faculty_id = old_faculty;
+
+    INSERT INTO faculty_gpa (faculty_id, grade_sum, grade_count, last_updated)
+    VALUES (new_faculty, s.grade_sum, s.grade_count, NOW())
+    ON CONFLICT (faculty_id) DO UPDATE SET
+        grade_sum = faculty_gpa.grade_sum + EXCLUDED.grade_sum,
+        grade_count = faculty_gpa.grade_count + EXCLUDED.grade_count,
+        last_updated = NOW();
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER users_group_gpa_trigger
+    AFTER UPDATE OF group_id ON users
+    FOR EACH ROW
+    WHEN (OLD.group_id IS DISTINCT FROM NEW.group_id)
+    EXECUTE FUNCTION move_student_faculty_gpa();
+
 
 -- Таблица контрактов преподавателей
 DROP TABLE IF EXISTS teacher_contracts CASCADE;
@@ -259,8 +459,15 @@ CREATE TABLE IF NOT EXISTS business_trips (
     end_date DATE NOT NULL,
     status VARCHAR(50) DEFAULT 'pending', -- pending, approved, rejected
     dean_id BIGINT REFERENCES users(user_id),
+    -- Период включительно по дату окончания; по нему ищутся пересечения
+    period DATERANGE GENERATED ALWAYS AS (daterange(start_date, end_date, '[]')) STORED,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    -- Две неотклоненные командировки одного человека не пересекаются. user_id сравнивается
+    -- как диапазон из одного значения: хватает встроенных классов GiST, btree_gist не нужен
+    CONSTRAINT business_trips_no_overlap EXCLUDE USING gist (
+        int8range(user_id, user_id, '[]') WITH &&, period WITH &&
+    ) WHERE (status <> 'rejected')
 );
 
 -- Общая таблица расписания
@@ -286,11 +493,141 @@ CREATE TABLE IF NOT EXISTS news (
     link TEXT NOT NULL UNIQUE,
     source VARCHAR(200),
     date_text VARCHAR(50),
+    -- Дата публикации, разобранная при сохранении (NULL, если разобрать не удалось)
+    published_at DATE,
     sentiment VARCHAR(20),
     sentiment_score DECIMAL(5,3),
+    -- История (кластер почти одинаковых заголовков разных изданий): news_id ее первой новости
+    cluster_id INTEGER,
     parsed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
+-- Индекс историй для rector/news_clusters.py: MinHash-сигнатура первой новости истории
+-- и LSH-корзины ее полос. Кандидаты для нового заголовка — выборка корзин по первичному ключу
+DROP TABLE IF EXISTS news_clusters CASCADE;
+CREATE TABLE news_clusters (
+    cluster_id INTEGER PRIMARY KEY REFERENCES news(news_id) ON DELETE CASCADE,
+    -- NULL у заголовков без значимых слов: такие истории не объединяются
+    signature BIGINT[],
+    first_seen TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    last_seen TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+DROP TABLE IF EXISTS news_lsh_buckets CASCADE;
+CREATE TABLE news_lsh_buckets (
+    band SMALLINT NOT NULL,
+    bucket BIGINT NOT NULL,
+    cluster_id INTEGER NOT NULL REFERENCES news_clusters(cluster_id) ON DELETE CASCADE,
+    PRIMARY KEY (band, bucket, cluster_id)
+);
+
+-- Сводки тональности новостей по дням и неделям (week — понедельник недели).
+-- Ведутся триггерами на news; тренд за месяцы — чтение диапазона по первичному ключу
+DROP TABLE IF EXISTS news_sentiment_daily CASCADE;
+CREATE TABLE news_sentiment_daily (
+    day DATE PRIMARY KEY,
+    news_count INTEGER NOT NULL DEFAULT 0,
+    score_sum NUMERIC(12,3) NOT NULL DEFAULT 0,
+    positive_count INTEGER NOT NULL DEFAULT 0,
+    neutral_count INTEGER NOT NULL DEFAULT 0,
+    negative_count INTEGER NOT NULL DEFAULT 0,
+    avg_score NUMERIC GENERATED ALWAYS AS (CASE WHEN news_count > 0 THEN score_sum / news_count END) STORED
+);
+
+DROP TABLE IF EXISTS news_sentiment_weekly CASCADE;
+CREATE TABLE news_sentiment_weekly (
+    week DATE PRIMARY KEY,
+    news_count INTEGER NOT NULL DEFAULT 0,
+    score_sum NUMERIC(12,3) NOT NULL DEFAULT 0,
+    positive_count INTEGER NOT NULL DEFAULT 0,
+    neutral_count INTEGER NOT NULL DEFAULT 0,
+    negative_count INTEGER NOT NULL DEFAULT 0,
+    avg_score NUMERIC GENERATED ALWAYS AS (CASE WHEN news_count > 0 THEN score_sum / news_count END) STORED
+);
+
+-- Добавить (p_sign = 1) или вычесть (p_sign = -1) новости из сводок
+CREATE OR REPLACE FUNCTION apply_news_sentiment_deltas(p_days DATE[], p_sentiments TEXT[], p_scores NUMERIC[], p_sign INTEGER)
+RETURNS VOID AS $$
+BEGIN
+    INSERT INTO news_sentiment_daily AS s (day, news_count, score_sum, positive_count, neutral_count, negative_count)
+    SELECT d.day, p_sign * COUNT(*), p_sign * COALESCE(SUM(d.score), 0),
+           p_sign * COUNT(*) FILTER (WHERE d.sentiment = 'Положительный'),
+           p_sign * COUNT(*) FILTER (WHERE d.sentiment = 'Нейтральный'),
+           p_sign * COUNT(*) FILTER (WHERE d.sentiment = 'Негативный')
+    FROM unnest(p_days, p_sentiments, p_scores) AS d(day, sentiment, score)
+    GROUP BY d.day
+    ON CONFLICT (day) DO UPDATE SET
+        news_count = s.news_count + EXCLUDED.news_count,
+        score_sum = s.score_sum + EXCLUDED.score_sum,
+        positive_count = s.positive_count + EXCLUDED.positive_count,
+        neutral_count = s.neutral_count + EXCLUDED.neutral_count,
+        negative_count = s.negative_count + EXCLUDED.negative_count;
+
+    INSERT INTO news_sentiment_weekly AS s (week, news_count, score_sum, positive_count, neutral_count, negative_count)
+    SELECT date_trunc('week', d.day)::DATE, p_sign * COUNT(*), p_sign * COALESCE(SUM(d.score), 0),
+           p_sign * COUNT(*) FILTER (WHERE d.sentiment = 'Положительный'),
+           p_sign * COUNT(*) FILTER (WHERE d.sentiment = 'Нейтральный'),
+           p_sign * COUNT(*) FILTER (WHERE d.sentiment = 'Негативный')
+    FROM unnest(p_days, p_sentiments, p_scores) AS d(day, sentiment, score)
+    GROUP BY date_trunc('week', d.day)::DATE
+    ON CONFLICT (week) DO UPDATE SET
+        news_count = s.news_count + EXCLUDED.news_count,
+        score_sum = s.score_sum + EXCLUDED.score_sum,
+        positive_count = s.positive_count + EXCLUDED.positive_count,
+        neutral_count = s.neutral_count + EXCLUDED.neutral_count,
+        negative_count = s.negative_count + EXCLUDED.negative_count;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Триггеры уровня оператора: пакет новостей обновляет сводки двумя INSERT ... ON CONFLICT.
+-- Новости без даты публикации в сводки не попадают
+CREATE OR REPLACE FUNCTION update_news_sentiment_rollups()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'UPDATE' THEN
+        -- UPDATE других колонок (cluster_id при разборе на истории) сводки не меняет:
+        -- учитываются только строки с новой датой или тональностью
+        PERFORM apply_news_sentiment_deltas(array_agg(o.published_at), array_agg(o.sentiment::TEXT),
+                                            array_agg(o.sentiment_score::NUMERIC), -1)
+        FROM old_news o JOIN new_news n ON n.news_id = o.news_id
+        WHERE o.published_at IS NOT NULL
+        AND (o.published_at, o.sentiment, o.sentiment_score) IS DISTINCT FROM (n.published_at, n.sentiment, n.sentiment_score);
+        PERFORM apply_news_sentiment_deltas(array_agg(n.published_at), array_agg(n.sentiment::TEXT),
+                                            array_agg(n.sentiment_score::NUMERIC), 1)
+        FROM old_news o JOIN new_news n ON n.news_id = o.news_id
+        WHERE n.published_at IS NOT NULL
+        AND (o.published_at, o.sentiment, o.sentiment_score) IS DISTINCT FROM (n.published_at, n.sentiment, n.sentiment_score);
+        RETURN NULL;
+    END IF;
+    IF TG_OP = 'INSERT' THEN
+        PERFORM apply_news_sentiment_deltas(array_agg(published_at), array_agg(sentiment::TEXT),
+                                            array_agg(sentiment_score::NUMERIC), 1)
+        FROM new_news WHERE published_at IS NOT NULL;
+    END IF;
+    IF TG_OP = 'DELETE' THEN
+        PERFORM apply_news_sentiment_deltas(array_agg(published_at), array_agg(sentiment::TEXT),
+                                            array_agg(sentiment_score::NUMERIC), -1)
+        FROM old_news WHERE published_at IS NOT NULL;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER news_sentiment_insert_trigger
+    AFTER INSERT ON news
+    REFERENCING NEW TABLE AS new_news
+    FOR EACH STATEMENT EXECUTE FUNCTION update_news_sentiment_rollups();
+
+CREATE TRIGGER news_sentiment_update_trigger
+    AFTER UPDATE ON news
+    REFERENCING OLD TABLE AS old_news NEW TABLE AS new_news
+    FOR EACH STATEMENT EXECUTE FUNCTION update_news_sentiment_rollups();
+
+CREATE TRIGGER news_sentiment_delete_trigger
+    AFTER DELETE ON news
+    REFERENCING OLD TABLE AS old_news
+    FOR EACH STATEMENT EXECUTE FUNCTION update_news_sentiment_rollups();
+
 
 -- Таблица для заявок на отпуск
 DROP TABLE IF EXISTS vacations CASCADE;
@@ -302,8 +639,13 @@ CREATE TABLE IF NOT EXISTS vacations (
     days_count INTEGER NOT NULL,
     status VARCHAR(50) DEFAULT 'pending', -- pending, approved, rejected
     rector_id BIGINT REFERENCES users(user_id),
+    period DATERANGE GENERATED ALWAYS AS (daterange(start_date, end_date, '[]')) STORED,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    -- Два неотклоненных отпуска одного человека не пересекаются
+    CONSTRAINT vacations_no_overlap EXCLUDE USING gist (
+        int8range(user_id, user_id, '[]') WITH &&, period WITH &&
+    ) WHERE (status <> 'rejected')
 );
 
 -- Создание индексов для улучшения производительности
@@ -315,6 +657,8 @@ CREATE INDEX idx_program_subjects_subject_id ON program_subjects(subject_id);
 CREATE INDEX idx_applicant_scores_user_id ON applicant_scores(user_id);
 CREATE INDEX idx_applicant_scores_subject_id ON applicant_scores(subject_id);
 CREATE INDEX idx_open_days_faculty_id ON open_days(faculty_id);
+CREATE INDEX idx_open_days_event_date ON open_days(event_date);
+CREATE INDEX idx_open_day_waitlist_event_id ON open_day_waitlist(event_id, waitlist_id);
 CREATE INDEX idx_open_day_registrations_event_id ON open_day_registrations(event_id);
 CREATE INDEX idx_open_day_registrations_user_id ON open_day_registrations(max_id);
 CREATE INDEX idx_educational_programs_price ON educational_programs(price);
@@ -322,19 +666,28 @@ CREATE INDEX idx_educational_programs_price ON educational_programs(price);
 
 
 
--- Индекс для поиска по дате и тональности
-CREATE INDEX IF NOT EXISTS idx_news_date_sentiment ON news(date_text, sentiment);
+-- Индекс для поиска по дате публикации и тональности
+CREATE INDEX IF NOT EXISTS idx_news_published_sentiment ON news(published_at, sentiment);
 CREATE INDEX IF NOT EXISTS idx_news_sentiment_score ON news(sentiment_score);
+CREATE INDEX IF NOT EXISTS idx_news_cluster_id ON news(cluster_id);
+CREATE INDEX IF NOT EXISTS idx_news_clusters_last_seen ON news_clusters(last_seen DESC);
 
 -- Индексы для оптимизации
 CREATE INDEX IF NOT EXISTS idx_business_trips_user_id ON business_trips(user_id);
 CREATE INDEX IF NOT EXISTS idx_business_trips_status ON business_trips(status);
 CREATE INDEX IF NOT EXISTS idx_business_trips_dean_id ON business_trips(dean_id);
+-- Очередь согласования декана: длина очереди при назначении и постраничный просмотр
+-- Кто отсутствует в заданные дни (сотрудники кафедры в отъезде)
+CREATE INDEX IF NOT EXISTS idx_business_trips_period ON business_trips USING gist (period) WHERE status <> 'rejected';
+CREATE INDEX IF NOT EXISTS idx_business_trips_pending_dean ON business_trips(dean_id, created_at, trip_id) WHERE status = 'pending';
 
 -- Индексы для оптимизации
 CREATE INDEX IF NOT EXISTS idx_vacations_user_id ON vacations(user_id);
 CREATE INDEX IF NOT EXISTS idx_vacations_status ON vacations(status);
 CREATE INDEX IF NOT EXISTS idx_vacations_rector_id ON vacations(rector_id);
+-- Очередь согласования ректора
+CREATE INDEX IF NOT EXISTS idx_vacations_period ON vacations USING gist (period) WHERE status <> 'rejected';
+CREATE INDEX IF NOT EXISTS idx_vacations_pending_rector ON vacations(rector_id, created_at, vacation_id) WHERE status = 'pending';
 
 -- Таблица расписания преподавателей
 -- Таблица учебных групп
@@ -444,32 +797,27 @@ CREATE TRIGGER schedule_change_trigger
     FOR EACH ROW EXECUTE FUNCTION notify_schedule_change();
 
 
--- Триггерная функция для уведомлений об изменении статуса отпуска
+-- Триггерная функция для уведомлений об изменении статуса отпуска.
+-- Уровень оператора: пакетное согласование создает все уведомления одним INSERT
 CREATE OR REPLACE FUNCTION notify_vacation_status_change()
 RETURNS TRIGGER AS $$
-DECLARE
-    status_text TEXT;
 BEGIN
-    -- Если статус изменился
-    IF OLD.status IS DISTINCT FROM NEW.status THEN
-        -- Определяем текст статуса
-        status_text := CASE
-            WHEN NEW.status = 'approved' THEN '✅ Одобрен'
-            WHEN NEW.status = 'rejected' THEN '❌ Отклонен'
-            ELSE NEW.status
-        END;
-
-        -- Создаем уведомление
-        INSERT INTO notifications (user_id, type, title, message, related_id)
-        VALUES (
-            NEW.user_id,
-            'vacation_status',
-            '🏖️ Статус отпуска изменен',
-            'Статус вашего заявления на отпуск изменен на: ' || status_text,
-            NEW.vacation_id
-        );
-    END IF;
-    RETURN NEW;
+    INSERT INTO notifications (user_id, type, title, message, related_id)
+    SELECT
+        n.user_id,
+        'vacation_status',
+        '🏖️ Статус отпуска изменен',
+        'Статус вашего заявления на отпуск изменен на: ' ||
+        CASE
+            WHEN n.status = 'approved' THEN '✅ Одобрен'
+            WHEN n.status = 'rejected' THEN '❌ Отклонен'
+            ELSE n.status
+        END,
+        n.vacation_id
+    FROM new_vacations n
+    JOIN old_vacations o ON o.vacation_id = n.vacation_id
+    WHERE o.status IS DISTINCT FROM n.status;
+    RETURN NULL;
 END;
 $$ LANGUAGE plpgsql;
 
@@ -477,34 +825,29 @@ $$ LANGUAGE plpgsql;
 DROP TRIGGER IF EXISTS vacation_status_trigger ON vacations;
 CREATE TRIGGER vacation_status_trigger
     AFTER UPDATE ON vacations
-    FOR EACH ROW EXECUTE FUNCTION notify_vacation_status_change();
+    REFERENCING OLD TABLE AS old_vacations NEW TABLE AS new_vacations
+    FOR EACH STATEMENT EXECUTE FUNCTION notify_vacation_status_change();
 
--- Триггерная функция для уведомлений об изменении статуса командировки
+-- Триггерная функция для уведомлений об изменении статуса командировки (уровень оператора)
 CREATE OR REPLACE FUNCTION notify_business_trip_status_change()
 RETURNS TRIGGER AS $$
-DECLARE
-    status_text TEXT;
 BEGIN
-    -- Если статус изменился
-    IF OLD.status IS DISTINCT FROM NEW.status THEN
-        -- Определяем текст статуса
-        status_text := CASE
-            WHEN NEW.status = 'approved' THEN '✅ Одобрена'
-            WHEN NEW.status = 'rejected' THEN '❌ Отклонена'
-            ELSE NEW.status
-        END;
-
-        -- Создаем уведомление
-        INSERT INTO notifications (user_id, type, title, message, related_id)
-        VALUES (
-            NEW.user_id,
-            'business_trip_status',
-            '🛫 Статус командировки изменен',
-            'Статус вашей заявки на командировку изменен на: ' || status_text,
-            NEW.trip_id
-        );
-    END IF;
-    RETURN NEW;
+    INSERT INTO notifications (user_id, type, title, message, related_id)
+    SELECT
+        n.user_id,
+        'business_trip_status',
+        '🛫 Статус командировки изменен',
+        'Статус вашей заявки на командировку изменен на: ' ||
+        CASE
+            WHEN n.status = 'approved' THEN '✅ Одобрена'
+            WHEN n.status = 'rejected' THEN '❌ Отклонена'
+            ELSE n.status
+        END,
+        n.trip_id
+    FROM new_trips n
+    JOIN old_trips o ON o.trip_id = n.trip_id
+    WHERE o.status IS DISTINCT FROM n.status;
+    RETURN NULL;
 END;
 $$ LANGUAGE plpgsql;
 
@@ -512,7 +855,8 @@ $$ LANGUAGE plpgsql;
 DROP TRIGGER IF EXISTS business_trip_status_trigger ON business_trips;
 CREATE TRIGGER business_trip_status_trigger
     AFTER UPDATE ON business_trips
-    FOR EACH ROW EXECUTE FUNCTION notify_business_trip_status_change();
+    REFERENCING OLD TABLE AS old_trips NEW TABLE AS new_trips
+    FOR EACH STATEMENT EXECUTE FUNCTION notify_business_trip_status_change();
 
 
 
@@ -521,54 +865,36 @@ CREATE TRIGGER business_trip_status_trigger
 CREATE INDEX IF NOT EXISTS idx_digital_departments_deadline ON digital_departments(application_deadline);
 CREATE INDEX IF NOT EXISTS idx_digital_applications_user_id ON digital_department_applications(user_id);
 CREATE INDEX IF NOT EXISTS idx_digital_applications_status ON digital_department_applications(status);
+CREATE INDEX IF NOT EXISTS idx_digital_applications_department_status ON digital_department_applications(department_id, status);
 CREATE INDEX IF NOT EXISTS idx_student_grades_user_id ON student_grades(user_id);
 
 
 -- Триггерная функция для уведомлений об изменении статуса заявки на цифровую кафедру
 CREATE OR REPLACE FUNCTION notify_digital_department_status_change()
 RETURNS TRIGGER AS $$
-DECLARE
-    dept_name TEXT;
-    status_text TEXT;
-    emoji TEXT;
-    user_chat_id BIGINT;
 BEGIN
-    -- Если статус изменился
-    IF OLD.status IS DISTINCT FROM NEW.status THEN
-        -- Получаем название направления
-        SELECT department_name INTO dept_name
-        FROM digital_departments
-        WHERE department_id = NEW.department_id;
-
-        -- Определяем текст и эмодзи для статуса
-        status_text := CASE
-            WHEN NEW.status = 'approved' THEN 'одобрена'
-            WHEN NEW.status = 'rejected' THEN 'отклонена'
-            ELSE NEW.status
-        END;
-
-        emoji := CASE
-            WHEN NEW.status = 'approved' THEN '✅'
-            WHEN NEW.status = 'rejected' THEN '❌'
+    -- Уровень оператора: пакетное зачисление создает все уведомления одним INSERT
+    INSERT INTO notifications (user_id, type, title, message, related_id)
+    SELECT
+        n.user_id,
+        'digital_department_status',
+        CASE
+            WHEN n.status = 'approved' THEN '✅'
+            WHEN n.status = 'rejected' THEN '❌'
             ELSE '📝'
-        END;
-
-        -- Получаем chat_id пользователя из таблицы users
-        SELECT u.user_id INTO user_chat_id
-        FROM users u
-        WHERE u.user_id = NEW.user_id;
-
-        -- Создаем уведомление
-        INSERT INTO notifications (user_id, type, title, message, related_id)
-        VALUES (
-            user_chat_id,
-            'digital_department_status',
-            emoji || ' Статус заявки на цифровую кафедру',
-            'Ваша заявка на направление "' || dept_name || '" ' || status_text || '.',
-            NEW.application_id
-        );
-    END IF;
-    RETURN NEW;
+        END || ' Статус заявки на цифровую кафедру',
+        'Ваша заявка на направление "' || d.department_name || '" ' ||
+        CASE
+            WHEN n.status = 'approved' THEN 'одобрена'
+            WHEN n.status = 'rejected' THEN 'отклонена'
+            ELSE n.status
+        END || '.',
+        n.application_id
+    FROM new_applications n
+    JOIN old_applications o ON o.application_id = n.application_id
+    JOIN digital_departments d ON d.department_id = n.department_id
+    WHERE o.status IS DISTINCT FROM n.status;
+    RETURN NULL;
 END;
 $$ LANGUAGE plpgsql;
 
@@ -576,7 +902,47 @@ $$ LANGUAGE plpgsql;
 DROP TRIGGER IF EXISTS digital_department_status_trigger ON digital_department_applications;
 CREATE TRIGGER digital_department_status_trigger
     AFTER UPDATE ON digital_department_applications
-    FOR EACH ROW EXECUTE FUNCTION notify_digital_department_status_change();
+    REFERENCING OLD TABLE AS old_applications NEW TABLE AS new_applications
+    FOR EACH STATEMENT EXECUTE FUNCTION notify_digital_department_status_change();
+
+-- Счетчик одобренных заявок (занятых мест) на направлениях
+CREATE OR REPLACE FUNCTION update_digital_department_approved_count()
+RETURNS TRIGGER AS $$
+BEGIN
+    -- Сначала освобождаем места, потом занимаем: иначе при заполненном направлении
+    -- обновление уже одобренной заявки на миг нарушило бы CHECK
+    IF TG_OP IN ('DELETE', 'UPDATE') THEN
+        UPDATE digital_departments d
+        SET approved_count = d.approved_count - c.approved
+        FROM (SELECT department_id, COUNT(*) AS approved FROM old_applications
+              WHERE status = 'approved' GROUP BY department_id) c
+        WHERE d.department_id = c.department_id;
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        UPDATE digital_departments d
+        SET approved_count = d.approved_count + c.approved
+        FROM (SELECT department_id, COUNT(*) AS approved FROM new_applications
+              WHERE status = 'approved' GROUP BY department_id) c
+        WHERE d.department_id = c.department_id;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER digital_department_approved_insert_trigger
+    AFTER INSERT ON digital_department_applications
+    REFERENCING NEW TABLE AS new_applications
+    FOR EACH STATEMENT EXECUTE FUNCTION update_digital_department_approved_count();
+
+CREATE TRIGGER digital_department_approved_update_trigger
+    AFTER UPDATE ON digital_department_applications
+    REFERENCING OLD TABLE AS old_applications NEW TABLE AS new_applications
+    FOR EACH STATEMENT EXECUTE FUNCTION update_digital_department_approved_count();
+
+CREATE TRIGGER digital_department_approved_delete_trigger
+    AFTER DELETE ON digital_department_applications
+    REFERENCING OLD TABLE AS old_applications
+    FOR EACH STATEMENT EXECUTE FUNCTION update_digital_department_approved_count();
 
 -- Триггерная функция для уведомлений о новой заявке на цифровую кафедру
 CREATE OR REPLACE FUNCTION notify_digital_department_application_created()
@@ -624,6 +990,8 @@ CREATE TABLE projects (
     description TEXT NOT NULL,
     required_roles TEXT NOT NULL, -- JSON или текстовое поле с ролями
     status VARCHAR(20) DEFAULT 'active' CHECK (status IN ('active', 'completed', 'cancelled')),
+    team_size INTEGER NOT NULL DEFAULT 0 CHECK (team_size >= 0), -- активные участники, ведет триггер
+    pending_applications INTEGER NOT NULL DEFAULT 0 CHECK (pending_applications >= 0), -- заявки pending, ведет триггер
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
@@ -653,6 +1021,16 @@ CREATE TABLE project_applications (
     UNIQUE(project_id, user_id)
 );
 
+-- Инвертированный индекс проектов для рекомендаций: леммы ролей, названия и описания
+-- с весами (заполняет DATABASE/project_index.py при создании проекта)
+DROP TABLE IF EXISTS project_terms CASCADE;
+CREATE TABLE project_terms (
+    term VARCHAR(100) NOT NULL,
+    project_id INTEGER NOT NULL REFERENCES projects(project_id) ON DELETE CASCADE,
+    weight REAL NOT NULL,
+    PRIMARY KEY (term, project_id)
+);
+
 -- Индексы для оптимизации
 CREATE INDEX IF NOT EXISTS idx_projects_creator_id ON projects(creator_id);
 CREATE INDEX IF NOT EXISTS idx_projects_status ON projects(status);
@@ -661,6 +1039,45 @@ CREATE INDEX IF NOT EXISTS idx_project_members_user_id ON project_members(user_i
 CREATE INDEX IF NOT EXISTS idx_project_applications_project_id ON project_applications(project_id);
 CREATE INDEX IF NOT EXISTS idx_project_applications_user_id ON project_applications(user_id);
 CREATE INDEX IF NOT EXISTS idx_project_applications_status ON project_applications(status);
+CREATE INDEX IF NOT EXISTS idx_project_terms_project_id ON project_terms(project_id);
+-- Постраничный каталог: активные проекты от новых к старым, курсор (created_at, project_id)
+CREATE INDEX IF NOT EXISTS idx_projects_active_created ON projects(created_at DESC, project_id DESC) WHERE status = 'active';
+
+-- Счетчик активных участников проекта
+CREATE OR REPLACE FUNCTION update_project_team_size()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') AND OLD.status = 'active' THEN
+        UPDATE projects SET team_size = team_size - 1 WHERE project_id = OLD.project_id;
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') AND NEW.status = 'active' THEN
+        UPDATE projects SET team_size = team_size + 1 WHERE project_id = NEW.project_id;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER project_team_size_trigger
+    AFTER INSERT OR DELETE OR UPDATE OF status, project_id ON project_members
+    FOR EACH ROW EXECUTE FUNCTION update_project_team_size();
+
+-- Счетчик заявок, ожидающих решения создателя
+CREATE OR REPLACE FUNCTION update_project_pending_applications()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') AND OLD.status = 'pending' THEN
+        UPDATE projects SET pending_applications = pending_applications - 1 WHERE project_id = OLD.project_id;
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') AND NEW.status = 'pending' THEN
+        UPDATE projects SET pending_applications = pending_applications + 1 WHERE project_id = NEW.project_id;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER project_pending_applications_trigger
+    AFTER INSERT OR DELETE OR UPDATE OF status, project_id ON project_applications
+    FOR EACH ROW EXECUTE FUNCTION update_project_pending_applications();
 
 -- Триггеры для уведомлений о проектах
 
@@ -750,5 +1167,15 @@ CREATE TRIGGER project_application_status_trigger
 CREATE INDEX IF NOT EXISTS idx_teacher_contracts_user_id ON teacher_contracts(user_id);
 CREATE INDEX IF NOT EXISTS idx_teacher_contracts_end_date ON teacher_contracts(end_date);
 CREATE INDEX IF NOT EXISTS idx_teacher_contracts_status ON teacher_contracts(status);
+CREATE INDEX IF NOT EXISTS idx_teacher_contracts_department ON teacher_contracts(department) WHERE status = 'active';
 CREATE INDEX IF NOT EXISTS idx_vacancy_competitions_dates ON vacancy_competitions(application_start_date, application_end_date);
 CREATE INDEX IF NOT EXISTS idx_vacancy_competitions_status ON vacancy_competitions(status);
+
+-- Состояние незавершенных диалогов и авторизаций, сохраненное при остановке бота
+CREATE TABLE IF NOT EXISTS conversation_state (
+    chat_id BIGINT NOT NULL,
+    store VARCHAR(50) NOT NULL,
+    data JSONB NOT NULL,
+    saved_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (chat_id, store)
+);
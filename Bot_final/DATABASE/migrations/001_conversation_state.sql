@@ -0,0 +1,9 @@
+-- Состояние диалогов, сохраняемое при остановке бота (lifecycle.py)
+
+CREATE TABLE IF NOT EXISTS conversation_state (
+    chat_id BIGINT NOT NULL,
+    store VARCHAR(50) NOT NULL,
+    data JSONB NOT NULL,
+    saved_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (chat_id, store)
+);
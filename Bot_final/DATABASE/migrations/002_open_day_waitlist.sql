@@ -0,0 +1,37 @@
+-- Счетчик регистраций на дни открытых дверей и лист ожидания
+
+ALTER TABLE open_days ADD COLUMN IF NOT EXISTS registered_count INTEGER NOT NULL DEFAULT 0 CHECK (registered_count >= 0);
+
+UPDATE open_days od
+SET registered_count = (SELECT COUNT(*) FROM open_day_registrations r WHERE r.event_id = od.event_id);
+
+CREATE TABLE IF NOT EXISTS open_day_waitlist (
+    waitlist_id SERIAL PRIMARY KEY,
+    event_id INTEGER NOT NULL REFERENCES open_days(event_id),
+    max_id BIGINT NOT NULL,
+    chat_id BIGINT NOT NULL, -- куда написать, когда место освободится
+    first_name VARCHAR(50),
+    last_name VARCHAR(50),
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE(event_id, max_id)
+);
+
+CREATE OR REPLACE FUNCTION update_open_day_registered_count()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        UPDATE open_days SET registered_count = registered_count + 1 WHERE event_id = NEW.event_id;
+    ELSE
+        UPDATE open_days SET registered_count = registered_count - 1 WHERE event_id = OLD.event_id;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS open_day_registered_count_trigger ON open_day_registrations;
+CREATE TRIGGER open_day_registered_count_trigger
+    AFTER INSERT OR DELETE ON open_day_registrations
+    FOR EACH ROW EXECUTE FUNCTION update_open_day_registered_count();
+
+CREATE INDEX IF NOT EXISTS idx_open_days_event_date ON open_days(event_date);
+CREATE INDEX IF NOT EXISTS idx_open_day_waitlist_event_id ON open_day_waitlist(event_id, waitlist_id);
@@ -0,0 +1,122 @@
+-- Суммы и число оценок по студентам и факультетам, ведутся триггерами на student_grades
+
+CREATE TABLE IF NOT EXISTS student_gpa (
+    user_id BIGINT PRIMARY KEY REFERENCES users(user_id),
+    grade_sum NUMERIC(12,1) NOT NULL DEFAULT 0,
+    grade_count INTEGER NOT NULL DEFAULT 0,
+    gpa NUMERIC GENERATED ALWAYS AS (CASE WHEN grade_count > 0 THEN grade_sum / grade_count END) STORED,
+    last_updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS faculty_gpa (
+    faculty_id INTEGER PRIMARY KEY,
+    grade_sum NUMERIC(14,1) NOT NULL DEFAULT 0,
+    grade_count INTEGER NOT NULL DEFAULT 0,
+    gpa NUMERIC GENERATED ALWAYS AS (CASE WHEN grade_count > 0 THEN grade_sum / grade_count END) STORED,
+    last_updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE OR REPLACE FUNCTION apply_gpa_deltas(p_user_ids BIGINT[], p_sums NUMERIC[], p_counts INTEGER[])
+RETURNS VOID AS $$
+BEGIN
+    INSERT INTO student_gpa (user_id, grade_sum, grade_count, last_updated)
+    SELECT d.user_id, d.grade_sum, d.grade_count, NOW()
+    FROM unnest(p_user_ids, p_sums, p_counts) AS d(user_id, grade_sum, grade_count)
+    ON CONFLICT (user_id) DO UPDATE SET
+        grade_sum = student_gpa.grade_sum + EXCLUDED.grade_sum,
+        grade_count = student_gpa.grade_count + EXCLUDED.grade_count,
+        last_updated = NOW();
+
+    INSERT INTO faculty_gpa (faculty_id, grade_sum, grade_count, last_updated)
+    SELECT COALESCE(g.faculty_id, 0), SUM(d.grade_sum), SUM(d.grade_count), NOW()
+    FROM unnest(p_user_ids, p_sums, p_counts) AS d(user_id, grade_sum, grade_count)
+    JOIN users u ON u.user_id = d.user_id
+    LEFT JOIN student_groups g ON g.group_id = u.group_id
+    GROUP BY COALESCE(g.faculty_id, 0)
+    ON CONFLICT (faculty_id) DO UPDATE SET
+        grade_sum = faculty_gpa.grade_sum + EXCLUDED.grade_sum,
+        grade_count = faculty_gpa.grade_count + EXCLUDED.grade_count,
+        last_updated = NOW();
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION update_gpa_aggregates()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        PERFORM apply_gpa_deltas(array_agg(user_id), array_agg(grade_sum), array_agg(grade_count))
+        FROM (SELECT user_id, COALESCE(SUM(grade), 0) AS grade_sum, COUNT(grade)::INTEGER AS grade_count
+              FROM new_grades GROUP BY user_id) d;
+    END IF;
+    IF TG_OP IN ('DELETE', 'UPDATE') THEN
+        PERFORM apply_gpa_deltas(array_agg(user_id), array_agg(grade_sum), array_agg(grade_count))
+        FROM (SELECT user_id, -COALESCE(SUM(grade), 0) AS grade_sum, -COUNT(grade)::INTEGER AS grade_count
+              FROM old_grades GROUP BY user_id) d;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION move_student_faculty_gpa()
+RETURNS TRIGGER AS $$
+DECLARE
+    old_faculty INTEGER;
+    new_faculty INTEGER;
+    s student_gpa%ROWTYPE;
+BEGIN
+    SELECT * INTO s FROM student_gpa WHERE user_id = NEW.user_id;
+    IF NOT FOUND OR s.grade_count = 0 THEN
+        RETURN NULL;
+    END IF;
+
+    SELECT COALESCE((SELECT faculty_id FROM student_groups WHERE group_id = OLD.group_id), 0) INTO old_faculty;
+    SELECT COALESCE((SELECT faculty_id FROM student_groups WHERE group_id = NEW.group_id), 0) INTO new_faculty;
+    IF old_faculty = new_faculty THEN
+        RETURN NULL;
+    END IF;
+
+    UPDATE faculty_gpa
+    SET grade_sum = grade_sum - s.grade_sum, grade_count = grade_count - s.grade_count, last_updated = NOW()
+    WHERE faculty_id = old_faculty;
+
+    INSERT INTO faculty_gpa (faculty_id, grade_sum, grade_count, last_updated)
+    VALUES (new_faculty, s.grade_sum, s.grade_count, NOW())
+    ON CONFLICT (faculty_id) DO UPDATE SET
+        grade_sum = faculty_gpa.grade_sum + EXCLUDED.grade_sum,
+        grade_count = faculty_gpa.grade_count + EXCLUDED.grade_count,
+        last_updated = NOW();
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS student_grades_gpa_insert_trigger ON student_grades;
+CREATE TRIGGER student_grades_gpa_insert_trigger
+    AFTER INSERT ON student_grades
+    REFERENCING NEW TABLE AS new_grades
+    FOR EACH STATEMENT EXECUTE FUNCTION update_gpa_aggregates();
+
+DROP TRIGGER IF EXISTS student_grades_gpa_update_trigger ON student_grades;
+CREATE TRIGGER student_grades_gpa_update_trigger
+    AFTER UPDATE ON student_grades
+    REFERENCING OLD TABLE AS old_grades NEW TABLE AS new_grades
+    FOR EACH STATEMENT EXECUTE FUNCTION update_gpa_aggregates();
+
+DROP TRIGGER IF EXISTS student_grades_gpa_delete_trigger ON student_grades;
+CREATE TRIGGER student_grades_gpa_delete_trigger
+    AFTER DELETE ON student_grades
+    REFERENCING OLD TABLE AS old_grades
+    FOR EACH STATEMENT EXECUTE FUNCTION update_gpa_aggregates();
+
+DROP TRIGGER IF EXISTS users_group_gpa_trigger ON users;
+CREATE TRIGGER users_group_gpa_trigger
+    AFTER UPDATE OF group_id ON users
+    FOR EACH ROW
+    WHEN (OLD.group_id IS DISTINCT FROM NEW.group_id)
+    EXECUTE FUNCTION move_student_faculty_gpa();
+
+-- Пересчет по уже выставленным оценкам
+TRUNCATE student_gpa, faculty_gpa;
+SELECT apply_gpa_deltas(array_agg(user_id), array_agg(grade_sum), array_agg(grade_count))
+FROM (SELECT user_id, COALESCE(SUM(grade), 0) AS grade_sum, COUNT(grade)::INTEGER AS grade_count
+      FROM student_grades GROUP BY user_id) d
+HAVING COUNT(*) > 0;
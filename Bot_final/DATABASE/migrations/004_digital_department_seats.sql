@@ -0,0 +1,92 @@
+-- Занятые места на направлениях цифровой кафедры и уведомления уровня оператора
+
+ALTER TABLE digital_departments ADD COLUMN IF NOT EXISTS approved_count INTEGER NOT NULL DEFAULT 0 CHECK (approved_count >= 0);
+
+UPDATE digital_departments d
+SET approved_count = (SELECT COUNT(*) FROM digital_department_applications a
+                      WHERE a.department_id = d.department_id AND a.status = 'approved');
+
+DO $$
+BEGIN
+    IF NOT EXISTS (SELECT 1 FROM pg_constraint WHERE conname = 'digital_departments_check') THEN
+        ALTER TABLE digital_departments ADD CONSTRAINT digital_departments_check CHECK (approved_count <= available_places);
+    END IF;
+END;
+$$;
+
+CREATE INDEX IF NOT EXISTS idx_digital_applications_department_status ON digital_department_applications(department_id, status);
+
+CREATE OR REPLACE FUNCTION notify_digital_department_status_change()
+RETURNS TRIGGER AS $$
+BEGIN
+    -- Уровень оператора: пакетное зачисление создает все уведомления одним INSERT
+    INSERT INTO notifications (user_id, type, title, message, related_id)
+    SELECT
+        n.user_id,
+        'digital_department_status',
+        CASE
+            WHEN n.status = 'approved' THEN '✅'
+            WHEN n.status = 'rejected' THEN '❌'
+            ELSE '📝'
+        END || ' Статус заявки на цифровую кафедру',
+        'Ваша заявка на направление "' || d.department_name || '" ' ||
+        CASE
+            WHEN n.status = 'approved' THEN 'одобрена'
+            WHEN n.status = 'rejected' THEN 'отклонена'
+            ELSE n.status
+        END || '.',
+        n.application_id
+    FROM new_applications n
+    JOIN old_applications o ON o.application_id = n.application_id
+    JOIN digital_departments d ON d.department_id = n.department_id
+    WHERE o.status IS DISTINCT FROM n.status;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS digital_department_status_trigger ON digital_department_applications;
+CREATE TRIGGER digital_department_status_trigger
+    AFTER UPDATE ON digital_department_applications
+    REFERENCING OLD TABLE AS old_applications NEW TABLE AS new_applications
+    FOR EACH STATEMENT EXECUTE FUNCTION notify_digital_department_status_change();
+
+CREATE OR REPLACE FUNCTION update_digital_department_approved_count()
+RETURNS TRIGGER AS $$
+BEGIN
+    -- Сначала освобождаем места, потом занимаем: иначе при заполненном направлении
+    -- обновление уже одобренной заявки на миг нарушило бы CHECK
+    IF TG_OP IN ('DELETE', 'UPDATE') THEN
+        UPDATE digital_departments d
+        SET approved_count = d.approved_count - c.approved
+        FROM (SELECT department_id, COUNT(*) AS approved FROM old_applications
+              WHERE status = 'approved' GROUP BY department_id) c
+        WHERE d.department_id = c.department_id;
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        UPDATE digital_departments d
+        SET approved_count = d.approved_count + c.approved
+        FROM (SELECT department_id, COUNT(*) AS approved FROM new_applications
+              WHERE status = 'approved' GROUP BY department_id) c
+        WHERE d.department_id = c.department_id;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS digital_department_approved_insert_trigger ON digital_department_applications;
+CREATE TRIGGER digital_department_approved_insert_trigger
+    AFTER INSERT ON digital_department_applications
+    REFERENCING NEW TABLE AS new_applications
+    FOR EACH STATEMENT EXECUTE FUNCTION update_digital_department_approved_count();
+
+DROP TRIGGER IF EXISTS digital_department_approved_update_trigger ON digital_department_applications;
+CREATE TRIGGER digital_department_approved_update_trigger
+    AFTER UPDATE ON digital_department_applications
+    REFERENCING OLD TABLE AS old_applications NEW TABLE AS new_applications
+    FOR EACH STATEMENT EXECUTE FUNCTION update_digital_department_approved_count();
+
+DROP TRIGGER IF EXISTS digital_department_approved_delete_trigger ON digital_department_applications;
+CREATE TRIGGER digital_department_approved_delete_trigger
+    AFTER DELETE ON digital_department_applications
+    REFERENCING OLD TABLE AS old_applications
+    FOR EACH STATEMENT EXECUTE FUNCTION update_digital_department_approved_count();
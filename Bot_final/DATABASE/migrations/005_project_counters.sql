@@ -0,0 +1,47 @@
+-- Счетчики участников и заявок проектов, индекс постраничного каталога
+
+ALTER TABLE projects ADD COLUMN IF NOT EXISTS team_size INTEGER NOT NULL DEFAULT 0 CHECK (team_size >= 0);
+ALTER TABLE projects ADD COLUMN IF NOT EXISTS pending_applications INTEGER NOT NULL DEFAULT 0 CHECK (pending_applications >= 0);
+
+UPDATE projects p
+SET team_size = (SELECT COUNT(*) FROM project_members m WHERE m.project_id = p.project_id AND m.status = 'active'),
+    pending_applications = (SELECT COUNT(*) FROM project_applications a
+                            WHERE a.project_id = p.project_id AND a.status = 'pending');
+
+CREATE INDEX IF NOT EXISTS idx_projects_active_created ON projects(created_at DESC, project_id DESC) WHERE status = 'active';
+
+CREATE OR REPLACE FUNCTION update_project_team_size()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') AND OLD.status = 'active' THEN
+        UPDATE projects SET team_size = team_size - 1 WHERE project_id = OLD.project_id;
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') AND NEW.status = 'active' THEN
+        UPDATE projects SET team_size = team_size + 1 WHERE project_id = NEW.project_id;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS project_team_size_trigger ON project_members;
+CREATE TRIGGER project_team_size_trigger
+    AFTER INSERT OR DELETE OR UPDATE OF status, project_id ON project_members
+    FOR EACH ROW EXECUTE FUNCTION update_project_team_size();
+
+CREATE OR REPLACE FUNCTION update_project_pending_applications()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') AND OLD.status = 'pending' THEN
+        UPDATE projects SET pending_applications = pending_applications - 1 WHERE project_id = OLD.project_id;
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') AND NEW.status = 'pending' THEN
+        UPDATE projects SET pending_applications = pending_applications + 1 WHERE project_id = NEW.project_id;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS project_pending_applications_trigger ON project_applications;
+CREATE TRIGGER project_pending_applications_trigger
+    AFTER INSERT OR DELETE OR UPDATE OF status, project_id ON project_applications
+    FOR EACH ROW EXECUTE FUNCTION update_project_pending_applications();
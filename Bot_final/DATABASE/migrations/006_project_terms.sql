@@ -0,0 +1,12 @@
+-- Инвертированный индекс проектов для рекомендаций.
+-- Леммы строит Python: после миграции существующие проекты индексирует
+--     python DATABASE/project_index.py
+
+CREATE TABLE IF NOT EXISTS project_terms (
+    term VARCHAR(100) NOT NULL,
+    project_id INTEGER NOT NULL REFERENCES projects(project_id) ON DELETE CASCADE,
+    weight REAL NOT NULL,
+    PRIMARY KEY (term, project_id)
+);
+
+CREATE INDEX IF NOT EXISTS idx_project_terms_project_id ON project_terms(project_id);
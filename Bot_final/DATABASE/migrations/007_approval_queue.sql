@@ -0,0 +1,60 @@
+-- Очереди согласования и уведомления о статусе уровня оператора
+
+CREATE INDEX IF NOT EXISTS idx_business_trips_pending_dean ON business_trips(dean_id, created_at, trip_id) WHERE status = 'pending';
+CREATE INDEX IF NOT EXISTS idx_vacations_pending_rector ON vacations(rector_id, created_at, vacation_id) WHERE status = 'pending';
+
+CREATE OR REPLACE FUNCTION notify_vacation_status_change()
+RETURNS TRIGGER AS $$
+BEGIN
+    INSERT INTO notifications (user_id, type, title, message, related_id)
+    SELECT
+        n.user_id,
+        'vacation_status',
+        '🏖️ Статус отпуска изменен',
+        'Статус вашего заявления на отпуск изменен на: ' ||
+        CASE
+            WHEN n.status = 'approved' THEN '✅ Одобрен'
+            WHEN n.status = 'rejected' THEN '❌ Отклонен'
+            ELSE n.status
+        END,
+        n.vacation_id
+    FROM new_vacations n
+    JOIN old_vacations o ON o.vacation_id = n.vacation_id
+    WHERE o.status IS DISTINCT FROM n.status;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS vacation_status_trigger ON vacations;
+CREATE TRIGGER vacation_status_trigger
+    AFTER UPDATE ON vacations
+    REFERENCING OLD TABLE AS old_vacations NEW TABLE AS new_vacations
+    FOR EACH STATEMENT EXECUTE FUNCTION notify_vacation_status_change();
+
+CREATE OR REPLACE FUNCTION notify_business_trip_status_change()
+RETURNS TRIGGER AS $$
+BEGIN
+    INSERT INTO notifications (user_id, type, title, message, related_id)
+    SELECT
+        n.user_id,
+        'business_trip_status',
+        '🛫 Статус командировки изменен',
+        'Статус вашей заявки на командировку изменен на: ' ||
+        CASE
+            WHEN n.status = 'approved' THEN '✅ Одобрена'
+            WHEN n.status = 'rejected' THEN '❌ Отклонена'
+            ELSE n.status
+        END,
+        n.trip_id
+    FROM new_trips n
+    JOIN old_trips o ON o.trip_id = n.trip_id
+    WHERE o.status IS DISTINCT FROM n.status;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS business_trip_status_trigger ON business_trips;
+CREATE TRIGGER business_trip_status_trigger
+    AFTER UPDATE ON business_trips
+    REFERENCING OLD TABLE AS old_trips NEW TABLE AS new_trips
+    FOR EACH STATEMENT EXECUTE FUNCTION notify_business_trip_status_change();
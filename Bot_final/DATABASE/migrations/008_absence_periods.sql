@@ -0,0 +1,29 @@
+-- Периоды командировок и отпусков: запрет пересечений и поиск отсутствующих.
+-- Если в старых данных есть пересечения, миграция не применится: их нужно отклонить вручную
+
+ALTER TABLE business_trips ADD COLUMN IF NOT EXISTS period DATERANGE GENERATED ALWAYS AS (daterange(start_date, end_date, '[]')) STORED;
+ALTER TABLE vacations ADD COLUMN IF NOT EXISTS period DATERANGE GENERATED ALWAYS AS (daterange(start_date, end_date, '[]')) STORED;
+
+DO $$
+BEGIN
+    IF NOT EXISTS (SELECT 1 FROM pg_constraint WHERE conname = 'business_trips_no_overlap') THEN
+        ALTER TABLE business_trips ADD CONSTRAINT business_trips_no_overlap EXCLUDE USING gist (
+            int8range(user_id, user_id, '[]') WITH &&, period WITH &&
+        ) WHERE (status <> 'rejected');
+    END IF;
+END;
+$$;
+
+DO $$
+BEGIN
+    IF NOT EXISTS (SELECT 1 FROM pg_constraint WHERE conname = 'vacations_no_overlap') THEN
+        ALTER TABLE vacations ADD CONSTRAINT vacations_no_overlap EXCLUDE USING gist (
+            int8range(user_id, user_id, '[]') WITH &&, period WITH &&
+        ) WHERE (status <> 'rejected');
+    END IF;
+END;
+$$;
+
+CREATE INDEX IF NOT EXISTS idx_business_trips_period ON business_trips USING gist (period) WHERE status <> 'rejected';
+CREATE INDEX IF NOT EXISTS idx_vacations_period ON vacations USING gist (period) WHERE status <> 'rejected';
+CREATE INDEX IF NOT EXISTS idx_teacher_contracts_department ON teacher_contracts(department) WHERE status = 'active';
@@ -0,0 +1,20 @@
+-- Очередь генерации электронных справок (certificate_worker.py)
+
+ALTER TABLE study_certificate_requests ADD COLUMN IF NOT EXISTS attempts INTEGER NOT NULL DEFAULT 0;
+ALTER TABLE study_certificate_requests ADD COLUMN IF NOT EXISTS locked_at TIMESTAMP;
+
+CREATE INDEX IF NOT EXISTS idx_certificate_requests_queue ON study_certificate_requests(request_id)
+    WHERE delivery_type = 'digital' AND status IN ('pending', 'rendering');
+
+CREATE OR REPLACE FUNCTION notify_certificate_queue()
+RETURNS TRIGGER AS $$
+BEGIN
+    PERFORM pg_notify('certificate_requests', '');
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS certificate_queue_trigger ON study_certificate_requests;
+CREATE TRIGGER certificate_queue_trigger
+    AFTER INSERT ON study_certificate_requests
+    FOR EACH STATEMENT EXECUTE FUNCTION notify_certificate_queue();
@@ -0,0 +1,115 @@
+-- Дата публикации новостей и сводки тональности по дням и неделям
+
+ALTER TABLE news ADD COLUMN IF NOT EXISTS published_at DATE;
+
+CREATE TABLE IF NOT EXISTS news_sentiment_daily (
+    day DATE PRIMARY KEY,
+    news_count INTEGER NOT NULL DEFAULT 0,
+    score_sum NUMERIC(12,3) NOT NULL DEFAULT 0,
+    positive_count INTEGER NOT NULL DEFAULT 0,
+    neutral_count INTEGER NOT NULL DEFAULT 0,
+    negative_count INTEGER NOT NULL DEFAULT 0,
+    avg_score NUMERIC GENERATED ALWAYS AS (CASE WHEN news_count > 0 THEN score_sum / news_count END) STORED
+);
+
+CREATE TABLE IF NOT EXISTS news_sentiment_weekly (
+    week DATE PRIMARY KEY,
+    news_count INTEGER NOT NULL DEFAULT 0,
+    score_sum NUMERIC(12,3) NOT NULL DEFAULT 0,
+    positive_count INTEGER NOT NULL DEFAULT 0,
+    neutral_count INTEGER NOT NULL DEFAULT 0,
+    negative_count INTEGER NOT NULL DEFAULT 0,
+    avg_score NUMERIC GENERATED ALWAYS AS (CASE WHEN news_count > 0 THEN score_sum / news_count END) STORED
+);
+
+CREATE OR REPLACE FUNCTION apply_news_sentiment_deltas(p_days DATE[], p_sentiments TEXT[], p_scores NUMERIC[], p_sign INTEGER)
+RETURNS VOID AS $$
+BEGIN
+    INSERT INTO news_sentiment_daily AS s (day, news_count, score_sum, positive_count, neutral_count, negative_count)
+    SELECT d.day, p_sign * COUNT(*), p_sign * COALESCE(SUM(d.score), 0),
+           p_sign * COUNT(*) FILTER (WHERE d.sentiment = 'Положительный'),
+           p_sign * COUNT(*) FILTER (WHERE d.sentiment = 'Нейтральный'),
+           p_sign * COUNT(*) FILTER (WHERE d.sentiment = 'Негативный')
+    FROM unnest(p_days, p_sentiments, p_scores) AS d(day, sentiment, score)
+    GROUP BY d.day
+    ON CONFLICT (day) DO UPDATE SET
+        news_count = s.news_count + EXCLUDED.news_count,
+        score_sum = s.score_sum + EXCLUDED.score_sum,
+        positive_count = s.positive_count + EXCLUDED.positive_count,
+        neutral_count = s.neutral_count + EXCLUDED.neutral_count,
+        negative_count = s.negative_count + EXCLUDED.negative_count;
+
+    INSERT INTO news_sentiment_weekly AS s (week, news_count, score_sum, positive_count, neutral_count, negative_count)
+    SELECT date_trunc('week', d.day)::DATE, p_sign * COUNT(*), p_sign * COALESCE(SUM(d.score), 0),
+           p_sign * COUNT(*) FILTER (WHERE d.sentiment = 'Положительный'),
+           p_sign * COUNT(*) FILTER (WHERE d.sentiment = 'Нейтральный'),
+           p_sign * COUNT(*) FILTER (WHERE d.sentiment = 'Негативный')
+    FROM unnest(p_days, p_sentiments, p_scores) AS d(day, sentiment, score)
+    GROUP BY date_trunc('week', d.day)::DATE
+    ON CONFLICT (week) DO UPDATE SET
+        news_count = s.news_count + EXCLUDED.news_count,
+        score_sum = s.score_sum + EXCLUDED.score_sum,
+        positive_count = s.positive_count + EXCLUDED.positive_count,
+        neutral_count = s.neutral_count + EXCLUDED.neutral_count,
+        negative_count = s.negative_count + EXCLUDED.negative_count;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION update_news_sentiment_rollups()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'UPDATE' THEN
+        -- UPDATE других колонок (cluster_id при разборе на истории) сводки не меняет:
+        -- учитываются только строки с новой датой или тональностью
+        PERFORM apply_news_sentiment_deltas(array_agg(o.published_at), array_agg(o.sentiment::TEXT),
+                                            array_agg(o.sentiment_score::NUMERIC), -1)
+        FROM old_news o JOIN new_news n ON n.news_id = o.news_id
+        WHERE o.published_at IS NOT NULL
+        AND (o.published_at, o.sentiment, o.sentiment_score) IS DISTINCT FROM (n.published_at, n.sentiment, n.sentiment_score);
+        PERFORM apply_news_sentiment_deltas(array_agg(n.published_at), array_agg(n.sentiment::TEXT),
+                                            array_agg(n.sentiment_score::NUMERIC), 1)
+        FROM old_news o JOIN new_news n ON n.news_id = o.news_id
+        WHERE n.published_at IS NOT NULL
+        AND (o.published_at, o.sentiment, o.sentiment_score) IS DISTINCT FROM (n.published_at, n.sentiment, n.sentiment_score);
+        RETURN NULL;
+    END IF;
+    IF TG_OP = 'INSERT' THEN
+        PERFORM apply_news_sentiment_deltas(array_agg(published_at), array_agg(sentiment::TEXT),
+                                            array_agg(sentiment_score::NUMERIC), 1)
+        FROM new_news WHERE published_at IS NOT NULL;
+    END IF;
+    IF TG_OP = 'DELETE' THEN
+        PERFORM apply_news_sentiment_deltas(array_agg(published_at), array_agg(sentiment::TEXT),
+                                            array_agg(sentiment_score::NUMERIC), -1)
+        FROM old_news WHERE published_at IS NOT NULL;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS news_sentiment_insert_trigger ON news;
+CREATE TRIGGER news_sentiment_insert_trigger
+    AFTER INSERT ON news
+    REFERENCING NEW TABLE AS new_news
+    FOR EACH STATEMENT EXECUTE FUNCTION update_news_sentiment_rollups();
+
+DROP TRIGGER IF EXISTS news_sentiment_update_trigger ON news;
+CREATE TRIGGER news_sentiment_update_trigger
+    AFTER UPDATE ON news
+    REFERENCING OLD TABLE AS old_news NEW TABLE AS new_news
+    FOR EACH STATEMENT EXECUTE FUNCTION update_news_sentiment_rollups();
+
+DROP TRIGGER IF EXISTS news_sentiment_delete_trigger ON news;
+CREATE TRIGGER news_sentiment_delete_trigger
+    AFTER DELETE ON news
+    REFERENCING OLD TABLE AS old_news
+    FOR EACH STATEMENT EXECUTE FUNCTION update_news_sentiment_rollups();
+
+DROP INDEX IF EXISTS idx_news_date_sentiment;
+CREATE INDEX IF NOT EXISTS idx_news_published_sentiment ON news(published_at, sentiment);
+
+-- published_at для старых новостей (как news_rollups.py --backfill); сводки заполнит триггер
+UPDATE news
+SET published_at = to_date(date_text, 'DD.MM.YYYY')
+WHERE published_at IS NULL
+AND date_text ~ '^\d{2}\.\d{2}\.\d{4}$';
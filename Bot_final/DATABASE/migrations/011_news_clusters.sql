@@ -0,0 +1,23 @@
+-- Истории: кластеры почти одинаковых заголовков и их LSH-индекс.
+-- Сигнатуры считает Python: после миграции старые новости раскладывает
+--     python -m rector.news_clusters --rebuild
+
+ALTER TABLE news ADD COLUMN IF NOT EXISTS cluster_id INTEGER;
+
+CREATE TABLE IF NOT EXISTS news_clusters (
+    cluster_id INTEGER PRIMARY KEY REFERENCES news(news_id) ON DELETE CASCADE,
+    -- NULL у заголовков без значимых слов: такие истории не объединяются
+    signature BIGINT[],
+    first_seen TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    last_seen TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS news_lsh_buckets (
+    band SMALLINT NOT NULL,
+    bucket BIGINT NOT NULL,
+    cluster_id INTEGER NOT NULL REFERENCES news_clusters(cluster_id) ON DELETE CASCADE,
+    PRIMARY KEY (band, bucket, cluster_id)
+);
+
+CREATE INDEX IF NOT EXISTS idx_news_cluster_id ON news(cluster_id);
+CREATE INDEX IF NOT EXISTS idx_news_clusters_last_seen ON news_clusters(last_seen DESC);
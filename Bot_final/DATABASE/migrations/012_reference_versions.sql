@@ -0,0 +1,28 @@
+-- Версии справочников для кэша клавиатур факультетов и программ
+
+CREATE TABLE IF NOT EXISTS reference_versions (
+    table_name VARCHAR(63) PRIMARY KEY,
+    version BIGINT NOT NULL DEFAULT 0
+);
+
+CREATE OR REPLACE FUNCTION bump_reference_version()
+RETURNS TRIGGER AS $$
+BEGIN
+    INSERT INTO reference_versions (table_name, version) VALUES (TG_TABLE_NAME, 1)
+    ON CONFLICT (table_name) DO UPDATE SET version = reference_versions.version + 1;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS faculties_version_trigger ON faculties;
+CREATE TRIGGER faculties_version_trigger
+    AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON faculties
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_reference_version();
+
+DROP TRIGGER IF EXISTS educational_programs_version_trigger ON educational_programs;
+CREATE TRIGGER educational_programs_version_trigger
+    AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON educational_programs
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_reference_version();
+
+INSERT INTO reference_versions (table_name) VALUES ('faculties'), ('educational_programs')
+ON CONFLICT (table_name) DO NOTHING;
@@ -0,0 +1,113 @@
+"""Сводки тональности новостей по дням и неделям (news_sentiment_daily / news_sentiment_weekly)
+
+Сводки ведут триггеры на news, этот модуль нужен для чтения тренда и обслуживания:
+    python DATABASE/news_rollups.py --backfill   # published_at для старых новостей из date_text
+    python DATABASE/news_rollups.py --rebuild    # пересчитать сводки с нуля по всей таблице
+    python DATABASE/news_rollups.py              # тренд по неделям за полгода
+"""
+import argparse
+import os
+import sys
+from datetime import date, timedelta
+
+# Таблица сводки и ее ключ для каждого периода
+ROLLUPS = {
+    'day': ('news_sentiment_daily', 'day'),
+    'week': ('news_sentiment_weekly', 'week'),
+}
+
+# Новости до появления published_at: date_text уже в формате дд.мм.гггг (см. format_date)
+BACKFILL_PUBLISHED_AT = r"""
+    UPDATE news
+    SET published_at = to_date(date_text, 'DD.MM.YYYY')
+    WHERE published_at IS NULL
+    AND date_text ~ '^\d{2}\.\d{2}\.\d{4}$'
+"""
+
+REBUILD_ROLLUP = """
+    INSERT INTO {table} ({key}, news_count, score_sum, positive_count, neutral_count, negative_count)
+    SELECT {bucket}, COUNT(*), COALESCE(SUM(sentiment_score), 0),
+           COUNT(*) FILTER (WHERE sentiment = 'Положительный'),
+           COUNT(*) FILTER (WHERE sentiment = 'Нейтральный'),
+           COUNT(*) FILTER (WHERE sentiment = 'Негативный')
+    FROM news
+    WHERE published_at IS NOT NULL
+    GROUP BY 1
+"""
+
+BUCKETS = {
+    'day': "published_at",
+    'week': "date_trunc('week', published_at)::DATE",
+}
+
+
+def period_start(period, day):
+    """Начало периода, в который попадает day (для недели — понедельник)"""
+    return day - timedelta(days=day.weekday()) if period == 'week' else day
+
+
+def get_sentiment_trend(conn, period='week', start=None, end=None):
+    """Сводка за [start, end]: строки (начало периода, число новостей, средняя оценка,
+    положительных, нейтральных, негативных) — чтение диапазона первичного ключа"""
+    table, key = ROLLUPS[period]
+    end = end or date.today()
+    start = start or end - timedelta(days=182)
+    with conn.cursor() as cur:
+        cur.execute(f"""
+            SELECT {key}, news_count, avg_score, positive_count, neutral_count, negative_count
+            FROM {table}
+            WHERE {key} BETWEEN %s AND %s AND news_count > 0
+            ORDER BY {key}
+        """, (period_start(period, start), end))
+        return cur.fetchall()
+
+
+def backfill_published_at(conn):
+    """Заполнить published_at у старых новостей; сводки обновит триггер. Возвращает число строк"""
+    try:
+        with conn.cursor() as cur:
+            cur.execute(BACKFILL_PUBLISHED_AT)
+            updated = cur.rowcount
+        conn.commit()
+        return updated
+    except Exception:
+        conn.rollback()
+        raise
+
+
+def rebuild_rollups(conn):
+    """Пересчитать обе сводки по news одной транзакцией"""
+    try:
+        with conn.cursor() as cur:
+            for period, (table, key) in ROLLUPS.items():
+                cur.execute(f"TRUNCATE {table}")
+                cur.execute(REBUILD_ROLLUP.format(table=table, key=key, bucket=BUCKETS[period]))
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backfill", action="store_true", help="заполнить published_at из date_text")
+    parser.add_argument("--rebuild", action="store_true", help="пересчитать сводки с нуля")
+    parser.add_argument("--period", choices=ROLLUPS, default="week")
+    args = parser.parse_args()
+
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from DATABASE.database import EducationDB
+
+    with EducationDB() as db:
+        if args.backfill:
+            print(f"Дата публикации заполнена у новостей: {backfill_published_at(db.conn)}")
+        if args.rebuild:
+            rebuild_rollups(db.conn)
+            print("Сводки пересчитаны")
+        for start, count, avg_score, positive, neutral, negative in get_sentiment_trend(db.conn, args.period):
+            print(f"{start:%d.%m.%Y}  новостей: {count:>4}  средняя: {avg_score:+.3f}  "
+                  f"+{positive} ={neutral} -{negative}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+import logging
+import weakref
+
+import psycopg2.errors
+import psycopg2.extensions
+
+logger = logging.getLogger(__name__)
+
+# Реестр горячих запросов: имя -> текст для PREPARE (параметры $1, $2 ...).
+# Колонки перечислены явно: при SELECT * подготовленный план ломается после ALTER TABLE.
+PREPARED_STATEMENTS = {
+    "authenticate_user": """
+        SELECT user_id, login, max_id, role, first_name, surname, last_name, email, phone_number, group_id
+        FROM users
+        WHERE login = $1 AND password = $2
+    """,
+    "get_unread_notifications": """
+        SELECT notification_id, type, title, message, created_at
+        FROM notifications
+        WHERE user_id = $1 AND is_read = FALSE
+        ORDER BY created_at DESC
+        LIMIT 10
+    """,
+    "get_student_group": """
+        SELECT group_id FROM users WHERE user_id = $1
+    """,
+    "get_group_schedule": """
+        SELECT s.day_of_week, s.start_time, s.end_time, s.subject_name, s.classroom,
+               u.first_name, u.last_name, u.surname
+        FROM schedule s
+        LEFT JOIN users u ON s.teacher_id = u.user_id
+        WHERE s.group_id = $1 AND s.week_type = $2
+        ORDER BY s.day_of_week, s.start_time
+    """,
+    "get_teacher_schedule": """
+        SELECT s.day_of_week, s.start_time, s.end_time, s.subject_name, s.classroom,
+               g.group_name
+        FROM schedule s
+        LEFT JOIN student_groups g ON s.group_id = g.group_id
+        WHERE s.teacher_id = $1 AND s.week_type = $2
+        ORDER BY s.day_of_week, s.start_time
+    """,
+    "search_books": """
+        SELECT book_id, title, author, isbn, description, total_copies, available_copies,
+               is_digital, is_paper, digital_link, created_at
+        FROM books
+        WHERE title ILIKE $1 OR author ILIKE $1
+        ORDER BY
+            CASE
+                WHEN title ILIKE $1 THEN 1
+                WHEN author ILIKE $1 THEN 2
+                ELSE 3
+            END,
+            available_copies DESC
+        LIMIT 10
+    """,
+    "get_book_by_id": """
+        SELECT book_id, title, author, isbn, description, total_copies, available_copies,
+               is_digital, is_paper, digital_link, created_at
+        FROM books
+        WHERE book_id = $1
+    """,
+}
+
+# Какие запросы уже подготовлены на каком соединении (PREPARE живет до конца сессии)
+_prepared_names = weakref.WeakKeyDictionary()
+
+
+def _prepared_on(conn):
+    names = _prepared_names.get(conn)
+    if names is None:
+        names = set()
+        _prepared_names[conn] = names
+    return names
+
+
+def _prepare(cur, name):
+    """PREPARE запроса. Запрос, уже подготовленный на сервере (prepare_all упал на середине
+    пачки — PREPARE до ошибки остаются в сессии), не ошибка. Внутри транзакции PREPARE
+    выполняется под точкой сохранения, чтобы сбой не прервал транзакцию вызывающего"""
+    conn = cur.connection
+    in_transaction = conn.info.transaction_status != psycopg2.extensions.TRANSACTION_STATUS_IDLE
+    if in_transaction:
+        cur.execute("SAVEPOINT prepare_statement")
+    try:
+        cur.execute(f"PREPARE {name} AS {PREPARED_STATEMENTS[name]}")
+    except psycopg2.errors.DuplicatePreparedStatement:
+        if in_transaction:
+            cur.execute("ROLLBACK TO SAVEPOINT prepare_statement")
+        else:
+            conn.rollback()
+    else:
+        if in_transaction:
+            cur.execute("RELEASE SAVEPOINT prepare_statement")
+    _prepared_on(conn).add(name)
+
+
+def prepare_all(conn):
+    """Подготовить все запросы реестра на соединении одним обращением к серверу"""
+    names = _prepared_on(conn)
+    missing = [name for name in PREPARED_STATEMENTS if name not in names]
+    if not missing:
+        return True
+
+    try:
+        with conn.cursor() as cur:
+            cur.execute(";".join(f"PREPARE {name} AS {PREPARED_STATEMENTS[name]}" for name in missing))
+        conn.commit()
+        names.update(missing)
+        return True
+    except Exception as e:
+        # Например, схема еще не создана — запросы подготовятся лениво при первом вызове
+        logger.warning(f"Не удалось подготовить запросы: {e}")
+        conn.rollback()
+        return False
+
+
+def forget_prepared(conn):
+    """Сбросить сведения о подготовленных запросах соединения (после переподключения)"""
+    _prepared_names.pop(conn, None)
+
+
+def execute_prepared(cur, name, params=()):
+    """Выполнить запрос из реестра по имени; при первом вызове на соединении — подготовить его"""
+    # Повторить после потери запроса сервером можно, только если транзакция начинается с него:
+    # откат иначе выбросит незакоммиченные изменения вызывающего
+    first_in_transaction = (cur.connection.info.transaction_status
+                            == psycopg2.extensions.TRANSACTION_STATUS_IDLE)
+    if name not in _prepared_on(cur.connection):
+        _prepare(cur, name)
+
+    placeholders = ", ".join(["%s"] * len(params))
+    statement = f"EXECUTE {name} ({placeholders})" if params else f"EXECUTE {name}"
+
+    try:
+        cur.execute(statement, params)
+    except psycopg2.errors.InvalidSqlStatementName:
+        # Сервер потерял подготовленный запрос (DISCARD ALL, пулер соединений) — транзакция
+        # прервана. Пустую транзакцию откатываем и повторяем, иначе ошибку получает вызывающий,
+        # а запрос подготовится заново при следующем вызове
+        if not first_in_transaction:
+            _prepared_on(cur.connection).discard(name)
+            raise
+        cur.connection.rollback()
+        _prepare(cur, name)
+        cur.execute(statement, params)
@@ -0,0 +1,168 @@
+"""Инвертированный индекс проектов для рекомендаций
+
+Термы (леммы pymorphy3) из ролей, названия и описания проекта хранятся в project_terms:
+рекомендация — один запрос по индексу (term, project_id) для термов профиля студента,
+без просмотра таблицы проектов.
+
+Переиндексация всех проектов (после загрузки данных или смены весов), из каталога Bot_final:
+    python DATABASE/project_index.py
+"""
+import math
+import os
+import sys
+from collections import Counter
+
+# Вес терма в зависимости от поля проекта
+FIELD_WEIGHTS = {
+    'required_roles': 3.0,
+    'title': 2.0,
+    'description': 1.0,
+}
+
+# Вес терма профиля: желаемая роль из прошлых заявок и предмет с оценкой выше тройки
+ROLE_WEIGHT = 3.0
+SUBJECT_WEIGHT = 1.0
+
+# Термов на проект: хвост длинного описания почти не влияет на оценку
+MAX_TERMS = 50
+
+
+def project_terms(title, description, required_roles):
+    """Термы проекта с весами: {лемма: вес}, вектор нормирован по длине"""
+    from rector.morphology import lemmas
+
+    weights = Counter()
+    for field, text in (('required_roles', required_roles), ('title', title), ('description', description)):
+        for lemma in lemmas(text or ''):
+            weights[lemma] += FIELD_WEIGHTS[field]
+
+    top = weights.most_common(MAX_TERMS)
+    norm = math.sqrt(sum(weight * weight for _, weight in top)) or 1.0
+    return {term: weight / norm for term, weight in top}
+
+
+def _term_rows(project_id, title, description, required_roles):
+    terms = project_terms(title, description, required_roles)
+    return [(term[:100], project_id, weight) for term, weight in terms.items()]
+
+
+def _insert_terms(cur, rows):
+    from psycopg2.extras import execute_values
+
+    if rows:
+        execute_values(cur, "INSERT INTO project_terms (term, project_id, weight) VALUES %s", rows, page_size=1000)
+
+
+def index_project(cur, project_id, title, description, required_roles):
+    """Записать термы проекта (в транзакции вызывающего)"""
+    cur.execute("DELETE FROM project_terms WHERE project_id = %s", (project_id,))
+    _insert_terms(cur, _term_rows(project_id, title, description, required_roles))
+
+
+def profile_terms(roles, grades):
+    """Профиль студента: роли из прошлых заявок и предметы с оценками [(название, оценка)]"""
+    from rector.morphology import lemmas
+
+    weights = Counter()
+    for role in roles:
+        for lemma in lemmas(role or ''):
+            weights[lemma] += ROLE_WEIGHT
+    for subject_name, grade in grades:
+        # Тройка и ниже интереса к предмету не показывает
+        strength = float(grade or 0) - 3.0
+        if strength <= 0:
+            continue
+        for lemma in lemmas(subject_name):
+            weights[lemma] += SUBJECT_WEIGHT * strength
+    return weights
+
+
+def recommend_projects(conn, user_id, limit=5):
+    """Активные проекты, лучше всего подходящие профилю студента: список строк с полем score"""
+    from psycopg2.extras import RealDictCursor
+
+    with conn.cursor(cursor_factory=RealDictCursor) as cur:
+        # Профиль одним запросом: желаемые роли и средняя оценка по каждому предмету
+        cur.execute("""
+            SELECT 'role' AS kind, desired_role AS name, NULL::NUMERIC AS grade
+            FROM project_applications WHERE user_id = %(user_id)s
+            UNION ALL
+            SELECT 'subject', subject_name, AVG(grade)
+            FROM student_grades WHERE user_id = %(user_id)s
+            GROUP BY subject_name
+        """, {'user_id': user_id})
+        rows = cur.fetchall()
+
+        profile = profile_terms(
+            [row['name'] for row in rows if row['kind'] == 'role'],
+            [(row['name'], row['grade']) for row in rows if row['kind'] == 'subject'],
+        )
+        if not profile:
+            return []
+
+        cur.execute("""
+            WITH profile AS (
+                SELECT * FROM unnest(%(terms)s::TEXT[], %(weights)s::REAL[]) AS t(term, weight)
+            ),
+            scored AS (
+                SELECT pt.project_id, SUM(pt.weight * profile.weight) AS score
+                FROM profile
+                JOIN project_terms pt ON pt.term = profile.term
+                GROUP BY pt.project_id
+            )
+            SELECT p.project_id, p.title, p.team_size, p.created_at,
+                   u.first_name || ' ' || u.last_name AS creator_name,
+                   scored.score
+            FROM scored
+            JOIN projects p ON p.project_id = scored.project_id
+            JOIN users u ON p.creator_id = u.user_id
+            WHERE p.status = 'active'
+            AND p.creator_id != %(user_id)s
+            AND NOT EXISTS (
+                SELECT 1 FROM project_members pm
+                WHERE pm.project_id = p.project_id AND pm.user_id = %(user_id)s
+            )
+            AND NOT EXISTS (
+                SELECT 1 FROM project_applications pa
+                WHERE pa.project_id = p.project_id AND pa.user_id = %(user_id)s
+            )
+            ORDER BY scored.score DESC, p.created_at DESC
+            LIMIT %(limit)s
+        """, {
+            'terms': list(profile),
+            'weights': [float(weight) for weight in profile.values()],
+            'user_id': user_id,
+            'limit': limit,
+        })
+        return cur.fetchall()
+
+
+def reindex_all(conn):
+    """Перестроить индекс всех проектов, вернуть число проиндексированных"""
+    try:
+        with conn.cursor() as cur:
+            cur.execute("SELECT project_id, title, description, required_roles FROM projects")
+            projects = cur.fetchall()
+            rows = []
+            for project in projects:
+                rows.extend(_term_rows(*project))
+            cur.execute("DELETE FROM project_terms")
+            _insert_terms(cur, rows)
+        conn.commit()
+        return len(projects)
+    except Exception:
+        conn.rollback()
+        raise
+
+
+def main():
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from DATABASE.database import EducationDB
+
+    with EducationDB() as db:
+        count = reindex_all(db.conn)
+    print(f"Проиндексировано проектов: {count}")
+
+
+if __name__ == "__main__":
+    main()
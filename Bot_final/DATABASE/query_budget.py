@@ -0,0 +1,216 @@
+import logging
+import os
+import threading
+from contextlib import contextmanager
+
+import psycopg2.extensions
+
+logger = logging.getLogger(__name__)
+
+# Максимальное число запросов к БД на одно нажатие кнопки.
+# Ключи, оканчивающиеся на "_", — префиксы callback'ов с параметром (faculty_3, view_project_12 ...)
+QUERY_BUDGETS = {
+    # Общие маршруты
+    "authorization": 0,
+    # Версия справочников, при ее изменении — пересборка экрана факультетов / программ
+    "programs": 2,
+    "faculty_": 3,
+    "program_": 2,
+    "can_program": 1,
+    "select_subject_": 0,
+    "reset_subjects": 0,
+    "show_available_programs": 2,
+    "open_days": 1,
+    "register_": 3,
+    # Отмена записи и запись первого из листа ожидания + событие для уведомления
+    "cancel_open_day_": 3,
+    "cancel_registration": 0,
+    "back_to_menu": 2,
+    "logout": 0,
+
+    # Новости ректора: вся выдача парсера одним INSERT ... RETURNING, поиск похожих историй
+    # в LSH-индексе и запись кластеров, последние 10 историй
+    "rector_documents": 4,
+    # Тренд тональности: чтение диапазона сводки по первичному ключу
+    "news_trend_": 1,
+
+    # Командировки и отпуска
+    "business_trip": 0,
+    "cancel_business_trip": 0,
+    "arrange_vacation": 0,
+    "cancel_vacation": 0,
+    "submit_vacation": 0,
+    # Очередь согласования: страница заявок, пакетное решение одним UPDATE
+    "approval_inbox": 1,
+    "approvals_after_": 1,
+    "approve_requests_": 1,
+    "reject_requests_": 1,
+
+    # Расписание и уведомления
+    "teacher_classes": 2,
+    "student_schedule": 2,
+    "show_notifications": 2,
+
+    # Библиотека
+    "find_book": 0,
+    "digital_book_": 1,
+    "reserve_book_": 3,
+    "prev_book_": 0,
+    "next_book_": 0,
+
+    # Цифровая кафедра
+    "digital_department": 2,
+    "digital_department_status": 1,
+    "select_department_": 1,
+
+    # Проекты
+    "create_project": 0,
+    "Join_project": 1,
+    "projects_after_": 1,
+    "my_projects": 2,
+    "recommended_projects": 2,
+    "view_project_": 3,
+    "join_project_": 3,
+    "view_my_project_": 2,
+    "manage_project_": 2,
+    "accept_application_": 3,
+    "reject_application_": 2,
+
+    # Дашборд ректора
+    "rector_stats": 2,
+    "detailed_analytics": 0,
+    # Выгрузки идут в фоне через отдельное соединение (DATABASE/exports.py)
+    "rector_exports": 0,
+    "rector_export_": 0,
+
+    # Справки об обучении
+    "study_certificate": 0,
+    "select_certificate_delivery": 0,
+    "confirm_digital_certificate": 1,
+    "confirm_office_certificate": 3,
+    "cancel_certificate": 0,
+    "certificate_status_": 1,
+
+    # Конкурсы и контракты
+    "competition": 0,
+    "teacher_contracts": 1,
+    "vacancy_competitions": 1,
+}
+
+
+class QueryBudgetExceeded(AssertionError):
+    """Обработчик выполнил больше запросов, чем разрешено бюджетом маршрута"""
+
+
+class QueryCounter:
+    """Счетчик запросов одного вызова обработчика"""
+
+    def __init__(self, route):
+        self.route = route
+        self.count = 0
+        self.statements = []
+
+    def record(self, query):
+        self.count += 1
+        if isinstance(query, bytes):
+            query = query.decode('utf-8', 'replace')
+        self.statements.append(' '.join(str(query).split())[:120])
+
+
+_local = threading.local()
+
+
+def _record_query(query):
+    counter = getattr(_local, 'counter', None)
+    if counter is not None:
+        counter.record(query)
+
+
+class _CountingCursorMixin:
+    """Примесь к курсору: каждый execute/executemany/callproc увеличивает счетчик"""
+
+    def execute(self, query, vars=None):
+        _record_query(query)
+        return super().execute(query, vars)
+
+    def executemany(self, query, vars_list):
+        _record_query(query)
+        return super().executemany(query, vars_list)
+
+    def callproc(self, procname, parameters=None):
+        _record_query(procname)
+        return super().callproc(procname, parameters)
+
+
+_counting_cursor_classes = {}
+
+
+def _counting_cursor_class(base):
+    """Подмешивает счетчик к любому cursor_factory (RealDictCursor и т.д.)"""
+    cls = _counting_cursor_classes.get(base)
+    if cls is None:
+        cls = type(f"Counting{base.__name__}", (_CountingCursorMixin, base), {})
+        _counting_cursor_classes[base] = cls
+    return cls
+
+
+class CountingConnection(psycopg2.extensions.connection):
+    """Соединение, курсоры которого считают запросы (передается как connection_factory)"""
+
+    def cursor(self, *args, **kwargs):
+        base = kwargs.get('cursor_factory') or self.cursor_factory or psycopg2.extensions.cursor
+        kwargs['cursor_factory'] = _counting_cursor_class(base)
+        return super().cursor(*args, **kwargs)
+
+
+def route_for_payload(payload):
+    """Определить маршрут из QUERY_BUDGETS по payload кнопки"""
+    if payload in QUERY_BUDGETS:
+        return payload
+
+    route = None
+    for key in QUERY_BUDGETS:
+        if key.endswith('_') and payload.startswith(key):
+            if route is None or len(key) > len(route):
+                route = key
+    return route or payload
+
+
+def is_strict():
+    """Строгий режим (QUERY_BUDGET_STRICT=1): превышение бюджета — исключение, а не предупреждение"""
+    return os.getenv("QUERY_BUDGET_STRICT", "0") == "1"
+
+
+@contextmanager
+def track_queries(route, budget=None, strict=None):
+    """Посчитать запросы внутри блока и сверить их с бюджетом маршрута"""
+    counter = QueryCounter(route)
+    previous = getattr(_local, 'counter', None)
+    _local.counter = counter
+    try:
+        yield counter
+    finally:
+        _local.counter = previous
+
+    if budget is None:
+        budget = QUERY_BUDGETS.get(route)
+    if budget is None:
+        logger.debug(f"Для маршрута {route} не задан бюджет запросов ({counter.count} запросов)")
+        return
+
+    if strict is None:
+        strict = is_strict()
+
+    if counter.count > budget:
+        message = (f"Маршрут {route} выполнил {counter.count} запросов при бюджете {budget}: "
+                   + "; ".join(counter.statements))
+        if strict:
+            raise QueryBudgetExceeded(message)
+        logger.warning(message)
+
+
+def assert_query_budget(route, func, *args, **kwargs):
+    """Вызвать обработчик и упасть, если он превысил бюджет запросов маршрута"""
+    with track_queries(route, strict=True) as counter:
+        result = func(*args, **kwargs)
+    return result, counter.count
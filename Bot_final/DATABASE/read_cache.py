@@ -0,0 +1,63 @@
+import functools
+import threading
+import time
+
+# Кэш горячих чтений: результат по ключу живет ttl секунд, поэтому горячий ключ
+# (расписание группы в 8:00) стоит один запрос на окно. Обновления обрабатываются
+# по одному, так что одновременных промахов по одному ключу не бывает.
+
+
+class TTLCache:
+    """Результаты по ключу на ttl секунд; ошибки не кэшируются"""
+
+    def __init__(self, ttl, clock=time.monotonic):
+        self.ttl = ttl
+        self.clock = clock
+        self.lock = threading.Lock()
+        self.entries = {}  # key -> (expires_at, value)
+
+    def get_or_load(self, key, loader, *args, **kwargs):
+        with self.lock:
+            entry = self.entries.get(key)
+        if entry is not None and entry[0] > self.clock():
+            return entry[1]
+
+        value = loader(*args, **kwargs)
+        with self.lock:
+            self.entries[key] = (self.clock() + self.ttl, value)
+            if len(self.entries) > 1000:
+                now = self.clock()
+                self.entries = {k: e for k, e in self.entries.items() if e[0] > now}
+        return value
+
+    def invalidate(self, key=None):
+        with self.lock:
+            if key is None:
+                self.entries.clear()
+            else:
+                self.entries.pop(key, None)
+
+
+_caches = {}
+
+
+def cached_read(name, ttl):
+    """Декоратор чтения: ключ — аргументы вызова, результат живет ttl секунд.
+    Функция должна бросать исключение при ошибке, а не возвращать пустой результат"""
+    def decorator(func):
+        cache = _caches.setdefault(name, TTLCache(ttl))
+
+        @functools.wraps(func)
+        def wrapper(*args):
+            return cache.get_or_load(args, func, *args)
+
+        wrapper.cache = cache
+        return wrapper
+    return decorator
+
+
+def invalidate(name, *args):
+    """Сбросить кэш чтения (после изменения данных): весь или по аргументам вызова"""
+    cache = _caches.get(name)
+    if cache is not None:
+        cache.invalidate(args if args else None)
@@ -0,0 +1,152 @@
+# Авторизованные пользователи: chat_id -> SessionRecord
+authenticated_users = {}
+
+
+class UserRecord:
+    """Пользователь из таблицы users (то, что читается при авторизации)"""
+    __slots__ = ('user_id', 'login', 'max_id', 'role', 'first_name', 'surname', 'last_name',
+                 'email', 'phone_number', 'group_id')
+
+    def __init__(self, user_id, login=None, max_id=None, role=None, first_name=None, surname=None,
+                 last_name=None, email=None, phone_number=None, group_id=None):
+        self.user_id = user_id
+        self.login = login
+        self.max_id = max_id
+        self.role = role
+        self.first_name = first_name
+        self.surname = surname
+        self.last_name = last_name
+        self.email = email
+        self.phone_number = phone_number
+        self.group_id = group_id
+
+    @classmethod
+    def from_row(cls, row):
+        """Создать запись из строки RealDictCursor (лишние колонки игнорируются)"""
+        return cls(**{field: row[field] for field in cls.__slots__ if field in row})
+
+    @property
+    def full_name(self):
+        return f"{self.last_name} {self.first_name}"
+
+
+class SessionRecord:
+    """Сессия авторизованного чата"""
+    __slots__ = ('user', 'authenticated_at')
+
+    def __init__(self, user, authenticated_at=None):
+        self.user = user
+        self.authenticated_at = authenticated_at
+
+    @property
+    def role(self):
+        return self.user.role
+
+
+class GroupRecord:
+    """Учебная группа"""
+    __slots__ = ('group_id', 'group_name', 'faculty_id')
+
+    def __init__(self, group_id, group_name, faculty_id=None):
+        self.group_id = group_id
+        self.group_name = group_name
+        self.faculty_id = faculty_id
+
+
+class Identity:
+    """Кто нажал кнопку: определяется один раз на обновление и без запросов к БД"""
+    __slots__ = ('chat_id', 'session')
+
+    def __init__(self, chat_id, session):
+        self.chat_id = chat_id
+        self.session = session
+
+    @property
+    def is_authenticated(self):
+        return self.session is not None
+
+    @property
+    def user(self):
+        return self.session.user if self.session else None
+
+    @property
+    def user_id(self):
+        return self.session.user.user_id if self.session else None
+
+    @property
+    def role(self):
+        return self.session.user.role if self.session else None
+
+
+def get_chat_id(context):
+    """Извлечение chat_id из контекста (None, если его нет)"""
+    try:
+        return context.message['recipient']['chat_id']
+    except (KeyError, TypeError):
+        return None
+
+
+def start_session(chat_id, user_row, authenticated_at=None):
+    """Сохранить авторизованного пользователя для чата"""
+    session = SessionRecord(UserRecord.from_row(user_row), authenticated_at)
+    authenticated_users[chat_id] = session
+    return session
+
+
+def end_session(chat_id):
+    """Забыть авторизацию чата"""
+    return authenticated_users.pop(chat_id, None)
+
+
+def get_session(chat_id):
+    return authenticated_users.get(chat_id)
+
+
+def get_db_user_id(chat_id):
+    """user_id из базы данных для авторизованного чата (без запроса к БД)"""
+    session = authenticated_users.get(chat_id)
+    return session.user.user_id if session else None
+
+
+def get_identity(context):
+    """Identity текущего обновления; кэшируется на контексте, поэтому вычисляется один раз"""
+    identity = getattr(context, '_identity', None)
+    if identity is None:
+        chat_id = get_chat_id(context)
+        identity = Identity(chat_id, authenticated_users.get(chat_id))
+        context._identity = identity
+    return identity
+
+
+def get_users_by_ids(conn, user_ids):
+    """Пользователи по списку id одним запросом: {user_id: UserRecord}"""
+    from psycopg2.extras import RealDictCursor  # не тянем psycopg2.extras в холодный старт
+
+    user_ids = list(set(user_ids))
+    if not user_ids:
+        return {}
+    with conn.cursor(cursor_factory=RealDictCursor) as cur:
+        cur.execute("""
+            SELECT user_id, login, max_id, role, first_name, surname, last_name,
+                   email, phone_number, group_id
+            FROM users
+            WHERE user_id = ANY(%s)
+        """, (user_ids,))
+        return {row['user_id']: UserRecord.from_row(row) for row in cur.fetchall()}
+
+
+def get_groups_by_ids(conn, group_ids):
+    """Учебные группы по списку id одним запросом: {group_id: GroupRecord}"""
+    from psycopg2.extras import RealDictCursor
+
+    group_ids = list(set(group_ids))
+    if not group_ids:
+        return {}
+    with conn.cursor(cursor_factory=RealDictCursor) as cur:
+        cur.execute("""
+            SELECT group_id, group_name, faculty_id
+            FROM student_groups
+            WHERE group_id = ANY(%s)
+        """, (group_ids,))
+        return {row['group_id']: GroupRecord(row['group_id'], row['group_name'], row['faculty_id'])
+                for row in cur.fetchall()}
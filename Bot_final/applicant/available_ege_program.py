@@ -1,12 +1,12 @@
 from config import logger
-from applicant.available_programs import get_program_subjects,get_available_programs
+from applicant.available_programs import get_program_subjects, get_available_programs
 from psycopg2.extras import RealDictCursor
 
 def get_all_subjects(conn):
     """Получить все предметы ЕГЭ из базы"""
     try:
         with conn.cursor(cursor_factory=RealDictCursor) as cur:
-            cur.execute("SELECT subject_id, subject_name FROM subjects ORDER BY subject_name")
+            cur.execute("SELECT subject_id, subject_name, min_score FROM subjects ORDER BY subject_name")
             return cur.fetchall()
     except Exception as e:
         logger.error(f"Ошибка получения предметов: {e}")
@@ -15,6 +15,13 @@ def get_all_subjects(conn):
         return []
 
 
+def subject_min_score(subject, conn):
+    """Минимальный балл предмета: из уже загруженной строки, без запроса к БД, если он там есть"""
+    if 'min_score' in subject:
+        return subject['min_score'] or 0
+    return get_subject_min_score(conn, subject['subject_id'])
+
+
 def is_program_suitable(program_subjects, user_scores, user_selected_subjects, conn):
     """Проверить, подходит ли программа по предметам с учетом минимальных баллов"""
     required_subjects = [sub for sub in program_subjects if sub['is_required']]
@@ -26,7 +33,7 @@ def is_program_suitable(program_subjects, user_scores, user_selected_subjects, c
         user_score = user_scores.get(subject_id, 0)
 
         # Получаем минимальный балл для предмета
-        min_score = get_subject_min_score(conn, subject_id)
+        min_score = subject_min_score(req_sub, conn)
 
         # Проверяем, что предмет выбран и балл >= минимального
         if subject_id not in user_selected_subjects or user_score < min_score:
@@ -38,7 +45,7 @@ def is_program_suitable(program_subjects, user_scores, user_selected_subjects, c
         for sub in optional_subjects:
             subject_id = sub['subject_id']
             user_score = user_scores.get(subject_id, 0)
-            min_score = get_subject_min_score(conn, subject_id)
+            min_score = subject_min_score(sub, conn)
 
             if subject_id in user_selected_subjects and user_score >= min_score:
                 has_optional = True
@@ -50,9 +57,10 @@ def is_program_suitable(program_subjects, user_scores, user_selected_subjects, c
     return True
 
 
-def calculate_total_score(program_id, user_scores, conn):
+def calculate_total_score(program_id, user_scores, conn, program_subjects=None):
     """Рассчитать общий балл для программы"""
-    program_subjects = get_program_subjects(conn, program_id)
+    if program_subjects is None:
+        program_subjects = get_program_subjects(conn, program_id)
     total = 0
 
     for subject in program_subjects:
@@ -47,6 +47,22 @@ def get_all_faculties(conn):
         return []
 
 
+def get_reference_version(conn, *tables):
+    """Версии справочников (reference_versions) кортежем в порядке tables; None при ошибке"""
+    try:
+        with conn.cursor() as cur:
+            cur.execute("SELECT table_name, version FROM reference_versions WHERE table_name = ANY(%s)",
+                        (list(tables),))
+            versions = dict(cur.fetchall())
+        if len(versions) != len(tables):
+            return None
+        return tuple(versions[table] for table in tables)
+    except Exception as e:
+        print(f"Ошибка получения версии справочника: {e}")
+        conn.rollback()
+        return None
+
+
 def get_faculty_by_id(conn, faculty_id):
     """Получить информацию о факультете по ID"""
     try:
@@ -96,6 +112,7 @@ def get_program_subjects(conn, program_id):
                 SELECT 
                     s.subject_id,
                     s.subject_name,
+                    s.min_score,
                     ps.is_required
                 FROM program_subjects ps
                 JOIN subjects s ON ps.subject_id = s.subject_id
@@ -106,3 +123,26 @@ def get_program_subjects(conn, program_id):
     except Exception as e:
         print(f"Ошибка получения предметов программы: {e}")
         return []
+
+def get_all_program_subjects(conn):
+    """Получить предметы ЕГЭ всех программ одним запросом: {program_id: [предметы]}"""
+    try:
+        with conn.cursor(cursor_factory=RealDictCursor) as cur:
+            cur.execute("""
+                SELECT 
+                    ps.program_id,
+                    s.subject_id,
+                    s.subject_name,
+                    s.min_score,
+                    ps.is_required
+                FROM program_subjects ps
+                JOIN subjects s ON ps.subject_id = s.subject_id
+                ORDER BY ps.program_id, ps.is_required DESC, s.subject_name
+            """)
+            subjects_by_program = {}
+            for row in cur.fetchall():
+                subjects_by_program.setdefault(row['program_id'], []).append(row)
+            return subjects_by_program
+    except Exception as e:
+        print(f"Ошибка получения предметов программ: {e}")
+        return {}
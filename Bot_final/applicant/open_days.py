@@ -1,36 +1,45 @@
 from maxgram import Bot
 from maxgram.keyboards import InlineKeyboard
+import psycopg2.errors
 from psycopg2.extras import RealDictCursor
+from DATABASE.read_cache import cached_read
 
+# Сколько секунд список дней открытых дверей отдается из кэша (сбрасывается при регистрации)
+OPEN_DAYS_TTL = 30
 
 
 def get_upcoming_open_days(conn):
     """Получить ближайшие дни открытых дверей"""
     try:
-        with conn.cursor(cursor_factory=RealDictCursor) as cur:
-            cur.execute("""
-                SELECT 
-                    od.event_id,
-                    f.faculty_name,
-                    TO_CHAR(od.event_date, 'DD.MM.YYYY HH24:MI') as event_date,
-                    od.description,
-                    od.max_participants,
-                    COUNT(odr.registration_id) as registered_count,
-                    (od.max_participants - COUNT(odr.registration_id)) as available_places
-                FROM open_days od
-                JOIN faculties f ON od.faculty_id = f.faculty_id
-                LEFT JOIN open_day_registrations odr ON od.event_id = odr.event_id
-                WHERE od.event_date >= CURRENT_DATE
-                GROUP BY od.event_id, f.faculty_name, od.event_date, od.description, od.max_participants
-                ORDER BY od.event_date ASC
-                LIMIT 5
-            """)
-            return cur.fetchall()
+        return _load_upcoming_open_days(conn)
     except Exception as e:
         print(f"Ошибка получения дней открытых дверей: {e}")
+        conn.rollback()
         return []
 
 
+@cached_read("upcoming_open_days", ttl=OPEN_DAYS_TTL)
+def _load_upcoming_open_days(conn):
+    """Одновременные нажатия «Дни открытых дверей» делят один запрос"""
+    with conn.cursor(cursor_factory=RealDictCursor) as cur:
+        cur.execute("""
+            SELECT 
+                od.event_id,
+                f.faculty_name,
+                TO_CHAR(od.event_date, 'DD.MM.YYYY HH24:MI') as event_date,
+                od.description,
+                od.max_participants,
+                od.registered_count,
+                (od.max_participants - od.registered_count) as available_places
+            FROM open_days od
+            JOIN faculties f ON od.faculty_id = f.faculty_id
+            WHERE od.event_date >= CURRENT_DATE
+            ORDER BY od.event_date ASC
+            LIMIT 5
+        """)
+        return cur.fetchall()
+
+
 def format_open_days_message(open_days, idx):
     """Форматирует список дней открытых дверей в читаемое сообщение"""
     if not open_days:
@@ -42,12 +51,15 @@ def format_open_days_message(open_days, idx):
     message += f"{idx}. 🏛 **{event['faculty_name']}**\n"
     message += f"   📅 Дата: {event['event_date']}\n"
     message += f"   📖 {event['description']}\n"
-    message += f"   👥 Мест: {event['registered_count']}/{event['max_participants']} "
-
-    if event['available_places'] > 0:
-        message += f"(свободно: {event['available_places']})\n"
+    # max_participants не задан — число мест не ограничено
+    if event['max_participants'] is None:
+        message += f"   👥 Записано: {event['registered_count']} (без ограничения мест)\n"
     else:
-        message += "❌ ЗАПОЛНЕНО\n"
+        message += f"   👥 Мест: {event['registered_count']}/{event['max_participants']} "
+        if event['available_places'] > 0:
+            message += f"(свободно: {event['available_places']})\n"
+        else:
+            message += "❌ ЗАПОЛНЕНО (можно встать в лист ожидания)\n"
 
     message += f"   🆔 ID события: {event['event_id']}\n\n"
 
@@ -81,17 +93,12 @@ def get_open_day_by_id(conn, event_id):
                     TO_CHAR(od.event_date, 'DD.MM.YYYY HH24:MI') as event_date,
                     od.description,
                     od.max_participants,
-                    COUNT(odr.registration_id) as registered_count,
-                    (od.max_participants - COUNT(odr.registration_id)) as available_places,
-                    CASE 
-                        WHEN (od.max_participants - COUNT(odr.registration_id)) <= 0 THEN false
-                        ELSE true
-                    END as can_register
+                    od.registered_count,
+                    (od.max_participants - od.registered_count) as available_places,
+                    (od.max_participants IS NULL OR od.registered_count < od.max_participants) as can_register
                 FROM open_days od
                 JOIN faculties f ON od.faculty_id = f.faculty_id
-                LEFT JOIN open_day_registrations odr ON od.event_id = odr.event_id
                 WHERE od.event_id = %s
-                GROUP BY od.event_id, f.faculty_name, od.event_date, od.description, od.max_participants
             """, (event_id,))
             return cur.fetchone()
     except Exception as e:
@@ -99,3 +106,124 @@ def get_open_day_by_id(conn, event_id):
         return None
 
 
+
+
+def register_for_open_day(conn, event_id, max_id, first_name=None, last_name=None):
+    """Записать на событие, если есть места: 'registered', 'already' или 'full'
+
+    Проверка мест и вставка — один запрос: строка события блокируется (FOR UPDATE),
+    поэтому одновременные записи не превысят max_participants. registered_count
+    увеличивает триггер. Пока в листе ожидания есть кто-то раньше пользователя,
+    свободное место не его — 'full'. Собственная запись в листе ожидания удаляется
+    тем же запросом. Коммит — на вызывающем.
+    """
+    try:
+        with conn.cursor() as cur:
+            cur.execute("""
+                WITH own AS (
+                    SELECT waitlist_id FROM open_day_waitlist
+                    WHERE event_id = %(event_id)s AND max_id = %(max_id)s
+                ),
+                registered AS (
+                    INSERT INTO open_day_registrations (event_id, max_id, first_name, last_name)
+                    SELECT od.event_id, %(max_id)s, %(first_name)s, %(last_name)s
+                    FROM open_days od
+                    WHERE od.event_id = %(event_id)s
+                      AND (od.max_participants IS NULL OR od.registered_count < od.max_participants)
+                      AND NOT EXISTS (
+                          SELECT 1 FROM open_day_waitlist w
+                          WHERE w.event_id = od.event_id AND w.max_id <> %(max_id)s
+                            AND (NOT EXISTS (SELECT 1 FROM own) OR w.waitlist_id < (SELECT waitlist_id FROM own))
+                      )
+                    FOR UPDATE OF od
+                    RETURNING event_id, max_id
+                ),
+                left_waitlist AS (
+                    DELETE FROM open_day_waitlist w
+                    USING registered r
+                    WHERE w.event_id = r.event_id AND w.max_id = r.max_id
+                )
+                SELECT 1 FROM registered
+            """, {'event_id': event_id, 'max_id': max_id,
+                  'first_name': first_name, 'last_name': last_name})
+            return 'registered' if cur.fetchone() else 'full'
+    except psycopg2.errors.UniqueViolation:
+        conn.rollback()
+        return 'already'
+
+
+def join_waitlist(conn, event_id, max_id, chat_id, first_name=None, last_name=None):
+    """Встать в лист ожидания (повторно — не дублируется); возвращает место в очереди
+    или None, если пользователь уже записан на событие"""
+    with conn.cursor() as cur:
+        cur.execute("""
+            WITH registered AS (
+                SELECT 1 FROM open_day_registrations
+                WHERE event_id = %(event_id)s AND max_id = %(max_id)s
+            ),
+            added AS (
+                INSERT INTO open_day_waitlist (event_id, max_id, chat_id, first_name, last_name)
+                SELECT %(event_id)s, %(max_id)s, %(chat_id)s, %(first_name)s, %(last_name)s
+                WHERE NOT EXISTS (SELECT 1 FROM registered)
+                ON CONFLICT (event_id, max_id) DO NOTHING
+                RETURNING waitlist_id
+            ),
+            existing AS (
+                SELECT waitlist_id FROM open_day_waitlist
+                WHERE event_id = %(event_id)s AND max_id = %(max_id)s
+            )
+            SELECT EXISTS (SELECT 1 FROM registered),
+                   (SELECT COUNT(*) FROM open_day_waitlist w
+                    WHERE w.event_id = %(event_id)s
+                      AND w.waitlist_id <= COALESCE((SELECT waitlist_id FROM existing), w.waitlist_id))
+                   + (SELECT COUNT(*) FROM added)
+        """, {'event_id': event_id, 'max_id': max_id, 'chat_id': chat_id,
+              'first_name': first_name, 'last_name': last_name})
+        registered, position = cur.fetchone()
+        return None if registered else position
+
+
+def cancel_open_day_registration(conn, event_id, max_id):
+    """Отменить запись или выйти из листа ожидания: ('cancelled' | 'left_waitlist' | 'not_found', promoted)
+
+    После отмены первый из листа ожидания записывается на освободившееся место в той же
+    транзакции (строка события остается заблокированной), promoted — его chat_id и имя.
+    Коммит — на вызывающем.
+    """
+    with conn.cursor(cursor_factory=RealDictCursor) as cur:
+        cur.execute("""
+            DELETE FROM open_day_registrations
+            WHERE event_id = %s AND max_id = %s
+            RETURNING registration_id
+        """, (event_id, max_id))
+        if cur.fetchone() is None:
+            cur.execute("""
+                DELETE FROM open_day_waitlist
+                WHERE event_id = %s AND max_id = %s
+                RETURNING waitlist_id
+            """, (event_id, max_id))
+            return ('left_waitlist' if cur.fetchone() else 'not_found'), None
+
+        cur.execute("""
+            WITH next_in_line AS (
+                DELETE FROM open_day_waitlist
+                WHERE waitlist_id = (
+                    SELECT w.waitlist_id
+                    FROM open_day_waitlist w
+                    JOIN open_days od ON od.event_id = w.event_id
+                    WHERE w.event_id = %s
+                      AND (od.max_participants IS NULL OR od.registered_count < od.max_participants)
+                    ORDER BY w.waitlist_id
+                    LIMIT 1
+                )
+                RETURNING event_id, max_id, chat_id, first_name, last_name
+            ),
+            promoted AS (
+                INSERT INTO open_day_registrations (event_id, max_id, first_name, last_name)
+                SELECT event_id, max_id, first_name, last_name FROM next_in_line
+                RETURNING max_id
+            )
+            SELECT n.chat_id, n.first_name, n.last_name
+            FROM next_in_line n JOIN promoted p ON p.max_id = n.max_id
+        """, (event_id,))
+        return 'cancelled', cur.fetchone()
@@ -0,0 +1,87 @@
+import os
+import time
+import uuid
+
+import requests
+
+from config import bot, logger
+
+# Отправка файлов в чат через API MAX: POST /uploads?type=file выдает адрес загрузки,
+# файл отправляется туда multipart-запросом, полученный токен прикладывается к сообщению.
+# Тело запроса читается с диска блоками, поэтому большой файл не загружается в память.
+
+UPLOAD_TIMEOUT = 300
+# Пока сервер обрабатывает загруженный файл, сообщение с ним отклоняется (attachment.not.ready)
+SEND_ATTEMPTS = 5
+SEND_RETRY_DELAY = 1.0
+
+
+class _MultipartFile:
+    """multipart/form-data с одним файлом, который читается с диска по мере отправки"""
+
+    def __init__(self, path, field="data"):
+        self.boundary = uuid.uuid4().hex
+        name = os.path.basename(path)
+        self._head = (f"--{self.boundary}\r\n"
+                      f'Content-Disposition: form-data; name="{field}"; filename="{name}"\r\n'
+                      f"Content-Type: application/octet-stream\r\n\r\n").encode()
+        self._tail = f"\r\n--{self.boundary}--\r\n".encode()
+        self._length = len(self._head) + os.path.getsize(path) + len(self._tail)
+        self._file = open(path, 'rb')
+        self._parts = [self._head, self._file, self._tail]
+
+    def __len__(self):
+        return self._length
+
+    def read(self, size=-1):
+        chunks = []
+        while self._parts and (size < 0 or size > 0):
+            part = self._parts[0]
+            if isinstance(part, bytes):
+                chunk = part if size < 0 else part[:size]
+                rest = part[len(chunk):]
+                if rest:
+                    self._parts[0] = rest
+                else:
+                    self._parts.pop(0)
+            else:
+                chunk = part.read(size)
+                if not chunk or size < 0:
+                    self._parts.pop(0)
+            chunks.append(chunk)
+            if size > 0:
+                size -= len(chunk)
+        return b"".join(chunks)
+
+    def close(self):
+        self._file.close()
+
+    @property
+    def content_type(self):
+        return f"multipart/form-data; boundary={self.boundary}"
+
+
+def upload_file(path):
+    """Загрузить файл на сервер MAX, вернуть токен вложения"""
+    upload_url = bot.api.client.request("POST", "/uploads", params={"type": "file"})["url"]
+    body = _MultipartFile(path)
+    try:
+        response = requests.post(upload_url, data=body, headers={"Content-Type": body.content_type},
+                                 timeout=UPLOAD_TIMEOUT)
+        response.raise_for_status()
+        return response.json()["token"]
+    finally:
+        body.close()
+
+
+def send_file(chat_id, path, text):
+    """Отправить файл в чат сообщением с подписью text"""
+    attachments = [{"type": "file", "payload": {"token": upload_file(path)}}]
+    for attempt in range(SEND_ATTEMPTS):
+        try:
+            return bot.api.send_message(chat_id, text, attachments)
+        except Exception as e:
+            if "attachment.not.ready" not in str(e) or attempt == SEND_ATTEMPTS - 1:
+                raise
+            logger.info(f"Файл {os.path.basename(path)} еще обрабатывается, повтор отправки")
+            time.sleep(SEND_RETRY_DELAY * (attempt + 1))
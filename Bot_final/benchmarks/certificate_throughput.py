@@ -0,0 +1,105 @@
+"""Бенчмарк очереди справок: N одновременных заявок (начало семестра) через certificate_worker
+
+Создает заявки студентов одним INSERT, прогоняет очередь пулом из --workers процессов
+и печатает пропускную способность и задержку от подачи до готовности. Созданные заявки,
+уведомления и PDF удаляются.
+
+Запуск из каталога Bot_final (БД должна быть создана и заполнена):
+    python benchmarks/certificate_throughput.py --requests 1000 --workers 1 2 4
+"""
+import argparse
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import certificate_worker
+
+
+def enqueue(conn, count):
+    """count заявок на электронную справку от студентов по кругу: список request_id"""
+    with conn.cursor() as cur:
+        cur.execute("""
+            WITH students AS (
+                SELECT user_id, ROW_NUMBER() OVER (ORDER BY user_id) - 1 AS n, COUNT(*) OVER () AS total
+                FROM users WHERE role = 'student'
+            )
+            INSERT INTO study_certificate_requests (user_id, status, delivery_type)
+            SELECT s.user_id, 'pending', 'digital'
+            FROM generate_series(0, %s - 1) AS i
+            JOIN students s ON s.n = i %% s.total
+            RETURNING request_id
+        """, (count,))
+        request_ids = [row[0] for row in cur.fetchall()]
+    conn.commit()
+    return request_ids
+
+
+def cleanup(conn, request_ids):
+    with conn.cursor() as cur:
+        cur.execute("""
+            DELETE FROM notifications WHERE type = 'certificate_ready' AND related_id = ANY(%s)
+        """, (request_ids,))
+        cur.execute("DELETE FROM study_certificate_requests WHERE request_id = ANY(%s)", (request_ids,))
+    conn.commit()
+
+
+def latencies(conn, request_ids):
+    with conn.cursor() as cur:
+        cur.execute("""
+            SELECT EXTRACT(EPOCH FROM completed_at - request_date)
+            FROM study_certificate_requests
+            WHERE request_id = ANY(%s) AND status = 'completed'
+        """, (request_ids,))
+        return [float(row[0]) for row in cur.fetchall()]
+
+
+def run(conn, count, workers):
+    pool = certificate_worker.create_pool(workers)
+    # Прогрев: процессы пула стартуют и регистрируют шрифт до начала замера
+    list(pool.map(certificate_worker._init_renderer,
+                  [certificate_worker.FONT_PATH] * workers, [certificate_worker.CERTIFICATES_DIR] * workers))
+
+    request_ids = enqueue(conn, count)
+    started = time.perf_counter()
+    batches = 0
+    try:
+        while certificate_worker.process_batch(conn, pool, workers * 8):
+            batches += 1
+        elapsed = time.perf_counter() - started
+        done = latencies(conn, request_ids)
+    finally:
+        pool.shutdown(wait=True)
+        cleanup(conn, request_ids)
+
+    done.sort()
+    print(f"Процессов: {workers:>2}  справок: {len(done)}/{count}  пачек: {batches}  "
+          f"время: {elapsed:.2f} с  {len(done) / elapsed:.0f} справок/с  "
+          f"задержка p50: {statistics.median(done):.2f} с  p95: {done[int(len(done) * 0.95) - 1]:.2f} с")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, os.cpu_count() or 2])
+    args = parser.parse_args()
+
+    out_dir = tempfile.mkdtemp(prefix="certificates_")
+    certificate_worker.CERTIFICATES_DIR = out_dir
+    certificate_worker.SIGNING_KEY = certificate_worker.SIGNING_KEY or "benchmark"
+
+    from DATABASE.database import EducationDB
+    try:
+        with EducationDB() as db:
+            for workers in args.workers:
+                run(db.conn, args.requests, workers)
+    finally:
+        shutil.rmtree(out_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
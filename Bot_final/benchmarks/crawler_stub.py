@@ -0,0 +1,149 @@
+"""Проверка и замер rector.crawler на локальной HTTP-заглушке без выхода в сеть
+
+Заглушка отдает страницы выдачи (/search?q=...) и RSS-ленты (/feed/N) с задержкой --delay,
+поддерживает ETag/If-None-Match и первым ответом на /flaky отдает 503. Сценарий:
+  1. последовательный сбор (1 поток) и параллельный (--workers);
+  2. повторный сбор — все источники должны ответить 304;
+  3. повтор после 503 и слияние повторяющихся между источниками новостей.
+
+Запуск из каталога Bot_final:
+    python benchmarks/crawler_stub.py --queries 6 --feeds 4 --delay 0.2
+"""
+import argparse
+import hashlib
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.news_extraction import generate_page
+from rector import crawler
+
+CARDS_PER_PAGE = 20
+
+
+def generate_feed(number, items):
+    """RSS-лента: половина новостей совпадает со ссылками из выдачи (articles/0..)"""
+    entries = []
+    for i in range(items):
+        article = i if i % 2 == 0 else 1000 * (number + 1) + i
+        entries.append(f"""
+  <item>
+    <title>Новость ленты {number}: студенты НГТУ на олимпиаде ({article})</title>
+    <link>https://news{article % 7}.example.ru/articles/{article}?utm_medium=rss</link>
+    <pubDate>Mon, 04 Mar 2024 10:00:00 +0700</pubDate>
+  </item>""")
+    return f"""<?xml version="1.0" encoding="utf-8"?>
+<rss version="2.0"><channel><title>Сайт факультета {number}</title>{''.join(entries)}
+</channel></rss>""".encode("utf-8")
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    delay = 0.0
+    stats = None
+    lock = threading.Lock()
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        with self.lock:
+            self.stats["requests"] += 1
+            flaky_first = url.path == "/flaky" and not self.stats["flaky_seen"]
+            if url.path == "/flaky":
+                self.stats["flaky_seen"] = True
+        time.sleep(self.delay)
+
+        if flaky_first:
+            self._send(503, b"", "text/plain")
+            return
+        if url.path == "/search":
+            body = generate_page(CARDS_PER_PAGE).encode("utf-8")
+            content_type = "text/html; charset=utf-8"
+        elif url.path.startswith("/feed/") or url.path == "/flaky":
+            number = int(url.path.rsplit("/", 1)[-1]) if url.path != "/flaky" else 99
+            body = generate_feed(number, CARDS_PER_PAGE)
+            content_type = "application/rss+xml"
+        else:
+            self._send(404, b"", "text/plain")
+            return
+
+        etag = '"' + hashlib.md5(body + parse_qs(url.query).get("q", [""])[0].encode()).hexdigest() + '"'
+        if self.headers.get("If-None-Match") == etag:
+            with self.lock:
+                self.stats["not_modified"] += 1
+            self._send(304, b"", content_type, etag)
+            return
+        self._send(200, body, content_type, etag)
+
+    def _send(self, status, body, content_type, etag=None):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        if etag:
+            self.send_header("ETag", etag)
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def run_crawl(name, sources, workers):
+    # Свежие сессия и кэш валидаторов: каждый прогон начинается с холодного старта
+    crawler._validators.clear()
+    session = crawler.create_session()
+    started = time.perf_counter()
+    results = crawler.crawl_news(sources, session=session, workers=workers)
+    elapsed = time.perf_counter() - started
+    print(f"{name:<24} {elapsed:>7.2f} с  новостей: {len(results)}")
+    return results, session
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--queries", type=int, default=6)
+    parser.add_argument("--feeds", type=int, default=4)
+    parser.add_argument("--delay", type=float, default=0.2, help="задержка ответа заглушки, с")
+    parser.add_argument("--workers", type=int, default=crawler.CRAWLER_WORKERS)
+    args = parser.parse_args()
+
+    StubHandler.delay = args.delay
+    StubHandler.stats = {"requests": 0, "not_modified": 0, "flaky_seen": False}
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_port}"
+
+    # Все источники на одном хосте: ограничение PER_HOST_LIMIT касается их всех
+    crawler.PER_HOST_LIMIT = args.workers
+    sources = ([crawler.google_source(f"НГТУ новости {i}", url=f"{base}/search") for i in range(args.queries)]
+               + [crawler.feed_source(f"{base}/feed/{i}") for i in range(args.feeds)]
+               + [crawler.feed_source(f"{base}/flaky")])
+
+    try:
+        sequential, _ = run_crawl("Последовательно (1 поток)", sources, 1)
+        StubHandler.stats["flaky_seen"] = False
+        parallel, session = run_crawl(f"Параллельно ({args.workers} пот.)", sources, args.workers)
+
+        # Повторный сбор на прогретой сессии: все источники отвечают 304
+        before = StubHandler.stats["not_modified"]
+        started = time.perf_counter()
+        repeated = crawler.crawl_news(sources, session=session, workers=args.workers)
+        print(f"{'Повторно (условные GET)':<24} {time.perf_counter() - started:>7.2f} с  новостей: {len(repeated)}")
+
+        # Уникальные ссылки: CARDS_PER_PAGE из выдачи + по половине каждой ленты (включая /flaky)
+        expected = CARDS_PER_PAGE + (CARDS_PER_PAGE // 2) * (args.feeds + 1)
+        assert len(sequential) == len(parallel) == len(repeated) == expected, \
+            (len(sequential), len(parallel), len(repeated), expected)
+        assert [news["link"] for news in parallel] == [news["link"] for news in repeated]
+        assert StubHandler.stats["not_modified"] - before == len(sources)
+        print(f"OK: запросов к заглушке {StubHandler.stats['requests']}, ответов 304: {StubHandler.stats['not_modified']}")
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+"""Память при выгрузке архива новостей: fetchall в список против серверного курсора
+(DATABASE/exports.py) на архивах разного размера
+
+Каждый вариант выполняется в отдельном процессе, печатается пиковый RSS процесса:
+  fetchall — весь результат в памяти клиента, XLSX строится обычной книгой openpyxl;
+  stream   — export_dataset: FETCH пачками, CSV построчно, XLSX в режиме write_only.
+У stream пик не должен расти вместе с архивом.
+
+В news добавляются синтетические новости (ссылки https://bench.example/...), после
+замера они удаляются.
+
+Запуск из каталога Bot_final (БД должна быть создана):
+    python benchmarks/export_memory.py --items 20000 100000
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+
+BOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BOT_DIR)
+
+from DATABASE.exports import EXPORTS, FORMATS, export_dataset, open_export_connection, write_csv
+from benchmarks.news_insert import make_news
+from rector.parser import insert_news_copy
+
+BENCH_PREFIX = "https://bench.example/"
+# Новости добавляются порциями, чтобы сам бенчмарк не раздувал память
+ADD_CHUNK = 10000
+
+
+def peak_rss_mb():
+    """Пиковый RSS процесса (VmHWM). ru_maxrss не подходит: в Linux он наследуется дочерним
+    процессом от родителя через fork/exec"""
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1]) / 1024
+    return None
+
+
+def db_config():
+    from DATABASE.database import EducationDB
+
+    with EducationDB() as db:
+        return db.db_config
+
+
+def fetchall_export(conn, fmt, path):
+    """Прежний подход: весь результат запроса в памяти"""
+    dataset = EXPORTS['news']
+    with conn.cursor() as cur:
+        cur.execute(dataset['sql'])
+        rows = cur.fetchall()
+    if fmt == 'csv':
+        return write_csv(path, dataset['columns'], rows)
+
+    from openpyxl import Workbook
+
+    workbook = Workbook()
+    sheet = workbook.active
+    sheet.append(dataset['columns'])
+    for row in rows:
+        sheet.append(row)
+    workbook.save(path)
+    return len(rows)
+
+
+def child(variant, fmt):
+    """Один замер в текущем процессе; результат — строка JSON"""
+    conn = open_export_connection(db_config())
+    started = time.perf_counter()
+    with tempfile.TemporaryDirectory() as tmp:
+        if variant == 'fetchall':
+            count = fetchall_export(conn, fmt, os.path.join(tmp, f"news.{fmt}"))
+        else:
+            count = export_dataset(conn, 'news', fmt, out_dir=tmp)[1]
+    conn.close()
+    print(json.dumps({
+        'rows': count,
+        'elapsed': time.perf_counter() - started,
+        'peak_rss_mb': peak_rss_mb(),
+    }))
+
+
+def run_child(variant, fmt):
+    result = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--child", variant, fmt],
+        cwd=BOT_DIR, capture_output=True, text=True,
+    )
+    if result.returncode != 0:
+        raise SystemExit(result.stderr[-2000:])
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def add_news(conn, count):
+    while count > 0:
+        news_list = make_news(min(count, ADD_CHUNK))
+        batch = uuid.uuid4().hex[:8]
+        for i, news in enumerate(news_list):
+            news['link'] = f"{BENCH_PREFIX}{batch}/{i}"
+            news['title'] = f"{news['title']}: подробный отчет о событии, комментарии и итоги ({i})"
+        try:
+            insert_news_copy(conn, news_list)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        count -= len(news_list)
+
+
+def remove_news(conn):
+    try:
+        with conn.cursor() as cur:
+            cur.execute("DELETE FROM news WHERE link LIKE %s", (BENCH_PREFIX + '%',))
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--items", type=int, nargs="+", default=[20000, 100000],
+                        help="размеры архива (новостей в news)")
+    parser.add_argument("--child", nargs=2, metavar=("VARIANT", "FORMAT"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(*args.child)
+        return
+
+    from DATABASE.database import EducationDB
+
+    with EducationDB() as db:
+        conn = db.conn
+        with conn.cursor() as cur:
+            cur.execute("SELECT COUNT(*) FROM news")
+            existing = cur.fetchone()[0]
+        try:
+            print(f"{'новостей':>9} {'вариант':<9} {'формат':<6} {'время, с':>9} {'пик RSS, МБ':>12}")
+            total = existing
+            for size in sorted(args.items):
+                if size > total:
+                    add_news(conn, size - total)
+                    total = size
+                for variant in ('fetchall', 'stream'):
+                    for fmt in FORMATS:
+                        result = run_child(variant, fmt)
+                        print(f"{result['rows']:>9} {variant:<9} {fmt:<6} {result['elapsed']:>9.2f} "
+                              f"{result['peak_rss_mb']:>12.1f}")
+        finally:
+            remove_news(conn)
+
+
+if __name__ == "__main__":
+    main()
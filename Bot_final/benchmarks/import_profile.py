@@ -0,0 +1,69 @@
+"""Профиль времени импорта при холодном старте бота (python -X importtime)
+
+Запуск из каталога Bot_final:
+    python benchmarks/import_profile.py                # импорт main, топ-20 модулей
+    python benchmarks/import_profile.py --module handlers.project_handler --top 30
+    python benchmarks/import_profile.py --max-ms 400   # код возврата 1, если импорт дольше
+
+Импорт main не подключается к БД и не грузит pymorphy3/requests/lxml/numpy: модули
+обработчиков подгружаются лениво (handlers/registry.py), а БД — при первом обращении.
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+BOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Модули, которые не должны попадать в холодный старт
+HEAVY_MODULES = ("pymorphy3", "lxml", "numpy", "rector.parser", "psycopg2.extras")
+
+
+def profile_imports(module):
+    """Импортировать модуль в чистом интерпретаторе и разобрать вывод -X importtime"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=BOT_DIR, capture_output=True, text=True,
+    )
+    if result.returncode != 0:
+        print(result.stderr[-2000:])
+        raise SystemExit(f"Не удалось импортировать {module}")
+
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        # После разделителя один пробел, дальше отступ по два пробела на уровень вложенности
+        rows.append((int(cumulative_us), int(self_us), name[1:].rstrip()))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--module", default="main", help="что импортировать (по умолчанию main)")
+    parser.add_argument("--top", type=int, default=20, help="сколько самых дорогих модулей показать")
+    parser.add_argument("--max-ms", type=float, default=None, help="допустимое время импорта, мс")
+    args = parser.parse_args()
+
+    rows = profile_imports(args.module)
+    top_level = [row for row in rows if not row[2].startswith(" ")]
+    total_us = sum(cumulative for cumulative, _, _ in top_level)
+
+    print(f"Импорт {args.module}: {total_us / 1000:.1f} мс, модулей: {len(rows)}\n")
+    print(f"{'суммарно, мс':>13} {'свое, мс':>9}  модуль")
+    for cumulative, self_us, name in sorted(rows, reverse=True)[:args.top]:
+        print(f"{cumulative / 1000:13.1f} {self_us / 1000:9.1f}  {name.strip()}")
+
+    loaded = {name.strip() for _, _, name in rows}
+    heavy = [name for name in HEAVY_MODULES if name in loaded]
+    if heavy:
+        print(f"\n⚠️ В холодный старт попали тяжелые модули: {', '.join(heavy)}")
+
+    if args.max_ms is not None and total_us / 1000 > args.max_ms:
+        print(f"\n❌ Импорт дольше допустимых {args.max_ms} мс")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
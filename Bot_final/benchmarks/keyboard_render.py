@@ -0,0 +1,115 @@
+"""Стоимость клавиатуры меню на одно обновление (keyboards/menus.py, keyboards/cache.py)
+
+Для каждой клавиатуры сравниваются:
+  build  — как раньше: новый объект клавиатуры и вложение для API на каждое нажатие
+           (исходный построитель, __wrapped__ у кэшированных);
+  cached — готовая клавиатура из кэша: статическая строится один раз, клавиатуры
+           факультетов и программ — по версии справочника (VersionedCache).
+Печатается время на одно обновление в микросекундах.
+
+С --db дополнительно замеряется экран факультетов целиком вместе с чтением из БД:
+выборка факультетов и построение клавиатуры против чтения версии справочника и кэша.
+
+Запуск из каталога Bot_final:
+    python benchmarks/keyboard_render.py --updates 20000
+    python benchmarks/keyboard_render.py --db
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from keyboards import menus
+from keyboards.cache import VersionedCache
+
+STATIC_MENUS = ("get_main_non_auth_keyboard", "get_main_auth_keyboard", "get_app_keyboard",
+                "get_student_keyboard", "get_teacher_keyboard", "get_rector_keyboard",
+                "get_dean_keyboard", "get_auth_keyboard")
+
+
+def per_update_us(func, updates):
+    started = time.perf_counter()
+    for _ in range(updates):
+        func()
+    return (time.perf_counter() - started) / updates * 1e6
+
+
+def make_programs(count):
+    return [{'program_id': i, 'program_name': f"Прикладная математика и информатика, профиль {i}"}
+            for i in range(1, count + 1)]
+
+
+def render_cases(faculties, programs):
+    """[(название, без кэша, с кэшем)] — функции строят вложение для одного обновления"""
+    cases = []
+    for name in STATIC_MENUS:
+        builder = getattr(menus, name)
+        cases.append((name, lambda b=builder: b.__wrapped__().to_attachment(),
+                      lambda b=builder: b().to_attachment()))
+
+    detail = menus.get_program_detail_keyboard
+    cases.append(("get_program_detail_keyboard", lambda: detail.__wrapped__(3).to_attachment(),
+                  lambda: detail(3).to_attachment()))
+
+    names = [f"Факультет информационных технологий №{i}" for i in range(faculties)]
+    keys = list(range(1, faculties + 1))
+    rows = make_programs(programs)
+    cache = VersionedCache()
+    cases.append((f"get_faculties_keyboard ({faculties})",
+                  lambda: menus.get_faculties_keyboard(names, keys).to_attachment(),
+                  lambda: cache.get_or_build('faculties', (1,), menus.get_faculties_keyboard,
+                                             names, keys).to_attachment()))
+    cases.append((f"get_programs_keyboard ({programs})",
+                  lambda: menus.get_programs_keyboard(rows).to_attachment(),
+                  lambda: cache.get_or_build(('programs', 1), (1, 1), menus.get_programs_keyboard,
+                                             rows).to_attachment()))
+    return cases
+
+
+def check_db(updates):
+    """Экран факультетов с чтением из БД: как раньше и по версии справочника"""
+    from DATABASE.database import EducationDB
+    from applicant.available_programs import get_all_faculties, get_reference_version
+
+    def build(conn):
+        res = get_all_faculties(conn)
+        return res[0], menus.get_faculties_keyboard(res[1], res[2])
+
+    with EducationDB() as db:
+        conn = db.conn
+        cache = VersionedCache()
+        old = per_update_us(lambda: build(conn)[1].to_attachment(), updates)
+        new = per_update_us(lambda: cache.get_or_build(
+            'faculties', get_reference_version(conn, 'faculties'), build, conn)[1].to_attachment(), updates)
+        conn.rollback()
+    print(f"\nЭкран факультетов с БД: build {old:.1f} мкс, cached {new:.1f} мкс ({old / new:.1f}x)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--updates", type=int, default=20000, help="обновлений на каждую клавиатуру")
+    parser.add_argument("--faculties", type=int, default=12)
+    parser.add_argument("--programs", type=int, default=30, help="программ на факультете")
+    parser.add_argument("--db", action="store_true", help="замерить экран факультетов вместе с БД")
+    args = parser.parse_args()
+
+    print(f"{'клавиатура':<36} {'build, мкс':>11} {'cached, мкс':>12} {'ускорение':>10}")
+    total_old = total_new = 0
+    for name, build, cached in render_cases(args.faculties, args.programs):
+        if build() != cached():
+            raise SystemExit(f"{name}: кэшированное вложение отличается от построенного заново")
+        old = per_update_us(build, args.updates)
+        new = per_update_us(cached, args.updates)
+        total_old += old
+        total_new += new
+        print(f"{name:<36} {old:>11.2f} {new:>12.2f} {old / new:>9.1f}x")
+    print(f"{'всего':<36} {total_old:>11.2f} {total_new:>12.2f} {total_old / total_new:>9.1f}x")
+
+    if args.db:
+        check_db(max(args.updates // 20, 100))
+
+
+if __name__ == "__main__":
+    main()
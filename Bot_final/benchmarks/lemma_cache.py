@@ -0,0 +1,97 @@
+"""Холодный старт оценки тональности с кэшем лемм (rector/morphology.py) и без него
+
+Замеряется оценка заголовков в свежем процессе (без времени импорта). Каждый прогон — отдельный процесс с общим файлом LEMMA_CACHE_PATH во временном каталоге:
+  1. пустой кэш: все слова разбирает pymorphy3, разборы сохраняются в файл;
+  2. прогретый кэш: те же заголовки, pymorphy3 не должен даже импортироваться.
+
+Запуск из каталога Bot_final:
+    python benchmarks/lemma_cache.py --titles 5000
+"""
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+
+BOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Выполняется в дочернем процессе: время оценки, включая ленивую загрузку pymorphy3
+CHILD = """
+import hashlib, json, sys, time
+sys.path.insert(0, '.')
+from rector.parser import SentimentAnalyzer
+from rector.morphology import flush_lemma_cache
+with open({titles_path!r}, encoding='utf-8') as f:
+    titles = json.load(f)
+analyzer = SentimentAnalyzer()
+started = time.perf_counter()
+results = [analyzer.analyze_sentiment(title) for title in titles]
+elapsed = time.perf_counter() - started
+flush_lemma_cache()
+print(json.dumps({{
+    'elapsed': elapsed,
+    'pymorphy_loaded': 'pymorphy3' in sys.modules,
+    'digest': hashlib.sha1(repr(results).encode()).hexdigest()[:12],
+}}))
+"""
+
+
+def make_vocabulary_titles(count, seed=7):
+    """Заголовки из всех словоформ слов словаря тональности и обычной лексики:
+    несколько тысяч разных словоформ, как в архиве новостей"""
+    sys.path.insert(0, BOT_DIR)
+    from benchmarks.sentiment_batch import FILLER
+    from rector.morphology import get_morph_analyzer
+    from rector.parser import SentimentAnalyzer
+
+    morph = get_morph_analyzer()
+    analyzer = SentimentAnalyzer()
+    lemmas = set(analyzer.positive_words) | set(analyzer.negative_words) | {w.lower() for w in FILLER}
+    forms = sorted({form.word for lemma in lemmas for form in morph.parse(lemma)[0].lexeme})
+    rnd = random.Random(seed)
+    titles = [" ".join(rnd.choice(forms) for _ in range(rnd.randint(3, 14))).capitalize() for _ in range(count)]
+    return titles, len(forms)
+
+
+def run(cache_path, titles_path):
+    result = subprocess.run(
+        [sys.executable, "-c", CHILD.format(titles_path=titles_path)],
+        cwd=BOT_DIR, capture_output=True, text=True,
+        env=dict(os.environ, LEMMA_CACHE_PATH=cache_path),
+    )
+    if result.returncode != 0:
+        raise SystemExit(result.stderr[-2000:])
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--titles", type=int, default=5000)
+    args = parser.parse_args()
+
+    titles, forms = make_vocabulary_titles(args.titles)
+    print(f"Заголовков: {len(titles)}, разных словоформ: {forms}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        titles_path = os.path.join(tmp, "titles.json")
+        with open(titles_path, "w", encoding="utf-8") as f:
+            json.dump(titles, f, ensure_ascii=False)
+        cache_path = os.path.join(tmp, "lemmas.sqlite")
+        cold = run(cache_path, titles_path)
+        warm = run(cache_path, titles_path)
+        size = os.path.getsize(cache_path)
+
+    for name, result in (("Пустой кэш", cold), ("Прогретый кэш", warm)):
+        print(f"{name:<16} {result['elapsed']:>7.3f} с  pymorphy3 загружен: "
+              f"{'да' if result['pymorphy_loaded'] else 'нет'}  оценки: {result['digest']}")
+    print(f"Размер файла кэша: {size / 1024:.0f} КБ")
+
+    assert cold["digest"] == warm["digest"], "оценки с кэшем и без него различаются"
+    assert not warm["pymorphy_loaded"], "на прогретом кэше pymorphy3 не должен загружаться"
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
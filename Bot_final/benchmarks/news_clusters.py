@@ -0,0 +1,193 @@
+"""Бенчмарк кластеризации почти одинаковых заголовков (rector/news_clusters.py)
+
+Генерируются истории: исходный заголовок и его перепечатки в других изданиях (выброшено или
+добавлено слово, другой порядок слов, префикс издания). Сравниваются:
+  lsh    — ClusterIndex: MinHash + LSH-корзины, сравнение только с кандидатами;
+  exact  — точное сходство Жаккара множеств лемм с первым заголовком каждой истории (O(n²)).
+Печатается время, доля перепечаток, попавших в свою историю, и число ошибочных слияний.
+
+С --db дополнительно проверяется сохранение индекса между обходами: последняя четверть
+заголовков (только перепечатки) сохраняется отдельным вызовом assign_clusters и должна
+найти свои истории в индексе, записанном первым вызовом (изменения в БД откатываются).
+
+Запуск из каталога Bot_final:
+    python benchmarks/news_clusters.py --stories 2000 --copies 4
+    python benchmarks/news_clusters.py --stories 500 --db
+"""
+import argparse
+import os
+import random
+import sys
+import time
+import uuid
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from rector.morphology import get_morph_analyzer, lemmas
+from rector.news_clusters import SIMILARITY_THRESHOLD, ClusterIndex, MinHasher
+
+OUTLETS = ("НГС", "Тайга.инфо", "РИА Новосибирск", "Академгородок", "Сиб.фм", "Континент Сибирь")
+# Части речи и пометки словаря pymorphy3, из которых собирается словарь заголовков
+WORD_POS = {'NOUN', 'VERB', 'ADJF'}
+SKIP_GRAMMEMES = {'Name', 'Surn', 'Patr', 'Geox', 'Orgn', 'Abbr', 'Init'}
+
+
+def vocabulary(per_prefix=150):
+    """Несколько тысяч нарицательных лемм из словаря pymorphy3 (по per_prefix на двухбуквенный префикс)"""
+    morph = get_morph_analyzer()
+    words = set()
+    for first in "абвгдежзиклмнопрстуфхцчш":
+        for second in "аеиоу":
+            found = set()
+            for parse in morph.iter_known_word_parses(first + second):
+                if (parse.tag.POS in WORD_POS and not SKIP_GRAMMEMES & parse.tag.grammemes
+                        and parse.normal_form.isalpha() and len(parse.normal_form) > 3):
+                    found.add(parse.normal_form)
+                    if len(found) >= per_prefix:
+                        break
+            words |= found
+    return sorted(words)
+
+
+def make_stories(stories, copies, seed=7):
+    """[(номер истории, заголовок)]: сначала исходные заголовки, затем перепечатки вперемешку.
+    Во всех заголовках есть «НГТУ», как в реальной выдаче по запросам об университете"""
+    rnd = random.Random(seed)
+    forms = vocabulary()
+    bases = [["НГТУ"] + rnd.sample(forms, rnd.randint(5, 10)) for _ in range(stories)]
+
+    items = [(story, " ".join(words).capitalize()) for story, words in enumerate(bases)]
+    reprints = []
+    for story, words in enumerate(bases):
+        for _ in range(copies):
+            variant = list(words)
+            op = rnd.random()
+            if op < 0.3:
+                variant.pop(rnd.randrange(1, len(variant)))
+            elif op < 0.6:
+                variant.insert(rnd.randrange(len(variant) + 1), rnd.choice(forms))
+            else:
+                rnd.shuffle(variant)
+            title = " ".join(variant).capitalize()
+            if rnd.random() < 0.5:
+                title = f"{rnd.choice(OUTLETS)}: {title}"
+            reprints.append((story, title))
+    rnd.shuffle(reprints)
+    return items + reprints
+
+
+def lsh_clusters(items, hasher):
+    index = ClusterIndex()
+    result = []
+    for news_id, (_, title) in enumerate(items, 1):
+        signature = hasher.signature(title)
+        keys = hasher.band_keys(signature) if signature is not None else []
+        result.append(index.assign(news_id, signature, keys)[0])
+    return result
+
+
+def exact_clusters(items):
+    """Точный вариант: сходство Жаккара с первым заголовком каждой уже найденной истории"""
+    representatives = []
+    result = []
+    for news_id, (_, title) in enumerate(items, 1):
+        tokens = set(lemmas(title))
+        best, best_score = None, SIMILARITY_THRESHOLD
+        for cluster_id, rep_tokens in representatives:
+            score = len(tokens & rep_tokens) / len(tokens | rep_tokens) if tokens else 0
+            if score > best_score or (best is None and score == best_score):
+                best, best_score = cluster_id, score
+        if best is None:
+            best = news_id
+            if tokens:
+                representatives.append((news_id, tokens))
+        result.append(best)
+    return result
+
+
+def quality(items, clusters):
+    """(доля перепечаток в кластере своей истории, кластеров с заголовками разных историй)"""
+    story_cluster = {}
+    joined = reprints = 0
+    members = {}
+    for (story, _), cluster_id in zip(items, clusters):
+        members.setdefault(cluster_id, set()).add(story)
+        if story in story_cluster:
+            reprints += 1
+            joined += story_cluster[story] == cluster_id
+        else:
+            story_cluster[story] = cluster_id
+    mixed = sum(1 for stories in members.values() if len(stories) > 1)
+    return joined / max(reprints, 1), mixed
+
+
+def check_db(items):
+    """Сохранение индекса между обходами: две пачки, вторая находит истории первой"""
+    from DATABASE.database import EducationDB
+    from rector.news_clusters import assign_clusters
+    from rector.parser import insert_news
+
+    half = len(items) // 2 + len(items) // 4
+    batch = uuid.uuid4().hex[:8]
+    news_list = [{'title': title, 'link': f"https://bench.example/clusters/{batch}/{i}", 'source': "bench"}
+                 for i, (_, title) in enumerate(items)]
+    with EducationDB() as db:
+        conn = db.conn
+        try:
+            first = insert_news(conn, news_list[:half])
+            started = time.perf_counter()
+            assign_clusters(conn, [(news_id, news_list[i]['title']) for i, (news_id, _) in enumerate(first)])
+            first_time = time.perf_counter() - started
+
+            second = insert_news(conn, news_list[half:])
+            started = time.perf_counter()
+            second_clusters = assign_clusters(
+                conn, [(news_id, news_list[half + i]['title']) for i, (news_id, _) in enumerate(second)])
+            second_time = time.perf_counter() - started
+
+            first_ids = {news_id for news_id, _ in first}
+            story_of = {news_id: items[i][0] for i, (news_id, _) in enumerate(first)}
+            found = sum(1 for i, (news_id, _) in enumerate(second)
+                        if second_clusters[news_id] in first_ids
+                        and story_of[second_clusters[news_id]] == items[half + i][0])
+        finally:
+            conn.rollback()
+    print(f"БД: первая пачка {half} заг. {first_time:.2f} с, вторая {len(items) - half} заг. {second_time:.2f} с; "
+          f"во второй найдено историй первой пачки: {found}")
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--stories", type=int, default=2000)
+    parser.add_argument("--copies", type=int, default=4, help="перепечаток каждой истории")
+    parser.add_argument("--db", action="store_true", help="проверить индекс в БД между двумя пачками")
+    args = parser.parse_args()
+
+    items = make_stories(args.stories, args.copies)
+    hasher = MinHasher()
+    # Прогрев кэша лемм, чтобы сравнивать только кластеризацию
+    for _, title in items:
+        lemmas(title)
+    print(f"Заголовков: {len(items)}, историй: {args.stories}")
+
+    started = time.perf_counter()
+    lsh = lsh_clusters(items, hasher)
+    lsh_time = time.perf_counter() - started
+    started = time.perf_counter()
+    exact = exact_clusters(items)
+    exact_time = time.perf_counter() - started
+
+    for name, clusters, elapsed in (("lsh", lsh, lsh_time), ("exact", exact, exact_time)):
+        joined, mixed = quality(items, clusters)
+        print(f"{name:<6} {elapsed:>7.2f} с  {len(items) / elapsed:>8.0f} заг/с  историй: {len(set(clusters)):>6}  "
+              f"перепечаток в своей истории: {joined:.1%}  ошибочных слияний: {mixed}")
+    agreement = sum(a == b for a, b in zip(lsh, exact)) / len(items)
+    print(f"Совпадение lsh с exact: {agreement:.1%}")
+
+    if args.db:
+        check_db(items)
+
+
+if __name__ == "__main__":
+    main()
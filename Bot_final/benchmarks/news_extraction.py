@@ -0,0 +1,132 @@
+"""Офлайн-бенчмарк разбора выдачи новостей: прежний обход пяти селекторов BeautifulSoup
+против однопроходного rector.parser.extract_news_cards (lxml) с дедупликацией до тональности
+
+Страницы берутся из каталога --pages (сохраняются парсером при заданном NEWS_PAGES_DIR),
+иначе генерируются страницы с той же вложенностью карточек, что у Google (MjjYud > SoaBEf > WlydOe).
+
+Запуск из каталога Bot_final:
+    python benchmarks/news_extraction.py --cards 100 --count 20
+    python benchmarks/news_extraction.py --pages /path/to/saved/pages
+"""
+import argparse
+import glob
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from rector.parser import SentimentAnalyzer, extract_news_cards, format_date
+
+TITLES = (
+    "НГТУ вошел в рейтинг лучших технических вузов страны",
+    "Студенты НГТУ победили в международной олимпиаде по программированию",
+    "В университете открылась новая лаборатория робототехники",
+    "Проблемы с общежитием обсудили на заседании ученого совета",
+    "Ректор рассказал о развитии кампуса и инвестициях в науку",
+)
+DATES = ("3 часа назад", "вчера", "2 дня назад", "12 мар. 2024 г.")
+
+
+def generate_page(cards):
+    """Страница выдачи с cards новостями: каждая карточка вложена в три «карточных» блока"""
+    items = []
+    for i in range(cards):
+        items.append(f"""
+<div class="MjjYud"><div class="SoaBEf"><div class="g">
+  <a class="WlydOe" href="/url?q=https://news{i % 7}.example.ru/articles/{i}%3Futm_source%3Dgoogle&amp;sa=U">
+    <div class="MgUUmf NUnG9d"><span>news{i % 7}.example.ru</span></div>
+    <div class="n0jPhd ynAwRc">{TITLES[i % len(TITLES)]} ({i})</div>
+    <div class="GI74Re">Краткое описание новости номер {i} для проверки разбора.</div>
+    <div class="OSrXXb rbYSKb"><span>{DATES[i % len(DATES)]}</span></div>
+  </a>
+</div></div></div>""")
+    return f"""<!doctype html><html><head><meta charset="utf-8"><title>НГТУ новости</title>
+<script>var x = 1;</script><style>.a{{color:red}}</style></head>
+<body><div id="search"><div id="rso">{''.join(items)}</div></div></body></html>"""
+
+
+def legacy_extract(page, analyzer):
+    """Прежний разбор: каждый селектор по очереди, тональность для каждого совпадения"""
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(page, 'html.parser')
+    news_results = []
+    for selector in ['div.SoaBEf', 'div.MjjYud', 'div.g', 'div.VwiC3b', 'a.WlydOe']:
+        for element in soup.select(selector):
+            title_elem = element.select_one('h3, .n0jPhd, .ynAwRc, .mCBkyc, .JtKRv')
+            link_elem = element.select_one('a')
+            source_elem = element.select_one('.MgUUmf, .NUnG9d, .OSrXXb, .CEMjEf')
+            date_elem = element.select_one('.OSrXXb, .r0jCaf, .hFTDmf')
+            if title_elem and link_elem:
+                title = title_elem.get_text().strip()
+                link = link_elem.get('href')
+                if link and '/url?q=' in link:
+                    link = link.split('/url?q=')[1].split('&')[0]
+                sentiment, score = analyzer.analyze_sentiment(title)
+                if title and link and 'http' in link:
+                    news_results.append({
+                        'title': title,
+                        'link': link,
+                        'source': source_elem.get_text().strip() if source_elem else "Неизвестный источник",
+                        'date_text': format_date(date_elem.get_text().strip() if date_elem else ""),
+                        'sentiment': sentiment,
+                        'sentiment_score': round(score, 3),
+                    })
+    return news_results
+
+
+def current_extract(page, analyzer):
+    """Разбор как в search_google_news_alternative"""
+    news_results = []
+    for card in extract_news_cards(page):
+        sentiment, score = analyzer.analyze_sentiment(card['title'])
+        news_results.append(dict(card, date_text=format_date(card['date_text']),
+                                 sentiment=sentiment, sentiment_score=round(score, 3)))
+    return news_results
+
+
+def measure(name, extract, pages, analyzer):
+    started = time.perf_counter()
+    results = [extract(page, analyzer) for page in pages]
+    elapsed = time.perf_counter() - started
+    found = sum(len(result) for result in results)
+    unique = sum(len({news['link'] for news in result}) for result in results)
+    print(f"{name:<8} {elapsed:>8.3f} с  {len(pages) / elapsed:>8.1f} стр/с  "
+          f"новостей: {found:>6}  уникальных ссылок: {unique:>6}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", help="каталог с сохраненными страницами *.html")
+    parser.add_argument("--cards", type=int, default=100, help="новостей на сгенерированной странице")
+    parser.add_argument("--count", type=int, default=20, help="сколько страниц сгенерировать")
+    args = parser.parse_args()
+
+    if args.pages:
+        pages = []
+        for path in sorted(glob.glob(os.path.join(args.pages, "*.html"))):
+            with open(path, encoding="utf-8") as f:
+                pages.append(f.read())
+        if not pages:
+            raise SystemExit(f"В {args.pages} нет страниц *.html")
+    else:
+        pages = [generate_page(args.cards) for _ in range(args.count)]
+
+    analyzer = SentimentAnalyzer()
+    # Прогрев: загрузка словарей pymorphy3 не должна попасть в замер
+    analyzer.analyze_sentiment(TITLES[0])
+    print(f"Страниц: {len(pages)}, {sum(map(len, pages)) / len(pages) / 1024:.0f} КБ в среднем")
+
+    try:
+        import bs4  # noqa: F401
+        measure("legacy", legacy_extract, pages, analyzer)
+    except ImportError:
+        print("legacy   пропущен: beautifulsoup4 не установлен")
+    measure("lxml", current_extract, pages, analyzer)
+    # Только разбор, без тональности и дат
+    measure("parse", lambda page, _: list(extract_news_cards(page)), pages, analyzer)
+
+
+if __name__ == "__main__":
+    main()
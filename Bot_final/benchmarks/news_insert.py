@@ -0,0 +1,94 @@
+"""Бенчмарк сохранения новостей: INSERT на каждую новость против пакетных вариантов
+
+Сравниваются:
+  loop    — cur.execute на каждую новость (прежний save_news_to_db)
+  values  — многострочный INSERT ... RETURNING (rector.parser.insert_news_values)
+  copy    — COPY во временную таблицу и INSERT ... SELECT из нее (rector.parser.insert_news_copy)
+
+Каждый вариант прогоняется дважды: на новых ссылках и на тех же ссылках повторно (все конфликты).
+Все изменения откатываются.
+
+Запуск из каталога Bot_final (БД должна быть создана):
+    python benchmarks/news_insert.py --items 10000 --repeat 3
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+import uuid
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from rector.parser import NEWS_COLUMNS, insert_news_copy, insert_news_values
+
+
+def make_news(count):
+    batch = uuid.uuid4().hex[:8]
+    return [{
+        'title': f"НГТУ открыл новую лабораторию №{i}",
+        'link': f"https://example.com/news/{batch}/{i}",
+        'source': "example.com",
+        'date_text': "04.03.2024",
+        'published_at': date(2024, 3, 4) - timedelta(days=i % 90),
+        'sentiment': "Положительный",
+        'sentiment_score': 0.425,
+    } for i in range(count)]
+
+
+def insert_loop(conn, news_list):
+    inserted = []
+    with conn.cursor() as cur:
+        for news in news_list:
+            cur.execute(f"""
+                INSERT INTO news ({', '.join(NEWS_COLUMNS)})
+                VALUES ({', '.join(['%s'] * len(NEWS_COLUMNS))})
+                ON CONFLICT (link) DO NOTHING
+                RETURNING news_id, link
+            """, tuple(news[column] for column in NEWS_COLUMNS))
+            inserted.extend(cur.fetchall())
+    return inserted
+
+
+METHODS = {
+    "loop": insert_loop,
+    "values": insert_news_values,
+    "copy": insert_news_copy,
+}
+
+
+def measure(conn, method, items):
+    news_list = make_news(items)
+    try:
+        started = time.perf_counter()
+        fresh = method(conn, news_list)
+        first = time.perf_counter() - started
+
+        started = time.perf_counter()
+        repeated = method(conn, news_list)
+        second = time.perf_counter() - started
+    finally:
+        conn.rollback()
+    assert len(fresh) == items and not repeated, (len(fresh), len(repeated))
+    return first, second
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--items", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    from DATABASE.database import EducationDB
+    with EducationDB() as db:
+        print(f"{'Способ':<8} {'новые, с':>10} {'повтор, с':>10} {'новостей/с':>12}")
+        for name, method in METHODS.items():
+            runs = [measure(db.conn, method, args.items) for _ in range(args.repeat)]
+            first = statistics.median(run[0] for run in runs)
+            second = statistics.median(run[1] for run in runs)
+            print(f"{name:<8} {first:>10.3f} {second:>10.3f} {args.items / first:>12.0f}")
+
+
+if __name__ == "__main__":
+    main()
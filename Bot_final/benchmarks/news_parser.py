@@ -0,0 +1,208 @@
+"""Офлайн-бенчмарк и проверка стабильности rector/parser.py на сохраненных фикстурах
+
+Фикстуры в benchmarks/fixtures:
+  news_pages/*.html      — страницы выдачи: edge_cases.html собрана вручную (редиректы, utm,
+                           дубли, карточки без заголовка, разные классы полей), small/medium/large
+                           сгенерированы news_extraction.generate_page на 10/100/600 новостей;
+  news_pages/expected.json — ожидаемые карточки с тональностью для каждой страницы;
+  format_date.json       — даты выдачи и ожидаемый результат (относительные — через days_ago);
+  sentiment.json         — заголовки с ожидаемыми тональностью и оценкой.
+
+Любое расхождение с фикстурами — ошибка. Если поведение изменено намеренно (новый словарь,
+другой разбор), ожидаемые значения перезаписываются флагом --update, а дифф фикстур
+проверяется на ревью. Сюда же можно положить реальные страницы, сохраненные парсером
+(NEWS_PAGES_DIR), и выполнить --update.
+
+Память на страницу — пик аллокаций Python (tracemalloc) при разборе; дерево libxml2
+в него не входит, поэтому отдельно печатается пиковый RSS процесса.
+
+Запуск из каталога Bot_final:
+    python benchmarks/news_parser.py
+    python benchmarks/news_parser.py --repeat 20
+    python benchmarks/news_parser.py --update
+"""
+import argparse
+import glob
+import hashlib
+import json
+import os
+import resource
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from rector.parser import SentimentAnalyzer, extract_news_cards, format_date
+from rector.sentiment_batch import BatchSentimentScorer
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+PAGES_DIR = os.path.join(FIXTURES_DIR, "news_pages")
+PAGES_EXPECTED = os.path.join(PAGES_DIR, "expected.json")
+DATES_FIXTURE = os.path.join(FIXTURES_DIR, "format_date.json")
+SENTIMENT_FIXTURE = os.path.join(FIXTURES_DIR, "sentiment.json")
+
+# Страницы с большим числом карточек хранятся в expected.json как число карточек и хеш,
+# а не целиком
+FULL_CARDS_LIMIT = 20
+
+
+def load_json(path):
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_json(path, data):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+        f.write("\n")
+
+
+def load_pages():
+    pages = {}
+    for path in sorted(glob.glob(os.path.join(PAGES_DIR, "*.html"))):
+        with open(path, encoding="utf-8") as f:
+            pages[os.path.splitext(os.path.basename(path))[0]] = f.read()
+    if not pages:
+        raise SystemExit(f"В {PAGES_DIR} нет страниц *.html")
+    return pages
+
+
+def page_result(page, analyzer):
+    """Карточки страницы с тональностью (дата — как в выдаче, ее разбор проверяется отдельно)"""
+    cards = []
+    for card in extract_news_cards(page):
+        sentiment, score = analyzer.analyze_sentiment(card['title'])
+        cards.append(dict(card, sentiment=sentiment, sentiment_score=score))
+    return cards
+
+
+def page_summary(cards):
+    """Запись expected.json для страницы"""
+    digest = hashlib.sha1(json.dumps(cards, ensure_ascii=False, sort_keys=True).encode()).hexdigest()
+    if len(cards) <= FULL_CARDS_LIMIT:
+        return {"count": len(cards), "sha1": digest, "cards": cards}
+    return {"count": len(cards), "sha1": digest, "first": cards[:3]}
+
+
+def expected_date(case):
+    if "days_ago" in case:
+        return (datetime.now() - timedelta(days=case["days_ago"])).strftime("%d.%m.%Y")
+    return case["expected"]
+
+
+def check_pages(pages, analyzer, expected):
+    errors = []
+    for name, page in pages.items():
+        actual = page_summary(page_result(page, analyzer))
+        if name not in expected:
+            errors.append(f"{name}.html: нет ожидаемого результата, выполните --update")
+        elif actual != expected[name]:
+            want = expected[name]
+            errors.append(f"{name}.html: карточек {actual['count']} (ожидалось {want['count']}), "
+                          f"sha1 {actual['sha1'][:12]} (ожидалось {want['sha1'][:12]})")
+    return errors
+
+
+def check_dates(cases):
+    errors = []
+    for case in cases:
+        actual = format_date(case["text"])
+        if actual != expected_date(case):
+            errors.append(f"format_date({case['text']!r}) = {actual!r}, ожидалось {expected_date(case)!r}")
+    return errors
+
+
+def check_sentiment(cases, analyzer, scorer):
+    errors = []
+    titles = [case["title"] for case in cases]
+    batch = scorer.analyze(titles)
+    for case, single, batched in zip(cases, (analyzer.analyze_sentiment(t) for t in titles), batch):
+        expected = (case.get("sentiment"), case.get("score"))
+        if single != expected:
+            errors.append(f"analyze_sentiment({case['title']!r}) = {single}, ожидалось {expected}")
+        if batched != single:
+            errors.append(f"BatchSentimentScorer({case['title']!r}) = {batched}, "
+                          f"а analyze_sentiment дает {single}")
+    return errors
+
+
+def update(pages, analyzer):
+    save_json(PAGES_EXPECTED, {name: page_summary(page_result(page, analyzer)) for name, page in pages.items()})
+    cases = load_json(SENTIMENT_FIXTURE)
+    for case in cases:
+        case["sentiment"], case["score"] = analyzer.analyze_sentiment(case["title"])
+    save_json(SENTIMENT_FIXTURE, cases)
+    print(f"Обновлены {os.path.relpath(PAGES_EXPECTED)} и {os.path.relpath(SENTIMENT_FIXTURE)}")
+
+
+def timed(func, repeat):
+    """Лучшее время из repeat запусков"""
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def peak_python_memory(func):
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def benchmark(pages, analyzer, date_cases, repeat):
+    print(f"{'страница':<12} {'КБ':>6} {'карточек':>9} {'стр/с':>9} {'карт/с':>9} {'пик Python, КБ':>15}")
+    for name, page in pages.items():
+        elapsed, cards = timed(lambda: list(extract_news_cards(page)), repeat)
+        memory = peak_python_memory(lambda: list(extract_news_cards(page)))
+        print(f"{name:<12} {len(page) / 1024:>6.0f} {len(cards):>9} {1 / elapsed:>9.1f} "
+              f"{len(cards) / elapsed:>9.0f} {memory / 1024:>15.0f}")
+
+    titles = [card['title'] for page in pages.values() for card in extract_news_cards(page)]
+    elapsed, _ = timed(lambda: [analyzer.analyze_sentiment(title) for title in titles], repeat)
+    print(f"\nТональность по одному:  {len(titles) / elapsed:>9.0f} заг/с ({len(titles)} заголовков)")
+    scorer = BatchSentimentScorer(analyzer)
+    elapsed, _ = timed(lambda: scorer.analyze(titles), repeat)
+    print(f"Тональность пакетно:    {len(titles) / elapsed:>9.0f} заг/с")
+
+    texts = [case["text"] for case in date_cases] * 100
+    elapsed, _ = timed(lambda: [format_date(text) for text in texts], repeat)
+    print(f"format_date:            {len(texts) / elapsed:>9.0f} дат/с")
+
+    # ru_maxrss в Linux — в килобайтах
+    print(f"Пиковый RSS процесса:   {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:>9.1f} МБ")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5, help="запусков каждого замера (берется лучший)")
+    parser.add_argument("--update", action="store_true", help="перезаписать ожидаемые результаты")
+    args = parser.parse_args()
+
+    pages = load_pages()
+    analyzer = SentimentAnalyzer()
+    if args.update:
+        update(pages, analyzer)
+        return
+
+    date_cases = load_json(DATES_FIXTURE)
+    errors = (check_pages(pages, analyzer, load_json(PAGES_EXPECTED))
+              + check_dates(date_cases)
+              + check_sentiment(load_json(SENTIMENT_FIXTURE), analyzer, BatchSentimentScorer(analyzer)))
+    if errors:
+        print("\n".join(errors))
+        raise SystemExit(f"Расхождений с фикстурами: {len(errors)}")
+
+    benchmark(pages, analyzer, date_cases, args.repeat)
+    print("OK: результаты совпадают с фикстурами")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+"""Микробенчмарк: обычные запросы против подготовленных (PREPARE/EXECUTE) под нагрузкой
+
+С --check-retry вместо замера проверяется восстановление после потери запросов сервером
+(DEALLOCATE ALL, как после DISCARD ALL или смены соединения в пулере): в начале транзакции
+execute_prepared готовит запрос заново и повторяет, внутри транзакции — отдает ошибку,
+а после отката следующий вызов снова работает.
+
+Запуск из каталога Bot_final (БД должна быть создана и заполнена):
+    python benchmarks/prepared_statements.py --threads 8 --calls 2000
+    python benchmarks/prepared_statements.py --check-retry
+"""
+import argparse
+import os
+import re
+import statistics
+import sys
+import threading
+import time
+
+import psycopg2
+import psycopg2.errors
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from DATABASE.prepared_statements import PREPARED_STATEMENTS, execute_prepared
+
+# Параметры для каждого запроса реестра (данные из insert_*.sql)
+BENCH_PARAMS = {
+    "authenticate_user": ("kozlov_a", "12345"),
+    "get_unread_notifications": (4,),
+    "get_student_group": (4,),
+    "get_group_schedule": (1, "odd"),
+    "get_teacher_schedule": (6, "even"),
+    "search_books": ("%ма%",),
+    "get_book_by_id": (1,),
+}
+
+
+def connect():
+    return psycopg2.connect(
+        host=os.getenv("DATABASE_HOST", "postgres"),
+        database=os.getenv("DATABASE_NAME", "education_system"),
+        user=os.getenv("DATABASE_USER", "postgres"),
+        password=os.getenv("DATABASE_PASSWORD", "12345"),
+        port=os.getenv("DATABASE_PORT", "5432"),
+    )
+
+
+def to_plain_sql(sql):
+    """$1, $2 ... -> %(p1)s, %(p2)s ... для обычного execute"""
+    return re.sub(r"\$(\d+)", r"%(p\1)s", sql)
+
+
+def plain_call(cur, name, params):
+    cur.execute(to_plain_sql(PREPARED_STATEMENTS[name]),
+                {f"p{i}": value for i, value in enumerate(params, 1)})
+    cur.fetchall()
+
+
+def prepared_call(cur, name, params):
+    execute_prepared(cur, name, params)
+    cur.fetchall()
+
+
+def worker(call, calls, latencies, barrier):
+    conn = connect()
+    conn.autocommit = True
+    names = list(BENCH_PARAMS)
+    local = []
+    with conn.cursor() as cur:
+        # Прогрев: на каждом соединении запросы готовятся один раз
+        for name in names:
+            call(cur, name, BENCH_PARAMS[name])
+        barrier.wait()
+        for i in range(calls):
+            name = names[i % len(names)]
+            started = time.perf_counter()
+            call(cur, name, BENCH_PARAMS[name])
+            local.append(time.perf_counter() - started)
+    conn.close()
+    latencies.extend(local)
+
+
+def run(call, threads, calls):
+    latencies = []
+    barrier = threading.Barrier(threads)
+    pool = [threading.Thread(target=worker, args=(call, calls, latencies, barrier)) for _ in range(threads)]
+    started = time.perf_counter()
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    return latencies, elapsed
+
+
+def report(title, latencies, elapsed):
+    latencies = sorted(latencies)
+    p95 = latencies[int(len(latencies) * 0.95) - 1]
+    print(f"{title:14s} вызовов: {len(latencies):6d} | среднее: {statistics.mean(latencies) * 1e6:8.1f} мкс"
+          f" | p50: {statistics.median(latencies) * 1e6:8.1f} мкс | p95: {p95 * 1e6:8.1f} мкс"
+          f" | {len(latencies) / elapsed:8.0f} запросов/с")
+    return statistics.mean(latencies)
+
+
+def check_retry():
+    """Проверить повтор execute_prepared после потери подготовленных запросов сервером"""
+    conn = connect()
+    name = "get_book_by_id"
+    with conn.cursor() as cur:
+        execute_prepared(cur, name, BENCH_PARAMS[name])
+        cur.execute("DEALLOCATE ALL")
+        conn.commit()
+
+        # Начало транзакции: запрос готовится заново, вызывающий ошибки не видит
+        execute_prepared(cur, name, BENCH_PARAMS[name])
+        if cur.fetchone() is None:
+            raise SystemExit("повтор в начале транзакции не вернул строку")
+        conn.commit()
+        print("начало транзакции: запрос подготовлен заново и выполнен")
+
+        # Внутри транзакции откатывать нельзя — ошибка вызывающему, откат на его стороне
+        cur.execute("DEALLOCATE ALL")
+        cur.execute("SELECT 1")
+        try:
+            execute_prepared(cur, name, BENCH_PARAMS[name])
+        except psycopg2.errors.InvalidSqlStatementName:
+            conn.rollback()
+            print("внутри транзакции: InvalidSqlStatementName передан вызывающему")
+        else:
+            raise SystemExit("внутри транзакции ошибка не передана вызывающему")
+
+        execute_prepared(cur, name, BENCH_PARAMS[name])
+        if cur.fetchone() is None:
+            raise SystemExit("после отката запрос не выполнен")
+        conn.commit()
+        print("после отката: запрос подготовлен заново и выполнен")
+    conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--threads", type=int, default=8, help="параллельных соединений")
+    parser.add_argument("--calls", type=int, default=2000, help="вызовов на соединение")
+    parser.add_argument("--check-retry", action="store_true",
+                        help="проверить повтор после потери подготовленных запросов вместо замера")
+    args = parser.parse_args()
+
+    if args.check_retry:
+        check_retry()
+        return
+
+    print(f"Соединений: {args.threads}, вызовов на соединение: {args.calls}\n")
+    plain = report("обычные", *run(plain_call, args.threads, args.calls))
+    prepared = report("подготовленные", *run(prepared_call, args.threads, args.calls))
+    print(f"\nСнижение средней задержки вызова: {(1 - prepared / plain) * 100:.1f}%")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""Проверка бюджетов запросов (DATABASE/query_budget.py) на маршрутах без авторизации
+
+Каждая кнопка нажимается дважды (холодный и прогретый кэш) через dispatch_callback
+с assert_query_budget: превышение бюджета маршрута — QueryBudgetExceeded и код выхода 1.
+Ответы бота не отправляются, а сохраняются в объекте обновления.
+
+Запуск из каталога Bot_final (БД должна быть создана и заполнена):
+    python benchmarks/query_budgets.py
+    python benchmarks/query_budgets.py programs faculty_2 program_5
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+DEFAULT_PAYLOADS = ("programs", "faculty_1", "program_1", "can_program", "open_days", "back_to_menu")
+# chat_id, под которым нет сессии: маршруты проверяются как для неавторизованного пользователя
+CHAT_ID = -1
+
+
+class CallbackUpdate:
+    """Нажатие кнопки: интерфейс maxgram Context, ответы складываются в replies"""
+
+    def __init__(self, payload):
+        self.payload = payload
+        self.callback_id = "budget-check"
+        self.chat_id = CHAT_ID
+        self.message = {'recipient': {'chat_id': CHAT_ID}, 'sender': {'user_id': CHAT_ID}, 'body': {}}
+        self.replies = []
+
+    def reply(self, text, attachments=None, keyboard=None):
+        self.replies.append(text)
+        return {}
+
+    def reply_callback(self, text, attachments=None, keyboard=None, **kwargs):
+        self.replies.append(text)
+        return {}
+
+    def answer_callback(self, *args, **kwargs):
+        return {}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("payloads", nargs="*", default=DEFAULT_PAYLOADS, help="payload кнопок")
+    args = parser.parse_args()
+
+    import main as bot_main
+    from config import db
+    from DATABASE.query_budget import QUERY_BUDGETS, QueryBudgetExceeded, assert_query_budget, route_for_payload
+
+    # Подключение (проверка схемы, PREPARE) — не часть нажатия
+    db.get()
+
+    failed = 0
+    for payload in args.payloads:
+        route = route_for_payload(payload)
+        for attempt in ("холодный", "прогретый"):
+            try:
+                _, count = assert_query_budget(route, bot_main.dispatch_callback, CallbackUpdate(payload))
+            except QueryBudgetExceeded as e:
+                failed += 1
+                print(f"{payload:<24} {attempt:<10} ПРЕВЫШЕН: {e}")
+                continue
+            print(f"{payload:<24} {attempt:<10} запросов: {count} из {QUERY_BUDGETS.get(route, '—')}")
+
+    if failed:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""Бенчмарк тональности: SentimentAnalyzer.analyze_sentiment по заголовку против
+rector.sentiment_batch.BatchSentimentScorer, с проверкой точного совпадения оценок
+
+Заголовки собираются из словаря тональности, усилителей и обычных слов в разных формах.
+
+Запуск из каталога Bot_final:
+    python benchmarks/sentiment_batch.py --titles 20000
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from rector.parser import SentimentAnalyzer
+from rector.sentiment_batch import BatchSentimentScorer
+
+FILLER = (
+    "университет", "студентов", "НГТУ", "НЭТИ", "в", "на", "для", "новосибирске", "прошла",
+    "конференция", "лаборатории", "ректор", "объявил", "о", "кафедры", "года", "олимпиаде",
+    "проекта", "совета", "робототехники", "2024", "IT", "и", "с", "победы", "успехи",
+    "проблемами", "кризиса", "лучшие", "новых", "очень", "крайне", "слегка", "почти",
+)
+
+
+def make_titles(count, analyzer, seed=7):
+    rnd = random.Random(seed)
+    lexicon = list(analyzer.positive_words) + list(analyzer.negative_words)
+    modifiers = list(analyzer.intensifiers) + list(analyzer.diminishers)
+    titles = ["", "2024 IT", "!!!"]
+    while len(titles) < count:
+        words = []
+        for _ in range(rnd.randint(3, 14)):
+            roll = rnd.random()
+            if roll < 0.2:
+                words.append(rnd.choice(lexicon))
+            elif roll < 0.3:
+                words.append(rnd.choice(modifiers))
+            else:
+                words.append(rnd.choice(FILLER))
+        title = " ".join(words)
+        titles.append(title.capitalize() + rnd.choice(("", ".", "!", ": итоги")))
+    return titles[:count]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--titles", type=int, default=20000)
+    args = parser.parse_args()
+
+    analyzer = SentimentAnalyzer()
+    titles = make_titles(args.titles, analyzer)
+    # Прогрев словарей pymorphy3
+    analyzer.analyze_sentiment(titles[3])
+
+    started = time.perf_counter()
+    expected = [analyzer.analyze_sentiment(title) for title in titles]
+    loop_time = time.perf_counter() - started
+
+    scorer = BatchSentimentScorer(analyzer)
+    started = time.perf_counter()
+    cold = scorer.analyze(titles)
+    cold_time = time.perf_counter() - started
+
+    started = time.perf_counter()
+    warm = scorer.analyze(titles)
+    warm_time = time.perf_counter() - started
+
+    mismatches = [(title, e, c) for title, e, c in zip(titles, expected, cold) if e != c]
+    assert not mismatches, mismatches[:5]
+    assert warm == cold
+
+    print(f"Заголовков: {len(titles)}, словоформ в кэше: {len(scorer.word_ids)}")
+    print(f"По одному заголовку   {loop_time:>7.3f} с  {len(titles) / loop_time:>9.0f} заг/с")
+    print(f"Пакетно (холодный)    {cold_time:>7.3f} с  {len(titles) / cold_time:>9.0f} заг/с")
+    print(f"Пакетно (прогретый)   {warm_time:>7.3f} с  {len(titles) / warm_time:>9.0f} заг/с")
+    print("OK: оценки совпадают точно")
+
+
+if __name__ == "__main__":
+    main()
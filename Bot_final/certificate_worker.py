@@ -0,0 +1,324 @@
+"""Фоновая генерация электронных справок об обучении
+
+Бот только ставит заявку в очередь (study_certificate_requests.status = 'pending').
+Воркер забирает заявки пачками через FOR UPDATE SKIP LOCKED (несколько воркеров не возьмут
+одну заявку), рисует PDF в пуле процессов и одним UPDATE отмечает готовые, одним INSERT создает
+уведомления. Новые заявки будят воркер через LISTEN certificate_requests, иначе — опрос раз
+в POLL_INTERVAL секунд.
+
+Запуск из каталога Bot_final:
+    python certificate_worker.py
+"""
+import hashlib
+import hmac
+import logging
+import os
+import select
+import signal
+import sys
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+logger = logging.getLogger(__name__)
+
+# Процессов рендеринга и заявок, забираемых за один раз
+WORKERS = int(os.getenv("CERTIFICATE_WORKERS", str(os.cpu_count() or 2)))
+BATCH_SIZE = int(os.getenv("CERTIFICATE_BATCH_SIZE", str(WORKERS * 8)))
+
+# Куда класть PDF и как строить ссылку на скачивание. По умолчанию — в пользовательских
+# данных (XDG), а не в рабочем каталоге с кодом
+CERTIFICATES_DIR = os.getenv(
+    "CERTIFICATES_DIR",
+    os.path.join(os.getenv("XDG_DATA_HOME") or os.path.expanduser("~/.local/share"), "education_bot", "certificates"),
+)
+CERTIFICATES_BASE_URL = os.getenv("CERTIFICATES_BASE_URL", "https://example.com/certificates")
+
+# Ключ, которым подписывается код проверки справки. Обязателен: без него код можно подделать
+SIGNING_KEY = os.getenv("CERTIFICATE_SIGNING_KEY")
+
+# Шрифт с кириллицей (в образе — пакет fonts-dejavu-core)
+FONT_PATH = os.getenv("CERTIFICATE_FONT", "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf")
+
+POLL_INTERVAL = 5.0
+# Заявка в статусе rendering дольше этого времени считается брошенной (воркер упал)
+STALE_AFTER = 600
+MAX_ATTEMPTS = 3
+
+UNIVERSITY_NAME = "Новосибирский государственный технический университет"
+
+# Статичная часть справки: (x, y, размер шрифта, текст). Поля в {} подставляются из заявки
+TEMPLATE = (
+    (60, 780, 10, "Министерство науки и высшего образования Российской Федерации"),
+    (60, 764, 10, "Федеральное государственное бюджетное образовательное учреждение высшего образования"),
+    (60, 746, 12, f"«{UNIVERSITY_NAME}»"),
+    (230, 680, 18, "СПРАВКА № {request_id}"),
+    (60, 640, 12, "Выдана {full_name}"),
+    (60, 620, 12, "в том, что он(а) действительно обучается в {university_short}"),
+    (60, 600, 12, "по очной форме обучения, группа {group_name}, {faculty_name}."),
+    (60, 560, 12, "Справка выдана для предъявления по месту требования."),
+    (60, 500, 11, "Дата выдачи: {issued}"),
+    (60, 120, 9, "Документ подписан простой электронной подписью."),
+    (60, 106, 9, "Код проверки: {signature}"),
+)
+
+# Кэш процесса рендеринга: шрифт регистрируется и шаблон разбирается один раз на процесс
+_renderer = None
+
+
+def sign(request_id, user_id, issued):
+    """Код проверки справки: HMAC номера, студента и даты выдачи"""
+    message = f"{request_id}:{user_id}:{issued}".encode()
+    return hmac.new(SIGNING_KEY.encode(), message, hashlib.sha256).hexdigest()[:20].upper()
+
+
+def _init_renderer(font_path, out_dir):
+    """Инициализатор процесса пула: регистрация шрифта и разбор шаблона"""
+    global _renderer
+    from reportlab.pdfbase import pdfmetrics
+    from reportlab.pdfbase.ttfonts import TTFont
+
+    font_name = "Helvetica"
+    if os.path.exists(font_path):
+        pdfmetrics.registerFont(TTFont("CertificateFont", font_path))
+        font_name = "CertificateFont"
+    os.makedirs(out_dir, exist_ok=True)
+    _renderer = {
+        'font': font_name,
+        'out_dir': out_dir,
+        # Строки без подстановок рисуются как есть, с подстановками — форматируются
+        'lines': [(x, y, size, text, '{' in text) for x, y, size, text in TEMPLATE],
+    }
+
+
+def render_certificate(job):
+    """Нарисовать PDF справки (выполняется в процессе пула): (request_id, имя файла, код)"""
+    from reportlab.lib.pagesizes import A4
+    from reportlab.pdfgen import canvas
+
+    if _renderer is None:
+        _init_renderer(FONT_PATH, CERTIFICATES_DIR)
+
+    issued = job['issued'].strftime('%d.%m.%Y')
+    signature = sign(job['request_id'], job['user_id'], issued)
+    fields = {
+        'request_id': job['request_id'],
+        'full_name': job['full_name'],
+        'group_name': job['group_name'] or '—',
+        'faculty_name': job['faculty_name'] or '—',
+        'university_short': "НГТУ",
+        'issued': issued,
+        'signature': signature,
+    }
+
+    filename = f"{job['request_id']}_{signature[:8].lower()}.pdf"
+    pdf = canvas.Canvas(os.path.join(_renderer['out_dir'], filename), pagesize=A4, pageCompression=1)
+    pdf.setTitle(f"Справка об обучении № {job['request_id']}")
+    pdf.setAuthor(UNIVERSITY_NAME)
+    for x, y, size, text, has_fields in _renderer['lines']:
+        pdf.setFont(_renderer['font'], size)
+        pdf.drawString(x, y, text.format(**fields) if has_fields else text)
+    pdf.line(60, 730, 535, 730)
+    pdf.showPage()
+    pdf.save()
+    return job['request_id'], filename, signature
+
+
+def claim_jobs(conn, limit=BATCH_SIZE):
+    """Забрать до limit заявок (новые и брошенные другим воркером) с данными студента
+
+    Брошенная заявка, исчерпавшая MAX_ATTEMPTS попыток (например, ее рендеринг убивает
+    процесс), больше не забирается, а отмечается как failed.
+    """
+    from psycopg2.extras import RealDictCursor
+
+    try:
+        with conn.cursor(cursor_factory=RealDictCursor) as cur:
+            cur.execute("""
+                WITH exhausted AS (
+                    UPDATE study_certificate_requests
+                    SET status = 'failed', locked_at = NULL
+                    WHERE delivery_type = 'digital' AND status = 'rendering'
+                    AND locked_at < NOW() - make_interval(secs => %(stale)s)
+                    AND attempts >= %(max_attempts)s
+                ),
+                claimed AS (
+                    SELECT request_id FROM study_certificate_requests
+                    WHERE delivery_type = 'digital'
+                    AND (status = 'pending'
+                         OR (status = 'rendering' AND locked_at < NOW() - make_interval(secs => %(stale)s)
+                             AND attempts < %(max_attempts)s))
+                    ORDER BY request_id
+                    LIMIT %(limit)s
+                    FOR UPDATE SKIP LOCKED
+                )
+                UPDATE study_certificate_requests r
+                SET status = 'rendering', locked_at = NOW(), attempts = r.attempts + 1
+                FROM claimed
+                JOIN study_certificate_requests q ON q.request_id = claimed.request_id
+                LEFT JOIN users u ON u.user_id = q.user_id::BIGINT
+                LEFT JOIN student_groups g ON g.group_id = u.group_id
+                LEFT JOIN faculties f ON f.faculty_id = g.faculty_id
+                WHERE r.request_id = claimed.request_id
+                RETURNING r.request_id, r.user_id, r.request_date AS issued, r.attempts,
+                          concat_ws(' ', u.last_name, u.first_name, u.surname) AS full_name,
+                          g.group_name, f.faculty_name
+            """, {'limit': limit, 'stale': STALE_AFTER, 'max_attempts': MAX_ATTEMPTS})
+            jobs = cur.fetchall()
+        conn.commit()
+        return jobs
+    except Exception:
+        conn.rollback()
+        raise
+
+
+def complete_jobs(conn, results):
+    """Отметить готовые справки и создать уведомления: по одному запросу на пачку"""
+    from psycopg2.extras import execute_values
+
+    rows = [(request_id, f"{CERTIFICATES_BASE_URL}/{filename}") for request_id, filename, _ in results]
+    try:
+        with conn.cursor() as cur:
+            execute_values(cur, """
+                WITH done (request_id, download_link) AS (VALUES %s),
+                updated AS (
+                    UPDATE study_certificate_requests r
+                    SET status = 'completed', download_link = done.download_link,
+                        completed_at = CURRENT_TIMESTAMP, locked_at = NULL
+                    FROM done
+                    WHERE r.request_id = done.request_id AND r.status = 'rendering'
+                    RETURNING r.request_id, r.user_id, r.download_link
+                )
+                INSERT INTO notifications (user_id, type, title, message, related_id)
+                SELECT user_id::BIGINT, 'certificate_ready', '📄 Справка готова',
+                       '✅ Ваша справка об обучении готова!' || E'\\n\\n' || 'Скачать: ' || download_link,
+                       request_id
+                FROM updated
+            """, rows, template="(%s::INTEGER, %s)", page_size=len(rows) or 1)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+
+def fail_jobs(conn, request_ids):
+    """Вернуть заявки в очередь или, после MAX_ATTEMPTS попыток, отметить как failed"""
+    try:
+        with conn.cursor() as cur:
+            cur.execute("""
+                UPDATE study_certificate_requests
+                SET status = CASE WHEN attempts >= %s THEN 'failed' ELSE 'pending' END, locked_at = NULL
+                WHERE request_id = ANY(%s) AND status = 'rendering'
+            """, (MAX_ATTEMPTS, list(request_ids)))
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+
+def process_batch(conn, pool, limit=BATCH_SIZE):
+    """Одна пачка: забрать, нарисовать, сохранить результат. Возвращает число обработанных заявок
+
+    Если процесс пула умер, готовые справки сохраняются, остальные заявки пачки
+    возвращаются в очередь (fail_jobs), а BrokenProcessPool передается вызывающему,
+    чтобы тот пересоздал пул.
+    """
+    jobs = claim_jobs(conn, limit)
+    if not jobs:
+        return 0
+
+    results, failed = [], []
+    broken = None
+    try:
+        futures = [(job['request_id'], pool.submit(render_certificate, dict(job))) for job in jobs]
+    except BrokenProcessPool as e:
+        futures = []
+        failed = [job['request_id'] for job in jobs]
+        broken = e
+    for request_id, future in futures:
+        try:
+            results.append(future.result())
+        except BrokenProcessPool as e:
+            failed.append(request_id)
+            broken = e
+        except Exception as e:
+            logger.error(f"Ошибка генерации справки {request_id}: {e}")
+            failed.append(request_id)
+
+    if results:
+        complete_jobs(conn, results)
+    if failed:
+        fail_jobs(conn, failed)
+    if broken is not None:
+        raise broken
+    return len(jobs)
+
+
+def create_pool(workers=WORKERS):
+    return ProcessPoolExecutor(max_workers=workers, initializer=_init_renderer,
+                               initargs=(FONT_PATH, CERTIFICATES_DIR))
+
+
+def run(stop_event):
+    import psycopg2
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    from DATABASE.database import EducationDB
+
+    if not SIGNING_KEY:
+        logger.error("Не задан CERTIFICATE_SIGNING_KEY: без ключа коды проверки справок можно подделать")
+        sys.exit(1)
+
+    # Пул создается до подключения к БД: дочерние процессы не наследуют соединения
+    pool = create_pool()
+    db = EducationDB()
+    listener = psycopg2.connect(**db.db_config)
+    listener.autocommit = True
+    with listener.cursor() as cur:
+        cur.execute("LISTEN certificate_requests")
+    logger.info(f"Воркер справок запущен: процессов {WORKERS}, пачка {BATCH_SIZE}")
+
+    try:
+        while not stop_event.is_set():
+            try:
+                processed = process_batch(db.conn, pool)
+            except BrokenProcessPool as e:
+                # Процесс рендеринга упал (OOM, сбой reportlab): без нового пула submit не работает.
+                # Новые процессы не пользуются унаследованными соединениями и завершаются через os._exit
+                logger.error(f"Пул рендеринга справок сломан, пересоздаем: {e}")
+                pool.shutdown(wait=False)
+                pool = create_pool()
+                continue
+            except Exception as e:
+                logger.error(f"Ошибка обработки очереди справок: {e}")
+                processed = 0
+                stop_event.wait(POLL_INTERVAL)
+            if processed:
+                continue
+
+            # Очередь пуста: ждем NOTIFY или следующего опроса
+            if select.select([listener], [], [], POLL_INTERVAL)[0]:
+                listener.poll()
+                listener.notifies.clear()
+    finally:
+        pool.shutdown(wait=True)
+        listener.close()
+        db.close()
+        logger.info("Воркер справок остановлен")
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    stop_event = threading.Event()
+
+    def handle_signal(signum, frame):
+        # Текущая пачка дорабатывается, новые заявки не забираются
+        logger.info(f"Получен сигнал {signal.Signals(signum).name}, завершаем после текущей пачки")
+        stop_event.set()
+
+    signal.signal(signal.SIGTERM, handle_signal)
+    signal.signal(signal.SIGINT, handle_signal)
+    run(stop_event)
+
+
+if __name__ == "__main__":
+    main()
@@ -8,7 +8,27 @@ logging.basicConfig(
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
 )
 
+
+class LazyEducationDB:
+    """Подключение к БД создается при первом обращении, а не при импорте config"""
+
+    def __init__(self):
+        self._db = None
+
+    def get(self):
+        if self._db is None:
+            self._db = EducationDB()
+        return self._db
+
+    def __getattr__(self, name):
+        return getattr(self.get(), name)
+
+    def close(self):
+        if self._db is not None:
+            self._db.close()
+
+
 # Глобальные переменные
 logger = logging.getLogger(__name__)
-db = EducationDB()
+db = LazyEducationDB()
 bot = Bot("f9LHodD0cOIKHgVbM5Nzm2JyAu8KdVnGIv75mgcBK2TmH2VfYEG9gn9e4VClYCNCEpI3SRNGpFnI1Fu1w1en")
\ No newline at end of file
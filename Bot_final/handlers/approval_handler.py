@@ -0,0 +1,225 @@
+import threading
+
+from config import bot, db, logger
+from maxgram.keyboards import InlineKeyboard
+from psycopg2.extras import RealDictCursor
+from DATABASE.repository import get_identity, authenticated_users
+
+# Очереди согласования: что согласует каждая роль.
+# Ответственный назначается при подаче заявки (самая короткая очередь), см. save_vacation_to_db
+# и save_business_trip_to_db
+APPROVAL_QUEUES = {
+    'rector': {
+        'table': 'vacations',
+        'id': 'vacation_id',
+        'approver': 'rector_id',
+        'details': "r.days_count || ' дн.'",
+        'title': "🏖️ Заявления на отпуск",
+        'decisions': {
+            'approved': "✅ Ваше заявление на отпуск одобрено",
+            'rejected': "❌ Ваше заявление на отпуск отклонено",
+        },
+    },
+    'dean': {
+        'table': 'business_trips',
+        'id': 'trip_id',
+        'approver': 'dean_id',
+        'details': "r.purpose",
+        'title': "🛫 Заявки на командировку",
+        'decisions': {
+            'approved': "✅ Ваша заявка на командировку одобрена",
+            'rejected': "❌ Ваша заявка на командировку отклонена",
+        },
+    },
+}
+
+# Заявок на одной странице (и в одной пакетной операции)
+APPROVALS_PAGE_SIZE = 10
+
+DECISION_SUMMARY = {
+    'approved': "✅ Одобрено заявок",
+    'rejected': "❌ Отклонено заявок",
+}
+
+
+def get_pending_requests(queue, approver_id, after_id=None, limit=APPROVALS_PAGE_SIZE):
+    """Страница заявок на согласовании у approver_id: от старых к новым после заявки after_id"""
+    with db.conn.cursor(cursor_factory=RealDictCursor) as cur:
+        # Курсор (created_at, id) идет по частичному индексу очереди (*_pending_*)
+        cur.execute(f"""
+            SELECT r.{queue['id']} AS request_id, r.start_date, r.end_date, r.created_at,
+                   {queue['details']} AS details,
+                   u.first_name, u.last_name
+            FROM {queue['table']} r
+            JOIN users u ON u.user_id = r.user_id
+            WHERE r.{queue['approver']} = %(approver_id)s
+            AND r.status = 'pending'
+            AND (%(after)s::INTEGER IS NULL OR (r.created_at, r.{queue['id']}) > (
+                SELECT created_at, {queue['id']} FROM {queue['table']} WHERE {queue['id']} = %(after)s::INTEGER
+            ))
+            ORDER BY r.created_at, r.{queue['id']}
+            LIMIT %(limit)s
+        """, {'approver_id': approver_id, 'after': after_id, 'limit': limit})
+        return cur.fetchall()
+
+
+def decide_requests(queue, approver_id, request_ids, status):
+    """Одобрить или отклонить заявки одной транзакцией: [(request_id, user_id), ...] измененных.
+    Уведомления в notifications создает триггер уровня оператора — один INSERT на пакет"""
+    try:
+        with db.conn.cursor() as cur:
+            # Только свои и еще не рассмотренные: повторное нажатие ничего не меняет
+            cur.execute(f"""
+                UPDATE {queue['table']}
+                SET status = %(status)s, updated_at = NOW()
+                WHERE {queue['id']} = ANY(%(ids)s)
+                AND {queue['approver']} = %(approver_id)s
+                AND status = 'pending'
+                RETURNING {queue['id']}, user_id
+            """, {'status': status, 'ids': request_ids, 'approver_id': approver_id})
+            decided = cur.fetchall()
+        db.conn.commit()
+        return decided
+    except Exception:
+        db.conn.rollback()
+        raise
+
+
+def push_status_updates(queue, decided, status):
+    """Сообщить решение заявителям, у которых открыт чат с ботом.
+    Сессии просматриваются один раз; отправка идет в фоне и не задерживает согласующего"""
+    request_ids_by_user = {}
+    for request_id, user_id in decided:
+        request_ids_by_user.setdefault(user_id, []).append(request_id)
+
+    messages = []
+    for chat_id, session in list(authenticated_users.items()):
+        request_ids = request_ids_by_user.get(session.user.user_id)
+        if request_ids:
+            text = queue['decisions'][status]
+            if len(request_ids) > 1:
+                text += f" (заявок: {len(request_ids)})"
+            messages.append((chat_id, text + "."))
+
+    def send_all():
+        for chat_id, text in messages:
+            try:
+                bot.api.send_message(chat_id, text)
+            except Exception as e:
+                logger.error(f"Не удалось отправить решение по заявке в чат {chat_id}: {e}")
+
+    if messages:
+        threading.Thread(target=send_all, name="approval-push", daemon=True).start()
+
+
+def _queue_for(context):
+    identity = get_identity(context)
+    if not identity.is_authenticated:
+        context.reply("❌ Вы не авторизованы.")
+        return None, None
+    queue = APPROVAL_QUEUES.get(identity.role)
+    if queue is None:
+        context.reply("❌ Согласование заявок доступно только ректору и деканам.")
+        return None, None
+    return queue, identity.user_id
+
+
+def show_approval_inbox(context, after_id=None):
+    """Показывает страницу заявок, ожидающих согласования"""
+    queue, approver_id = _queue_for(context)
+    if queue is None:
+        return
+
+    if after_id is not None:
+        try:
+            after_id = int(after_id)
+        except ValueError:
+            after_id = None
+
+    try:
+        # Лишняя запись показывает, есть ли следующая страница
+        requests = get_pending_requests(queue, approver_id, after_id, APPROVALS_PAGE_SIZE + 1)
+    except Exception as e:
+        logger.error(f"Ошибка при получении заявок на согласование: {e}")
+        db.conn.rollback()
+        context.reply("❌ Произошла ошибка при загрузке заявок.")
+        return
+    has_next = len(requests) > APPROVALS_PAGE_SIZE
+    requests = requests[:APPROVALS_PAGE_SIZE]
+
+    if not requests:
+        keyboard_rows = []
+        if after_id is not None:
+            keyboard_rows.append([{"text": "⏮ К началу очереди", "callback": "approval_inbox"}])
+        keyboard_rows.append([{"text": "🏠 Главное меню", "callback": "back_to_menu"}])
+        context.reply("📭 Заявок на согласование нет.", keyboard=InlineKeyboard(*keyboard_rows))
+        return
+
+    message = f"📥 *{queue['title']}*\n\n"
+    keyboard_rows = []
+    for i, request in enumerate(requests, 1):
+        message += f"{i}. *{request['first_name']} {request['last_name']}*\n"
+        message += f"   📅 {request['start_date'].strftime('%d.%m.%Y')} — {request['end_date'].strftime('%d.%m.%Y')}\n"
+        message += f"   📝 {request['details']}\n\n"
+        keyboard_rows.append([
+            {"text": f"✅ {i}", "callback": f"approve_requests_{request['request_id']}"},
+            {"text": f"❌ {i}", "callback": f"reject_requests_{request['request_id']}"}
+        ])
+
+    page_ids = ",".join(str(request['request_id']) for request in requests)
+    keyboard_rows.append([
+        {"text": f"✅ Одобрить все ({len(requests)})", "callback": f"approve_requests_{page_ids}"},
+        {"text": "❌ Отклонить все", "callback": f"reject_requests_{page_ids}"}
+    ])
+
+    navigation = []
+    if after_id is not None:
+        navigation.append({"text": "⏮ В начало", "callback": "approval_inbox"})
+    if has_next:
+        navigation.append({"text": "Далее ➡️", "callback": f"approvals_after_{requests[-1]['request_id']}"})
+    if navigation:
+        keyboard_rows.append(navigation)
+    keyboard_rows.append([{"text": "🏠 Главное меню", "callback": "back_to_menu"}])
+
+    context.reply(message, keyboard=InlineKeyboard(*keyboard_rows))
+
+
+def _decide(context, suffix, status):
+    queue, approver_id = _queue_for(context)
+    if queue is None:
+        return
+
+    try:
+        request_ids = [int(part) for part in suffix.split(",")][:APPROVALS_PAGE_SIZE]
+    except ValueError:
+        context.reply("❌ Некорректный список заявок.")
+        return
+
+    try:
+        decided = decide_requests(queue, approver_id, request_ids, status)
+    except Exception as e:
+        logger.error(f"Ошибка при согласовании заявок: {e}")
+        context.reply("❌ Произошла ошибка при сохранении решения. Попробуйте позже.")
+        return
+
+    push_status_updates(queue, decided, status)
+
+    if decided:
+        message = f"{DECISION_SUMMARY[status]}: {len(decided)}"
+    else:
+        message = "Эти заявки уже рассмотрены."
+    keyboard = InlineKeyboard(
+        [{"text": "📥 К заявкам", "callback": "approval_inbox"}],
+        [{"text": "🏠 Главное меню", "callback": "back_to_menu"}]
+    )
+    context.reply(message, keyboard=keyboard)
+
+
+def approve_requests(context, suffix):
+    """Одобряет заявки (одну или всю страницу)"""
+    _decide(context, suffix, 'approved')
+
+
+def reject_requests(context, suffix):
+    """Отклоняет заявки (одну или всю страницу)"""
+    _decide(context, suffix, 'rejected')
@@ -1,18 +1,20 @@
 from config import  logger, db
 from maxgram.keyboards import InlineKeyboard
 from psycopg2.extras import RealDictCursor
+from DATABASE.prepared_statements import execute_prepared
 from handlers.open_days_handlers import registration_data
 from handlers.ege_handler import user_selection_data
-from keyboards.menus import get_app_keyboard, get_student_keyboard, get_teacher_keyboard, get_rector_keyboard
+from keyboards.menus import get_app_keyboard, get_student_keyboard, get_teacher_keyboard, get_rector_keyboard, get_dean_keyboard
+# authenticated_users (chat_id -> SessionRecord) хранится в репозитории, здесь реэкспортируется
+from DATABASE.repository import get_chat_id, authenticated_users, start_session, end_session
 
 # Глобальные словари для хранения данных
-auth_sessions = {}
-authenticated_users = {}  # Новый словарь для хранения авторизованных пользователей
+from handlers.state import auth_sessions
 
 
 def start_authorization(context):
     """Начать процесс авторизации"""
-    user_id = get_safe_user_id(context)
+    user_id = get_chat_id(context)
 
     # Сохраняем состояние авторизации
     auth_sessions[user_id] = {
@@ -48,11 +50,7 @@ def process_auth_step(context, user_id, text):
 
             if user:
                 # Успешная авторизация - сохраняем пользователя
-                authenticated_users[user_id] = {
-                    'user_info': user,
-                    'authenticated_at': context.message.get('created_at', 'unknown'),
-                    'role': user['role']
-                }
+                start_session(user_id, user, context.message.get('created_at', 'unknown'))
 
                 user_data['authenticated'] = True
                 user_data['user_info'] = user
@@ -90,23 +88,14 @@ def is_user_authenticated(user_id):
 def authenticate_user(conn, login, password):
     """Аутентификация пользователя"""
     try:
-        # Проверяем соединение
-        try:
-            with conn.cursor() as cur:
-                cur.execute("SELECT 1")
-        except:
-            conn.rollback()
-
+        # Потерянный сервером подготовленный запрос execute_prepared подготовит заново
         with conn.cursor(cursor_factory=RealDictCursor) as cur:
             # Ищем пользователя по логину и паролю
-            cur.execute("""
-                SELECT user_id, login, max_id, role, first_name, surname, last_name, email, phone_number
-                FROM users 
-                WHERE login = %s AND password = %s
-            """, (login, password))
+            execute_prepared(cur, "authenticate_user", (login, password))
 
             user = cur.fetchone()
-            return user
+        conn.commit()
+        return user
 
     except Exception as e:
         logger.error(f"Ошибка аутентификации: {e}")
@@ -131,6 +120,8 @@ def show_role_based_menu(context, user):
         show_teacher_menu(context, first_name, surname)
     elif role == 'rector':
         show_rector_menu(context, first_name, surname)
+    elif role == 'dean':
+        show_dean_menu(context, first_name, surname)
     else:
         show_default_menu(context, first_name)
 
@@ -177,6 +168,16 @@ def show_rector_menu(context, first_name,surname):
     context.reply(message, keyboard=keyboard)
 
 
+def show_dean_menu(context, first_name, surname):
+    """Меню для декана"""
+    keyboard = get_dean_keyboard()
+    message = f"👋 Доброго дня, {first_name} {surname}!\n\n"
+    message += "Чем могу помочь?\n\n"
+    message += "Доступные действия:"
+
+    context.reply(message, keyboard=keyboard)
+
+
 def show_default_menu(context, first_name):
     """Меню по умолчанию"""
     keyboard = InlineKeyboard(
@@ -192,13 +193,12 @@ def show_default_menu(context, first_name):
 
 def handle_logout(context):
     """Обработка выхода из системы"""
-    user_id = get_safe_user_id(context)
+    user_id = get_chat_id(context)
 
     # Удаляем все сессии пользователя
     if user_id in auth_sessions:
         del auth_sessions[user_id]
-    if user_id in authenticated_users:
-        del authenticated_users[user_id]
+    end_session(user_id)
     if user_id in registration_data:
         del registration_data[user_id]
     if user_id in user_selection_data:
@@ -206,12 +206,3 @@ def handle_logout(context):
 
     from keyboards.menus import get_main_non_auth_keyboard
     context.reply_callback("✅ Вы вышли из системы.", keyboard=get_main_non_auth_keyboard())
-
-
-def get_safe_user_id(context):
-    """Безопасное получение user_id"""
-    try:
-        return context.message['recipient']['chat_id']
-    except:
-        return "unknown"
-
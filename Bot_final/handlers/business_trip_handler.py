@@ -3,28 +3,15 @@ from maxgram.keyboards import InlineKeyboard
 from datetime import datetime, timedelta
 import re
 from handlers.authorization_handler import authenticated_users
+from DATABASE.repository import get_chat_id, get_db_user_id
+from handlers.leave_conflicts import check_leave_conflicts
 
 # Глобальный словарь для хранения данных о командировках
-business_trip_sessions = {}
-
-def get_safe_user_id(context):
-    """Безопасное получение user_id"""
-    try:
-        return context.message['recipient']['chat_id']
-    except:
-        return "unknown"
-
-def get_db_user_id(chat_id):
-    """Получает user_id из базы данных для авторизованного пользователя"""
-    if chat_id in authenticated_users:
-        user_data = authenticated_users[chat_id]
-        if 'user_info' in user_data and 'user_id' in user_data['user_info']:
-            return user_data['user_info']['user_id']
-    return None
+from handlers.state import business_trip_sessions
 
 def start_business_trip(context):
     """Начало оформления командировки"""
-    user_id = get_safe_user_id(context)
+    user_id = get_chat_id(context)
     
     # Проверяем, авторизован ли пользователь
     if user_id not in authenticated_users:
@@ -57,7 +44,7 @@ def start_business_trip(context):
 
 def handle_business_trip_purpose(context, text):
     """Обработка ввода цели командировки"""
-    user_id = get_safe_user_id(context)
+    user_id = get_chat_id(context)
     
     if user_id not in business_trip_sessions:
         context.reply("❌ Сессия устарела. Начните заново.")
@@ -82,7 +69,7 @@ def handle_business_trip_purpose(context, text):
 
 def handle_business_trip_start_date(context, text):
     """Обработка ввода даты начала"""
-    user_id = get_safe_user_id(context)
+    user_id = get_chat_id(context)
     
     if user_id not in business_trip_sessions:
         context.reply("❌ Сессия устарела. Начните заново.")
@@ -111,7 +98,7 @@ def handle_business_trip_start_date(context, text):
 
 def handle_business_trip_end_date(context, text):
     """Обработка ввода даты окончания"""
-    user_id = get_safe_user_id(context)
+    user_id = get_chat_id(context)
     
     if user_id not in business_trip_sessions:
         context.reply("❌ Сессия устарела. Начните заново.")
@@ -130,6 +117,16 @@ def handle_business_trip_end_date(context, text):
         context.reply("❌ Дата окончания должна быть позже даты начала!")
         return
     
+    # Пересечения с другими заявками и отсутствие коллег по кафедре
+    conflict, warning = check_leave_conflicts(business_trip_sessions[user_id]['db_user_id'], start_date, end_date_result)
+    if conflict:
+        business_trip_sessions[user_id]['step'] = 'start_date'
+        keyboard = InlineKeyboard(
+            [{"text": "❌ Отмена", "callback": "cancel_business_trip"}]
+        )
+        context.reply(conflict + "\n\n📅 Введите новую дату начала командировки:", keyboard=keyboard)
+        return
+    
     business_trip_sessions[user_id]['end_date'] = end_date_result
     
     # Сохраняем заявку в БД
@@ -140,6 +137,7 @@ def handle_business_trip_end_date(context, text):
         message += f"📋 **Цель:** {business_trip_sessions[user_id]['purpose']}\n"
         message += f"📅 **Период:** {start_date.strftime('%d.%m.%Y')} - {end_date_result.strftime('%d.%m.%Y')}\n"
         message += f"⏳ **Статус:** Ожидание согласования\n\n"
+        message += warning
         message += "Вы получите уведомление о смене статуса."
         
         # Очищаем сессию
@@ -155,7 +153,7 @@ def handle_business_trip_end_date(context, text):
 
 def cancel_business_trip(context):
     """Отмена оформления командировки"""
-    user_id = get_safe_user_id(context)
+    user_id = get_chat_id(context)
     
     if user_id in business_trip_sessions:
         del business_trip_sessions[user_id]
@@ -206,20 +204,23 @@ def save_business_trip_to_db(user_id):
         # Используем user_id из базы данных
         db_user_id = session_data['db_user_id']
         
-        # Получаем dean_id
-        dean_id = get_random_dean_id()
-        
         with db.conn.cursor() as cur:
+            # Ответственный — декан с самой короткой очередью заявок на согласование
             cur.execute("""
                 INSERT INTO business_trips 
                 (user_id, purpose, start_date, end_date, dean_id, status)
-                VALUES (%s, %s, %s, %s, %s, 'pending')
+                SELECT %s, %s, %s, %s, (
+                    SELECT u.user_id FROM users u
+                    WHERE u.role = 'dean'
+                    ORDER BY (SELECT COUNT(*) FROM business_trips t
+                              WHERE t.dean_id = u.user_id AND t.status = 'pending'), random()
+                    LIMIT 1
+                ), 'pending'
             """, (
                 db_user_id,
                 session_data['purpose'],
                 session_data['start_date'],
-                session_data['end_date'],
-                dean_id
+                session_data['end_date']
             ))
             
             db.conn.commit()
@@ -230,24 +231,9 @@ def save_business_trip_to_db(user_id):
         db.conn.rollback()
         return False
 
-def get_random_dean_id():
-    """Получает ID случайного декана из БД"""
-    try:
-        with db.conn.cursor() as cur:
-            cur.execute("""
-                SELECT user_id FROM users 
-                WHERE role = 'dean' 
-                LIMIT 1
-            """)
-            result = cur.fetchone()
-            return result[0] if result else None
-    except Exception as e:
-        logger.error(f"Ошибка при получении декана: {e}")
-        return None
-
 def process_business_trip_message(context, text):
     """Обрабатывает текстовые сообщения для командировки"""
-    user_id = get_safe_user_id(context)
+    user_id = get_chat_id(context)
     
     if user_id not in business_trip_sessions:
         return False
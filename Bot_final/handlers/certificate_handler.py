@@ -2,28 +2,12 @@ from config import db, logger
 from psycopg2.extras import RealDictCursor
 from maxgram.keyboards import InlineKeyboard
 from handlers.notification_handler import create_notification
-from handlers.authorization_handler import authenticated_users
-
-
-def get_user_id(context):
-    """Безопасное получение user_id для любого типа сообщений"""
-    return context.message['recipient']['chat_id']
-
-
-
-def get_db_user_id(chat_id):
-    """Получает user_id из базы данных для авторизованного пользователя"""
-    if chat_id in authenticated_users:
-        user_data = authenticated_users[chat_id]
-        if 'user_info' in user_data and 'user_id' in user_data['user_info']:
-            return user_data['user_info']['user_id']
-    return None
-
+from DATABASE.repository import get_chat_id, get_db_user_id
 
 
 def handle_study_certificate_request(context):
     """Обработка запроса справки об обучении"""
-    user_id = get_user_id(context)
+    user_id = get_chat_id(context)
     db_user_id = get_db_user_id(user_id)
 
     if not db_user_id:
@@ -44,7 +28,7 @@ def handle_study_certificate_request(context):
 
 def select_certificate_delivery(context):
     """Выбор способа получения справки"""
-    user_id = get_user_id(context)
+    user_id = get_chat_id(context)
     db_user_id = get_db_user_id(user_id)
 
     if not db_user_id:
@@ -66,23 +50,20 @@ def select_certificate_delivery(context):
 
 def confirm_digital_certificate(context):
     """Подтверждение оформления электронной справки"""
-    user_id = get_user_id(context)
+    user_id = get_chat_id(context)
     db_user_id = get_db_user_id(user_id )
 
     if not db_user_id:
         context.reply_callback("❌ Ошибка: пользователь не авторизован")
         return
 
-    # Создаем заявку в базе данных
+    # Ставим заявку в очередь: PDF сформирует certificate_worker.py и пришлет уведомление
     request_id = create_certificate_request(db_user_id, 'digital')
 
     if request_id:
         message = "✅ Справка оформлена в электронном виде.\n\n"
-        message += "⏰ Ссылка для скачивания будет направлена в течение 2 часов.\n\n"
+        message += "⏰ Ссылка для скачивания придет в уведомлениях, как только справка будет готова.\n\n"
         message += "Справка будет с электронной подписью (ЭЦП)."
-
-        # Имитируем обработку заявки
-        process_digital_certificate_request(request_id, db_user_id )
     else:
         message = "❌ Произошла ошибка при оформлении справки. Попробуйте позже."
 
@@ -96,7 +77,7 @@ def confirm_digital_certificate(context):
 
 def confirm_office_certificate(context):
     """Подтверждение оформления справки для получения в деканате"""
-    chat_id = get_user_id(context)
+    chat_id = get_chat_id(context)
     db_user_id = get_db_user_id(chat_id)
 
     if not db_user_id:
@@ -133,7 +114,7 @@ def create_certificate_request(db_user_id, delivery_type, office_location="Де
             if delivery_type == 'digital':
                 cur.execute("""
                     INSERT INTO study_certificate_requests (user_id, status, delivery_type) 
-                    VALUES (%s, 'processing', 'digital') 
+                    VALUES (%s, 'pending', 'digital') 
                     RETURNING request_id
                 """, (db_user_id,))
             else:
@@ -152,31 +133,6 @@ def create_certificate_request(db_user_id, delivery_type, office_location="Де
         return None
 
 
-def process_digital_certificate_request(request_id, user_id):
-    """Обработать заявку на электронную справку"""
-    try:
-        with db.conn.cursor() as cur:
-            # Генерируем ссылку для скачивания
-            download_link = f"https://example.com/certificates/{request_id}_signed.pdf"
-
-            cur.execute("""
-                UPDATE study_certificate_requests 
-                SET status = 'completed', 
-                    download_link = %s,
-                    completed_at = CURRENT_TIMESTAMP
-                WHERE request_id = %s
-            """, (download_link, request_id))
-            db.conn.commit()
-
-            # Создаем уведомление для пользователя
-            notification_message = f"✅ Ваша справка об обучении готова!\n\nСкачать: {download_link}"
-            create_notification(user_id, 'certificate_ready', '📄 Справка готова', notification_message, request_id)
-
-    except Exception as e:
-        logger.error(f"Ошибка обработки заявки на электронную справку: {e}")
-        db.conn.rollback()
-
-
 def process_office_certificate_request(request_id, user_id):
     """Обработать заявку на справку для получения в деканате"""
     try:
@@ -223,6 +179,8 @@ def show_certificate_status(context, request_id):
 
             status_emoji = {
                 'processing': '⏳',
+                'rendering': '🖨️',
+                'failed': '❌',
                 'completed': '✅',
                 'ready_for_pickup': '📦',
                 'pending': '⏳'
@@ -230,6 +188,8 @@ def show_certificate_status(context, request_id):
 
             status_text = {
                 'processing': 'В обработке',
+                'rendering': 'Формируется',
+                'failed': 'Не удалось сформировать, обратитесь в деканат',
                 'completed': 'Готово',
                 'ready_for_pickup': 'Готово к выдаче',
                 'pending': 'Ожидает обработки'
@@ -2,26 +2,13 @@ from config import db, logger
 from psycopg2.extras import RealDictCursor
 from maxgram.keyboards import InlineKeyboard
 from datetime import date
-from handlers.authorization_handler import authenticated_users
-
-
-def get_user_id(context):
-    """Безопасное получение user_id"""
-    return context.message['recipient']['chat_id']
-
-
-def get_db_user_id(chat_id):
-    """Получает user_id из базы данных для авторизованного пользователя"""
-    if chat_id in authenticated_users:
-        user_data = authenticated_users[chat_id]
-        if 'user_info' in user_data and 'user_id' in user_data['user_info']:
-            return user_data['user_info']['user_id']
-    return None
+from DATABASE.repository import get_chat_id, get_db_user_id, get_identity
+from DATABASE.read_cache import cached_read
 
 
 def show_teacher_contract_info(context):
     """Показать информацию о контракте преподавателя"""
-    chat_id = get_user_id(context)
+    chat_id = get_chat_id(context)
     db_user_id = get_db_user_id(chat_id)
 
     if not db_user_id:
@@ -137,30 +124,36 @@ def get_teacher_contracts(user_id):
 def get_active_competitions():
     """Получить активные конкурсы"""
     try:
-        with db.conn.cursor(cursor_factory=RealDictCursor) as cur:
-            cur.execute("""
-                SELECT * FROM vacancy_competitions 
-                WHERE status = 'active' 
-                AND application_end_date >= CURRENT_DATE
-                ORDER BY application_end_date ASC
-            """)
-            return cur.fetchall()
+        return load_active_competitions()
     except Exception as e:
         logger.error(f"Ошибка при получении конкурсов: {e}")
+        db.conn.rollback()
         return []
 
 
+@cached_read("active_competitions", ttl=120)
+def load_active_competitions():
+    """Список один для всех преподавателей: одновременные запросы делят одно выполнение"""
+    with db.conn.cursor(cursor_factory=RealDictCursor) as cur:
+        cur.execute("""
+            SELECT * FROM vacancy_competitions 
+            WHERE status = 'active' 
+            AND application_end_date >= CURRENT_DATE
+            ORDER BY application_end_date ASC
+        """)
+        return cur.fetchall()
+
+
 def handle_competition_menu(context):
     """Обработка меню конкурсов и контрактов"""
-    chat_id = get_user_id(context)
-    db_user_id = get_db_user_id(chat_id)
+    identity = get_identity(context)
 
-    if not db_user_id:
+    if not identity.user_id:
         context.reply_callback("❌ Ошибка: пользователь не авторизован")
         return
 
     # Проверяем роль пользователя
-    user_role = authenticated_users[chat_id]['role']
+    user_role = identity.role
 
     if user_role == 'teacher':
         # Для преподавателей показываем оба варианта
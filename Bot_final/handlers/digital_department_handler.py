@@ -1,28 +1,20 @@
 from config import db, logger
 from keyboards.menus import get_student_keyboard
 from datetime import datetime
-from handlers.authorization_handler import authenticated_users
 from maxgram.keyboards import InlineKeyboard
 from psycopg2.extras import RealDictCursor
+from DATABASE.repository import get_chat_id, get_db_user_id
 
 # Хранилище состояний для процесса записи
-digital_department_sessions = {}
-
-def get_db_user_id(chat_id):
-    """Получает user_id из базы данных для авторизованного пользователя"""
-    if chat_id in authenticated_users:
-        user_data = authenticated_users[chat_id]
-        if 'user_info' in user_data and 'user_id' in user_data['user_info']:
-            return user_data['user_info']['user_id']
-    return None
+from handlers.state import digital_department_sessions
 
 def calculate_student_gpa(db_user_id):
-    """Рассчитывает средний балл студента"""
+    """Средний балл студента (student_gpa поддерживается триггерами на student_grades)"""
     try:
         with db.conn.cursor(cursor_factory=RealDictCursor) as cur:
             cur.execute("""
-                SELECT AVG(grade) as gpa 
-                FROM student_grades 
+                SELECT gpa
+                FROM student_gpa
                 WHERE user_id = %s
             """, (db_user_id,))
             result = cur.fetchone()
@@ -31,9 +23,10 @@ def calculate_student_gpa(db_user_id):
         logger.error(f"Ошибка при расчете GPA: {e}")
         return 0.0
 
-def get_available_departments(db_user_id):
+def get_available_departments(db_user_id, gpa=None):
     """Получает доступные направления для студента"""
-    gpa = calculate_student_gpa(db_user_id)
+    if gpa is None:
+        gpa = calculate_student_gpa(db_user_id)
     
     # Добавляем отладочную информацию
     logger.info(f"DB User {db_user_id} GPA: {gpa}")
@@ -45,12 +38,7 @@ def get_available_departments(db_user_id):
                 FROM digital_departments dd
                 WHERE dd.application_deadline >= CURRENT_DATE
                 AND dd.min_gpa <= %s
-                AND dd.available_places > (
-                    SELECT COUNT(*) 
-                    FROM digital_department_applications 
-                    WHERE department_id = dd.department_id 
-                    AND status = 'approved'
-                )
+                AND dd.available_places > dd.approved_count
                 ORDER BY dd.department_name
             """, (gpa,))
             departments = cur.fetchall()
@@ -65,7 +53,7 @@ def get_available_departments(db_user_id):
 
 def start_digital_department_registration(context):
     """Начинает процесс записи на цифровую кафедру"""
-    chat_id = context.message['recipient']['chat_id']
+    chat_id = get_chat_id(context)
     db_user_id = get_db_user_id(chat_id)
     
     if not db_user_id:
@@ -73,14 +61,13 @@ def start_digital_department_registration(context):
         return
     
     # Получаем доступные направления
-    departments = get_available_departments(db_user_id)
+    gpa = calculate_student_gpa(db_user_id)
+    departments = get_available_departments(db_user_id, gpa)
     
     if not departments:
         context.reply("😔 В настоящее время нет доступных направлений для записи или ваш средний балл недостаточен.")
         return
     
-    gpa = calculate_student_gpa(db_user_id)
-    
     # Формируем сообщение с доступными направлениями
     message = f"🎯 Запись на цифровую кафедру\n\n"
     message += f"📊 Ваш средний балл: {gpa:.2f}\n"
@@ -115,7 +102,7 @@ def start_digital_department_registration(context):
 
 def handle_department_selection(context, department_id):
     """Обрабатывает выбор направления"""
-    chat_id = context.message['recipient']['chat_id']
+    chat_id = get_chat_id(context)
     
     if chat_id not in digital_department_sessions:
         context.reply_callback("❌ Сессия истекла. Начните заново.")
@@ -124,37 +111,36 @@ def handle_department_selection(context, department_id):
     session_data = digital_department_sessions[chat_id]
     db_user_id = session_data['db_user_id']
     
-    # Проверяем, не подана ли уже заявка
-    try:
-        with db.conn.cursor(cursor_factory=RealDictCursor) as cur:
-            cur.execute("""
-                SELECT * FROM digital_department_applications 
-                WHERE user_id = %s AND department_id = %s
-            """, (db_user_id, department_id))
-            existing = cur.fetchone()
-    except Exception as e:
-        logger.error(f"Ошибка при проверке существующей заявки: {e}")
-        context.reply_callback("❌ Произошла ошибка. Попробуйте позже.")
-        return
-    
-    if existing:
-        context.reply_callback("❌ Вы уже подавали заявку на это направление.")
-        return
-    
-    # Создаем заявку
+    # Создаем заявку одним запросом: направление должно принимать заявки и иметь свободные
+    # места (approved_count), повторная заявка отсекается уникальным ключом
     try:
         with db.conn.cursor(cursor_factory=RealDictCursor) as cur:
             cur.execute("""
-                INSERT INTO digital_department_applications (user_id, department_id, status)
-                VALUES (%s, %s, 'pending')
-                RETURNING application_id
-            """, (db_user_id, department_id))
-            result = cur.fetchone()
+                WITH dept AS (
+                    SELECT department_id, department_name
+                    FROM digital_departments
+                    WHERE department_id = %s
+                    AND application_deadline >= CURRENT_DATE
+                    AND approved_count < available_places
+                ),
+                created AS (
+                    INSERT INTO digital_department_applications (user_id, department_id, status)
+                    SELECT %s, department_id, 'pending' FROM dept
+                    ON CONFLICT (user_id, department_id) DO NOTHING
+                    RETURNING application_id
+                )
+                SELECT dept.department_name, (SELECT application_id FROM created) AS application_id
+                FROM dept
+            """, (department_id, db_user_id))
+            dept_result = cur.fetchone()
             db.conn.commit()
             
-            # Получаем информацию о направлении
-            cur.execute("SELECT department_name FROM digital_departments WHERE department_id = %s", (department_id,))
-            dept_result = cur.fetchone()
+            if not dept_result:
+                context.reply_callback("❌ Прием заявок на это направление закрыт или места закончились.")
+                return
+            if dept_result['application_id'] is None:
+                context.reply_callback("❌ Вы уже подавали заявку на это направление.")
+                return
             
             # УВЕДОМЛЕНИЕ ТЕПЕРЬ СОЗДАЕТСЯ ТРИГГЕРОМ В БАЗЕ ДАННЫХ
             
@@ -193,7 +179,7 @@ def get_department_applications(db_user_id):
 
 def show_digital_department_status(context):
     """Показывает статус заявок на цифровую кафедру"""
-    chat_id = context.message['recipient']['chat_id']
+    chat_id = get_chat_id(context)
     db_user_id = get_db_user_id(chat_id)
     
     if not db_user_id:
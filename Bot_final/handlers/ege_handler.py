@@ -1,12 +1,13 @@
 
 from applicant.available_ege_program import (get_safe_user_id, get_all_subjects,
                                              get_available_programs, is_program_suitable, get_program_subjects,
-                                             calculate_total_score, get_subject_min_score)
+                                             calculate_total_score, subject_min_score)
+from applicant.available_programs import get_all_program_subjects
 from config import bot, logger, db
 from maxgram.keyboards import InlineKeyboard
 
 # Глобальные переменные для хранения состояния
-user_selection_data = {}
+from handlers.state import user_selection_data
 
 
 def start_program_selection(context):
@@ -99,8 +100,8 @@ def handle_subject_selection(context, subject_id):
         context.reply_callback("❌ Предмет не найден")
         return
 
-    # Получаем минимальный балл для предмета
-    min_score = get_subject_min_score(db.conn, subject['subject_id'])
+    # Минимальный балл уже загружен вместе со списком предметов
+    min_score = subject_min_score(subject, db.conn)
 
     # Сохраняем выбранный предмет для ввода баллов
     user_data['current_subject'] = subject
@@ -191,22 +192,23 @@ def show_available_programs_result(context, user_id):
     scores = {s['subject_id']: s['score'] for s in selected_subjects}
     subject_ids = [s['subject_id'] for s in selected_subjects]
 
-    # Получаем все программы
+    # Получаем все программы и предметы всех программ (два запроса вместо N+1)
     all_programs = get_available_programs(db.conn)
+    subjects_by_program = get_all_program_subjects(db.conn)
     available_programs = []
 
     for program in all_programs:
         program_id = program['program_id']
 
-        # Получаем предметы для этой программы
-        program_subjects = get_program_subjects(db.conn, program_id)
+        # Предметы для этой программы
+        program_subjects = subjects_by_program.get(program_id, [])
 
         # Проверяем, подходит ли программа
         if is_program_suitable(program_subjects, scores, subject_ids, db.conn):
             available_programs.append(program)
 
     # Формируем сообщение с результатами
-    message = format_programs_message(available_programs, scores, db.conn)
+    message = format_programs_message(available_programs, scores, db.conn, subjects_by_program)
 
     # Отправляем сообщение
     context.reply_callback(message)
@@ -223,14 +225,17 @@ def show_available_programs_result(context, user_id):
         del user_selection_data[user_id]
 
 
-def format_programs_message(available_programs, scores, conn):
+def format_programs_message(available_programs, scores, conn, subjects_by_program=None):
     """Форматировать сообщение с программами"""
     if available_programs:
         message = "🎓 Вам подходят следующие программы:\n\n"
 
         for i, program in enumerate(available_programs, 1):
-            total_score = calculate_total_score(program['program_id'], scores, conn)
-            program_subjects = get_program_subjects(conn, program['program_id'])
+            if subjects_by_program is not None:
+                program_subjects = subjects_by_program.get(program['program_id'], [])
+            else:
+                program_subjects = get_program_subjects(conn, program['program_id'])
+            total_score = calculate_total_score(program['program_id'], scores, conn, program_subjects)
 
             message += f"{i}. {program['program_name']}\n"
             message += f"   🏛 {program['faculty_name']}\n"
@@ -1,43 +1,63 @@
 from config import logger, db
+from keyboards.cache import VersionedCache
 from keyboards.menus import get_faculties_keyboard, get_programs_keyboard, \
     get_program_detail_keyboard
 from applicant.available_programs import get_all_faculties, get_programs_by_faculty, get_program_by_id, \
-    get_program_subjects, get_faculty_by_id
+    get_program_subjects, get_faculty_by_id, get_reference_version
 
+# Экраны факультетов и программ (текст + клавиатура) по версии справочников:
+# пока факультеты и программы не менялись, нажатие стоит одного чтения версии
+_screens = VersionedCache()
 
-def show_faculties(context):
+
+def _build_faculties_screen():
     res = get_all_faculties(db.conn)
     faculty_name =  res[1]
     keys = res[2]
     faculty_keyboard = get_faculties_keyboard(faculty_name,keys)
+    message = ("Отлично в этом вузе есть такие факультеты:\n" + res[0] +
+               "Программы какого факультета ты хочешь посмотреть?")
+    return message, faculty_keyboard
 
-    context.reply_callback(
-        "Отлично в этом вузе есть такие факультеты:\n" + res[0] +
-        "Программы какого факультета ты хочешь посмотреть?",
-        keyboard=faculty_keyboard
-    )
 
+def show_faculties(context):
+    version = get_reference_version(db.conn, 'faculties')
+    message, faculty_keyboard = _screens.get_or_build('faculties', version, _build_faculties_screen)
 
-def show_faculty_programs(context, faculty_number):
-    try:
-        programs = get_programs_by_faculty(db.conn, faculty_number)
+    context.reply_callback(message, keyboard=faculty_keyboard)
 
-        if not programs:
-            context.reply_callback(f"На факультете {faculty_number} пока нет программ")
-            return
 
-        programs_keyboard = get_programs_keyboard(programs)
-        faculty_info = get_faculty_by_id(db.conn, faculty_number)
+def _build_programs_screen(faculty_number):
+    """Текст и клавиатура программ факультета; None, если программ нет"""
+    programs = get_programs_by_faculty(db.conn, faculty_number)
+    if not programs:
+        return None
+
+    programs_keyboard = get_programs_keyboard(programs)
+    faculty_info = get_faculty_by_id(db.conn, faculty_number)
 
-        message = f"🏛 Факультет: {faculty_info['faculty_name']}\n\n"
-        message += f"📖 {faculty_info['description']}\n\n"
-        message += "📋 Доступные образовательные программы:\n\n"
+    message = f"🏛 Факультет: {faculty_info['faculty_name']}\n\n"
+    message += f"📖 {faculty_info['description']}\n\n"
+    message += "📋 Доступные образовательные программы:\n\n"
 
-        for i, program in enumerate(programs, 1):
-            message += f"{i}. {program['program_name']}\n"
+    for i, program in enumerate(programs, 1):
+        message += f"{i}. {program['program_name']}\n"
 
-        message += "\n🎯 Нажми на программу, чтобы узнать подробности"
+    message += "\n🎯 Нажми на программу, чтобы узнать подробности"
+    return message, programs_keyboard
+
+
+def show_faculty_programs(context, faculty_number):
+    try:
+        version = get_reference_version(db.conn, 'faculties', 'educational_programs')
+        screen = _screens.get_or_build(('programs', faculty_number), version,
+                                       _build_programs_screen, faculty_number)
+
+        if screen is None:
+            context.reply_callback(f"На факультете {faculty_number} пока нет программ")
+            return
 
+        message, programs_keyboard = screen
         context.reply_callback(message, keyboard=programs_keyboard)
 
     except Exception as e:
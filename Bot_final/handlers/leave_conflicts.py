@@ -0,0 +1,108 @@
+from config import db, logger
+from psycopg2.extras import RealDictCursor
+
+# Проверка отпусков и командировок перед подачей заявки: пересечения с собственными
+# заявками человека и сколько коллег по кафедре отсутствует в каждый из дней.
+# Оба запроса идут по GiST-индексам на period (см. vacations_no_overlap, idx_*_period)
+
+# Сколько сотрудников кафедры должно оставаться на месте в любой день
+MIN_STAFF_PRESENT = 1
+
+KIND_NAMES = {
+    'vacation': "🏖️ Отпуск",
+    'business_trip': "🛫 Командировка",
+}
+
+
+def get_overlapping_requests(cur, user_id, start_date, end_date):
+    """Неотклоненные отпуска и командировки человека, пересекающиеся с периодом"""
+    cur.execute("""
+        SELECT 'vacation' AS kind, vacation_id AS request_id, start_date, end_date, status
+        FROM vacations
+        WHERE int8range(user_id, user_id, '[]') && int8range(%(user_id)s, %(user_id)s, '[]')
+        AND period && daterange(%(start)s::DATE, %(end)s::DATE, '[]')
+        AND status <> 'rejected'
+        UNION ALL
+        SELECT 'business_trip', trip_id, start_date, end_date, status
+        FROM business_trips
+        WHERE int8range(user_id, user_id, '[]') && int8range(%(user_id)s, %(user_id)s, '[]')
+        AND period && daterange(%(start)s::DATE, %(end)s::DATE, '[]')
+        AND status <> 'rejected'
+        ORDER BY start_date
+    """, {'user_id': user_id, 'start': start_date, 'end': end_date})
+    return cur.fetchall()
+
+
+def get_department_absences(cur, user_id, start_date, end_date):
+    """По каждой кафедре человека и каждому дню периода: сколько коллег отсутствует и сколько всего"""
+    cur.execute("""
+        WITH staff AS (
+            SELECT DISTINCT c.department, c.user_id
+            FROM teacher_contracts mine
+            JOIN teacher_contracts c ON c.department = mine.department AND c.status = 'active'
+            WHERE mine.user_id = %(user_id)s AND mine.status = 'active'
+        ),
+        absences AS (
+            SELECT user_id, period FROM vacations
+            WHERE period && daterange(%(start)s::DATE, %(end)s::DATE, '[]') AND status <> 'rejected'
+            UNION ALL
+            SELECT user_id, period FROM business_trips
+            WHERE period && daterange(%(start)s::DATE, %(end)s::DATE, '[]') AND status <> 'rejected'
+        )
+        SELECT s.department, day::DATE AS day,
+               COUNT(DISTINCT a.user_id) FILTER (WHERE a.user_id <> %(user_id)s) AS absent,
+               COUNT(DISTINCT s.user_id) AS staff
+        FROM staff s
+        CROSS JOIN generate_series(%(start)s::DATE, %(end)s::DATE, INTERVAL '1 day') AS day
+        LEFT JOIN absences a ON a.user_id = s.user_id AND a.period @> day::DATE
+        GROUP BY s.department, day
+        ORDER BY s.department, day
+    """, {'user_id': user_id, 'start': start_date, 'end': end_date})
+    return cur.fetchall()
+
+
+def check_leave_conflicts(user_id, start_date, end_date):
+    """Проверить период перед подачей заявки: (текст ошибки или None, текст предупреждения)
+
+    Ошибка — пересечение с собственной заявкой или день, когда на кафедре никого не останется"""
+    try:
+        with db.conn.cursor(cursor_factory=RealDictCursor) as cur:
+            overlaps = get_overlapping_requests(cur, user_id, start_date, end_date)
+            days = get_department_absences(cur, user_id, start_date, end_date)
+    except Exception as e:
+        logger.error(f"Ошибка при проверке пересечений отпусков и командировок: {e}")
+        db.conn.rollback()
+        return None, ""
+
+    if overlaps:
+        message = "❌ Период пересекается с вашими заявками:\n\n"
+        for request in overlaps:
+            message += (f"• {KIND_NAMES[request['kind']]}: {request['start_date'].strftime('%d.%m.%Y')} - "
+                        f"{request['end_date'].strftime('%d.%m.%Y')}\n")
+        message += "\nВыберите другие даты."
+        return message, ""
+
+    # Дни, когда после вашего ухода на кафедре останется меньше MIN_STAFF_PRESENT сотрудников
+    # (кафедры из одного человека не проверяются)
+    uncovered = [d for d in days if d['staff'] > 1 and d['staff'] - d['absent'] - 1 < MIN_STAFF_PRESENT]
+    if uncovered:
+        message = "❌ В эти дни на кафедре не останется сотрудников:\n\n"
+        for d in uncovered[:7]:
+            message += f"• {d['department']}: {d['day'].strftime('%d.%m.%Y')}\n"
+        if len(uncovered) > 7:
+            message += f"• ... и еще {len(uncovered) - 7} дн.\n"
+        message += "\nСогласуйте даты с коллегами и выберите другой период."
+        return message, ""
+
+    # Самый загруженный день по каждой кафедре
+    busiest = {}
+    for d in days:
+        if d['absent'] and d['absent'] > busiest.get(d['department'], {'absent': 0})['absent']:
+            busiest[d['department']] = d
+    warning = ""
+    if busiest:
+        warning = "👥 Коллеги в отпуске или командировке в эти дни:\n"
+        for department, d in busiest.items():
+            warning += f"• {department}: до {d['absent']} из {d['staff']} ({d['day'].strftime('%d.%m.%Y')})\n"
+        warning += "\n"
+    return None, warning
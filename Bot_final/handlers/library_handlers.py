@@ -1,21 +1,17 @@
 from maxgram.keyboards import InlineKeyboard
 from config import db, logger
 from psycopg2.extras import RealDictCursor
+from DATABASE.prepared_statements import execute_prepared
 from datetime import datetime, timedelta
+from DATABASE.repository import get_chat_id
 
 # Глобальные переменные для хранения состояния поиска книг
-user_book_search = {}
-
-
-def get_user_id(context):
-    """Безопасное получение user_id для любого типа сообщений"""
-    return context.message['recipient']['chat_id']
-
+from handlers.state import user_book_search
 
 
 def start_book_search(context):
     """Начать поиск книги"""
-    user_id = get_user_id(context)
+    user_id = get_chat_id(context)
 
     # Сохраняем состояние поиска
     user_book_search[user_id] = {'step': 'awaiting_search_query'}
@@ -33,7 +29,7 @@ def start_book_search(context):
 
 def handle_book_search_query(context, text):
     """Обработка запроса на поиск книги"""
-    user_id = get_user_id(context)
+    user_id = get_chat_id(context)
 
     if user_id not in user_book_search:
         start_book_search(context)
@@ -129,7 +125,7 @@ def show_book_details(context, user_id, book_index):
 
 def handle_digital_book_request(context, book_id):
     """Обработка запроса электронной книги"""
-    user_id = get_user_id(context)
+    user_id = get_chat_id(context)
 
     book = get_book_by_id(book_id)
 
@@ -151,7 +147,7 @@ def handle_digital_book_request(context, book_id):
 
 def handle_book_reservation(context, book_id):
     """Обработка бронирования бумажной книги"""
-    user_id = get_user_id(context)
+    user_id = get_chat_id(context)
 
     book = get_book_by_id(book_id)
 
@@ -225,21 +221,14 @@ def search_books(query):
     try:
         with db.conn.cursor(cursor_factory=RealDictCursor) as cur:
             search_term = f"%{query}%"
-            cur.execute("""
-                SELECT * FROM books 
-                WHERE title ILIKE %s OR author ILIKE %s 
-                ORDER BY 
-                    CASE 
-                        WHEN title ILIKE %s THEN 1 
-                        WHEN author ILIKE %s THEN 2 
-                        ELSE 3 
-                    END,
-                    available_copies DESC
-                LIMIT 10
-            """, (search_term, search_term, search_term, search_term))
-            return cur.fetchall()
+            execute_prepared(cur, "search_books", (search_term,))
+            books = cur.fetchall()
+        # Транзакция чтения не остается открытой (см. DATABASE/prepared_statements.py)
+        db.conn.commit()
+        return books
     except Exception as e:
         logger.error(f"Ошибка поиска книг: {e}")
+        db.conn.rollback()
         return []
 
 
@@ -247,14 +236,17 @@ def get_book_by_id(book_id):
     """Получить книгу по ID"""
     try:
         with db.conn.cursor(cursor_factory=RealDictCursor) as cur:
-            cur.execute("SELECT * FROM books WHERE book_id = %s", (book_id,))
-            return cur.fetchone()
+            execute_prepared(cur, "get_book_by_id", (book_id,))
+            book = cur.fetchone()
+        db.conn.commit()
+        return book
     except Exception as e:
         logger.error(f"Ошибка получения книги: {e}")
+        db.conn.rollback()
         return None
 
 
 def handle_navigation(context, book_index):
     """Обработка навигации по книгам"""
-    user_id = get_user_id(context)
+    user_id = get_chat_id(context)
     show_book_details(context, user_id, book_index)
\ No newline at end of file
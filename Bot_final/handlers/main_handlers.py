@@ -1,27 +1,22 @@
 from config import bot, logger, db
 from keyboards.menus import get_main_non_auth_keyboard, get_main_auth_keyboard
-from handlers.open_days_handlers import registration_data, process_registration_step
-from handlers.ege_handler import user_selection_data, process_score_input, show_subjects_keyboard
-from handlers.authorization_handler import auth_sessions, process_auth_step, handle_logout, authenticated_users, show_role_based_menu
-from handlers.business_trip_handler import (
-    start_business_trip,
-    cancel_business_trip,
-    process_business_trip_message
-)
-from handlers.library_handlers import user_book_search, handle_book_search_query
-from handlers.vacation_handler import (
-    start_vacation,
-    cancel_vacation,
-    submit_vacation,
-    process_vacation_message
-)
-from handlers.notification_handler import check_and_show_notifications
-from handlers.schedule_handler import show_student_schedule, show_teacher_schedule
-from handlers.project_handler import project_creation_sessions, process_project_creation
-
-def get_safe_user_id(context):
-    user_id = context.message['recipient']['chat_id']
-    return user_id
+from handlers.state import (auth_sessions, registration_data, user_selection_data,
+                            project_creation_sessions, business_trip_sessions, vacation_sessions,
+                            user_book_search)
+from handlers.registry import lazy
+from DATABASE.repository import authenticated_users, get_chat_id
+from rate_limit import limiter, LIMITED
+
+# Обработчики диалогов загружаются при первом сообщении в соответствующем диалоге
+process_auth_step = lazy("handlers.authorization_handler", "process_auth_step")
+process_registration_step = lazy("handlers.open_days_handlers", "process_registration_step")
+process_score_input = lazy("handlers.ege_handler", "process_score_input")
+show_subjects_keyboard = lazy("handlers.ege_handler", "show_subjects_keyboard")
+process_project_creation = lazy("handlers.project_handler", "process_project_creation")
+process_business_trip_message = lazy("handlers.business_trip_handler", "process_business_trip_message")
+process_vacation_message = lazy("handlers.vacation_handler", "process_vacation_message")
+handle_book_search_query = lazy("handlers.library_handlers", "handle_book_search_query")
+check_and_show_notifications = lazy("handlers.notification_handler", "check_and_show_notifications")
 
 def is_user_authenticated(user_id):
     """Проверяет, авторизован ли пользователь"""
@@ -54,7 +49,12 @@ def hello_handler(context):
 @bot.on("message_created")
 def handle_message(context):
     # Получаем user_id
-    user_id = get_safe_user_id(context)
+    user_id = get_chat_id(context)
+
+    # Сообщения расходуют общий бакет чата; повторы текста не отбрасываем — это могут быть ответы.
+    # Лишние сообщения молча пропускаем, чтобы не отвечать на флуд своим флудом
+    if limiter.check(user_id) == LIMITED:
+        return
 
     # Извлекаем текст сообщения
     text = None
@@ -120,11 +120,11 @@ def handle_message(context):
                 return
 
     # Проверяем, находится ли пользователь в процессе оформления командировки
-    if text and process_business_trip_message(context, text):
+    if text and user_id in business_trip_sessions and process_business_trip_message(context, text):
         return
 
     # Проверяем, находится ли пользователь в процессе оформления отпуска
-    if text and process_vacation_message(context, text):
+    if text and user_id in vacation_sessions and process_vacation_message(context, text):
         return
 
     if user_id in user_book_search and user_book_search[user_id]['step'] == 'awaiting_search_query':
@@ -2,25 +2,12 @@ from config import logger, db
 from maxgram.keyboards import InlineKeyboard
 from handlers.authorization_handler import authenticated_users
 from psycopg2.extras import RealDictCursor
-
-def get_safe_user_id(context):
-    """Безопасное получение user_id"""
-    try:
-        return context.message['recipient']['chat_id']
-    except:
-        return "unknown"
-
-def get_db_user_id(chat_id):
-    """Получает user_id из базы данных для авторизованного пользователя"""
-    if chat_id in authenticated_users:
-        user_data = authenticated_users[chat_id]
-        if 'user_info' in user_data and 'user_id' in user_data['user_info']:
-            return user_data['user_info']['user_id']
-    return None
+from DATABASE.prepared_statements import execute_prepared
+from DATABASE.repository import get_chat_id, get_db_user_id
 
 def check_and_show_notifications(context):
     """Проверяет и показывает непрочитанные уведомления"""
-    user_id = get_safe_user_id(context)
+    user_id = get_chat_id(context)
     
     # Проверяем, авторизован ли пользователь
     if user_id not in authenticated_users:
@@ -47,16 +34,14 @@ def get_unread_notifications(user_id):
     """Получает непрочитанные уведомления для пользователя"""
     try:
         with db.conn.cursor(cursor_factory=RealDictCursor) as cur:
-            cur.execute("""
-                SELECT notification_id, type, title, message, created_at
-                FROM notifications 
-                WHERE user_id = %s AND is_read = FALSE
-                ORDER BY created_at DESC
-                LIMIT 10
-            """, (user_id,))
-            return cur.fetchall()
+            execute_prepared(cur, "get_unread_notifications", (user_id,))
+            notifications = cur.fetchall()
+        # Транзакция чтения не остается открытой (см. DATABASE/prepared_statements.py)
+        db.conn.commit()
+        return notifications
     except Exception as e:
         logger.error(f"Ошибка при получении уведомлений: {e}")
+        db.conn.rollback()
         return []
 
 def mark_notifications_as_read(notifications):
@@ -1,12 +1,13 @@
-from applicant.open_days import (get_upcoming_open_days, format_open_days_message,
-                                 is_user_registered, get_open_day_by_id)
-from config import logger, db
+from applicant.open_days import (get_upcoming_open_days, format_open_days_message, get_open_day_by_id,
+                                 register_for_open_day, join_waitlist, cancel_open_day_registration)
+from config import bot, logger, db
 from keyboards.menus import get_open_days_registration_keyboard, get_main_non_auth_keyboard,get_main_auth_keyboard
 from maxgram.keyboards import InlineKeyboard
-from psycopg2.extras import RealDictCursor
+from DATABASE.repository import get_session
+from DATABASE.read_cache import invalidate
 
 # Глобальный словарь для хранения временных данных регистрации
-registration_data = {}
+from handlers.state import registration_data
 
 
 def show_open_days(context):
@@ -27,9 +28,7 @@ def start_open_day_registration(context, event_id, user_id):
     """Начать процесс регистрации на день открытых дверей"""
     try:
         # Проверяем, авторизован ли пользователь
-        from handlers.authorization_handler import authenticated_users
-
-        if user_id in authenticated_users:
+        if get_session(user_id):
             # Авторизованный пользователь - сразу регистрируем с данными из БД
             complete_registration_for_authenticated_user(context, event_id, user_id)
         else:
@@ -51,60 +50,37 @@ def start_open_day_registration(context, event_id, user_id):
 def complete_registration_for_authenticated_user(context, event_id, user_id):
     """Завершение регистрации для авторизованного пользователя"""
     try:
-        from handlers.authorization_handler import authenticated_users
-
-        user_info = authenticated_users[user_id]['user_info']
-        login = user_info['login']
-
-        # Получаем полные данные пользователя из БД
-        with db.conn.cursor(cursor_factory=RealDictCursor) as cur:
-            cur.execute("""
-                SELECT first_name, last_name, phone_number, email, max_id 
-                FROM users 
-                WHERE login = %s
-            """, (login,))
-            db_user = cur.fetchone()
-
-        if not db_user:
+        # Данные профиля уже загружены при авторизации — повторно users не читаем
+        session = get_session(user_id)
+        if not session:
             context.reply("❌ Не удалось найти ваши данные в системе.")
             return
 
-        first_name = db_user['first_name']
-        last_name = db_user['last_name']
-        phone = db_user['phone_number']
-        email = db_user['email']
-        fio = f"{last_name} {first_name}"
-        max_id = db_user['max_id']
-        # Проверяем, не зарегистрирован ли уже пользователь
-        if is_user_registered(db.conn, event_id, max_id):
-            context.reply("❌ Вы уже зарегистрированы на это событие!", keyboard = get_main_auth_keyboard())
-            return
+        user = session.user
+        phone = user.phone_number
+        email = user.email
+        fio = user.full_name
+        max_id = user.max_id
 
-        # Проверяем, есть ли свободные места
         event = get_open_day_by_id(db.conn, event_id)
-        if not event['can_register']:
-            context.reply("❌ К сожалению, на это событие больше нет свободных мест.", keyboard = get_main_auth_keyboard())
+        if not event:
+            context.reply("❌ Событие не найдено.", keyboard = get_main_auth_keyboard())
             return
 
-        # Регистрируем на событие
-        try:
-            with db.conn.cursor() as cur:
-                cur.execute("""
-                    INSERT INTO open_day_registrations (event_id, max_id)
-                    VALUES (%s, %s)
-                """, (event_id, max_id))
-                db.conn.commit()
-        except:
-            db.conn.rollback()
-
-
-        # Получаем информацию о событии для финального сообщения
-        event_info = get_open_day_by_id(db.conn, event_id)
+        # Проверка мест и запись — одним запросом; без мест — лист ожидания
+        status, position = register_or_waitlist(event_id, max_id, user_id)
+        if status == 'already':
+            context.reply("❌ Вы уже зарегистрированы на это событие!", keyboard = get_main_auth_keyboard())
+            return
+        if status == 'waitlist':
+            context.reply(waitlist_message(event, position), keyboard = get_main_auth_keyboard())
+            return
 
+        # Название и дата события не меняются при регистрации — повторно его не читаем
         success_message = (
             "✅ Регистрация завершена успешно!\n\n"
-            f"🎓 Событие: {event_info['faculty_name']}\n"
-            f"📅 Дата: {event_info['event_date']}\n"
+            f"🎓 Событие: {event['faculty_name']}\n"
+            f"📅 Дата: {event['event_date']}\n"
             f"👤 Использованы данные из вашего профиля:\n"
             f"   • ФИО: {fio}\n"
             f"   • Телефон: {phone}\n"
@@ -190,34 +166,25 @@ def complete_registration(context, user_id):
         last_name = fio_parts[0] if len(fio_parts) > 0 else ""
         first_name = fio_parts[1] if len(fio_parts) > 1 else ""
 
-        # Проверяем, не зарегистрирован ли уже пользователь
-        if is_user_registered(db.conn, event_id, user_id):
-            context.reply("❌ Вы уже зарегистрированы на это событие!", keyboard = get_main_non_auth_keyboard())
-            return
-
-        # Проверяем, есть ли свободные места
         event = get_open_day_by_id(db.conn, event_id)
-        if not event['can_register']:
-            context.reply("❌ К сожалению, на это событие больше нет свободных мест.", keyboard = get_main_non_auth_keyboard())
+        if not event:
+            context.reply("❌ Событие не найдено.", keyboard = get_main_non_auth_keyboard())
             return
 
-        # Сохраняем пользователя в БД (если еще нет)
-
-        # Регистрируем на событие
-        with db.conn.cursor() as cur:
-            cur.execute("""
-                INSERT INTO open_day_registrations (event_id, max_id, first_name, last_name)
-                VALUES (%s, %s, %s, %s)
-            """, (event_id, user_id, first_name, last_name))
-            db.conn.commit()
-
-        # Получаем информацию о событии для финального сообщения
-        event_info = get_open_day_by_id(db.conn, event_id)
+        # Проверка мест и запись — одним запросом; без мест — лист ожидания
+        status, position = register_or_waitlist(event_id, user_id, user_id, first_name, last_name)
+        if status == 'already':
+            context.reply("❌ Вы уже зарегистрированы на это событие!", keyboard = get_main_non_auth_keyboard())
+            return
+        if status == 'waitlist':
+            context.reply(waitlist_message(event, position), keyboard = get_main_non_auth_keyboard())
+            return
 
+        # Название и дата события не меняются при регистрации — повторно его не читаем
         success_message = (
             "✅ Регистрация завершена успешно!\n\n"
-            f"🎓 Событие: {event_info['faculty_name']}\n"
-            f"📅 Дата: {event_info['event_date']}\n"
+            f"🎓 Событие: {event['faculty_name']}\n"
+            f"📅 Дата: {event['event_date']}\n"
             f"👤 Ваши данные:\n"
             f"   • ФИО: {fio}\n"
             f"   • Телефон: {phone}\n"
@@ -235,3 +202,70 @@ def complete_registration(context, user_id):
         keyboard_rows.append([{"text": "Назад", "callback": "back_to_menu"}])
         context.reply("❌ Произошла ошибка при завершении регистрации. Попробуйте позже.", keyboard=keyboard_rows)
 
+
+def register_or_waitlist(event_id, max_id, chat_id, first_name=None, last_name=None):
+    """Записать на событие, а если мест нет — в лист ожидания: (статус, место в очереди)
+
+    Статусы: 'registered', 'already', 'waitlist'.
+    """
+    status = register_for_open_day(db.conn, event_id, max_id, first_name, last_name)
+    position = None
+    if status == 'full':
+        position = join_waitlist(db.conn, event_id, max_id, chat_id, first_name, last_name)
+        status = 'already' if position is None else 'waitlist'
+    db.conn.commit()
+    if status == 'registered':
+        # Число свободных мест в списке событий изменилось
+        invalidate("upcoming_open_days")
+    return status, position
+
+
+def waitlist_message(event, position):
+    return (
+        "⏳ Свободных мест на событие нет — вы добавлены в лист ожидания.\n\n"
+        f"🎓 Событие: {event['faculty_name']}\n"
+        f"📅 Дата: {event['event_date']}\n"
+        f"🔢 Ваше место в очереди: {position}\n\n"
+        "Если кто-то отменит запись, мы зарегистрируем вас автоматически и пришлем сообщение."
+    )
+
+
+def cancel_open_day(context, event_id, user_id):
+    """Отменить запись на день открытых дверей или выйти из листа ожидания"""
+    # Авторизованные записаны по max_id из профиля, остальные — по chat_id
+    session = get_session(user_id)
+    max_id = session.user.max_id if session else user_id
+    keyboard = get_main_auth_keyboard() if session else get_main_non_auth_keyboard()
+
+    try:
+        status, promoted = cancel_open_day_registration(db.conn, int(event_id), max_id)
+        db.conn.commit()
+    except Exception as e:
+        logger.error(f"Ошибка отмены записи на день открытых дверей: {e}")
+        db.conn.rollback()
+        context.reply_callback("❌ Не удалось отменить запись. Попробуйте позже.")
+        return
+
+    if status == 'not_found':
+        context.reply_callback("ℹ️ Вы не записаны на это событие.", keyboard=keyboard)
+        return
+    if status == 'left_waitlist':
+        context.reply_callback("✅ Вы удалены из листа ожидания.", keyboard=keyboard)
+        return
+
+    invalidate("upcoming_open_days")
+    context.reply_callback("✅ Запись на день открытых дверей отменена.", keyboard=keyboard)
+    if promoted:
+        notify_promoted(promoted, event_id)
+
+
+def notify_promoted(promoted, event_id):
+    """Сообщить записанному из листа ожидания, что место нашлось"""
+    event = get_open_day_by_id(db.conn, event_id)
+    text = "🎉 Освободилось место — вы зарегистрированы на день открытых дверей!"
+    if event:
+        text += f"\n\n🎓 Событие: {event['faculty_name']}\n📅 Дата: {event['event_date']}"
+    try:
+        bot.api.send_message(promoted['chat_id'], text)
+    except Exception as e:
+        logger.error(f"Не удалось отправить уведомление о записи из листа ожидания: {e}")
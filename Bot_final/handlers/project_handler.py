@@ -1,23 +1,16 @@
 from config import db, logger
 from keyboards.menus import get_student_keyboard
 from psycopg2.extras import RealDictCursor
-from handlers.authorization_handler import authenticated_users
 from maxgram.keyboards import InlineKeyboard
+from DATABASE.repository import get_chat_id, get_db_user_id
+from DATABASE.project_index import index_project, recommend_projects
 
 # Хранилище состояний для создания проекта
-project_creation_sessions = {}
-
-def get_db_user_id(chat_id):
-    """Получает user_id из базы данных для авторизованного пользователя"""
-    if chat_id in authenticated_users:
-        user_data = authenticated_users[chat_id]
-        if 'user_info' in user_data and 'user_id' in user_data['user_info']:
-            return user_data['user_info']['user_id']
-    return None
+from handlers.state import project_creation_sessions
 
 def start_project_creation(context):
     """Начинает процесс создания проекта"""
-    chat_id = context.message['recipient']['chat_id']
+    chat_id = get_chat_id(context)
     db_user_id = get_db_user_id(chat_id)
     
     if not db_user_id:
@@ -36,7 +29,7 @@ def start_project_creation(context):
 
 def process_project_creation(context, text):
     """Обрабатывает шаги создания проекта"""
-    chat_id = context.message['recipient']['chat_id']
+    chat_id = get_chat_id(context)
     
     if chat_id not in project_creation_sessions:
         return False
@@ -90,6 +83,10 @@ def process_project_creation(context, text):
                     session['project_data']['required_roles']
                 ))
                 result = cur.fetchone()
+                
+                # Индексируем роли и описание для рекомендаций (в той же транзакции)
+                index_project(cur, result['project_id'], session['project_data']['title'],
+                              session['project_data']['description'], session['project_data']['required_roles'])
                 db.conn.commit()
                 
                 # Добавляем создателя как участника проекта
@@ -120,47 +117,71 @@ def process_project_creation(context, text):
     
     return False
 
-def get_available_projects(user_id):
-    """Получает доступные проекты для присоединения"""
+# Проектов на одной странице каталога
+PROJECTS_PAGE_SIZE = 10
+
+def get_available_projects(user_id, after_project_id=None, limit=PROJECTS_PAGE_SIZE):
+    """Получает страницу доступных проектов (от новых к старым) после проекта after_project_id"""
     try:
         with db.conn.cursor(cursor_factory=RealDictCursor) as cur:
+            # Курсор — (created_at, project_id) последнего показанного проекта: страница читается
+            # по индексу idx_projects_active_created без OFFSET
             cur.execute("""
-                SELECT p.*, 
-                       u.first_name || ' ' || u.last_name as creator_name,
-                       (SELECT COUNT(*) FROM project_members pm WHERE pm.project_id = p.project_id) as team_size
+                SELECT p.project_id, p.title, p.team_size, p.created_at,
+                       u.first_name || ' ' || u.last_name as creator_name
                 FROM projects p
                 JOIN users u ON p.creator_id = u.user_id
                 WHERE p.status = 'active'
-                AND p.creator_id != %s
-                AND p.project_id NOT IN (
-                    SELECT project_id FROM project_members WHERE user_id = %s
+                AND p.creator_id != %(user_id)s
+                AND (%(after)s::INTEGER IS NULL OR (p.created_at, p.project_id) < (
+                    SELECT created_at, project_id FROM projects WHERE project_id = %(after)s::INTEGER
+                ))
+                AND NOT EXISTS (
+                    SELECT 1 FROM project_members pm
+                    WHERE pm.project_id = p.project_id AND pm.user_id = %(user_id)s
                 )
-                AND p.project_id NOT IN (
-                    SELECT project_id FROM project_applications WHERE user_id = %s AND status = 'pending'
+                AND NOT EXISTS (
+                    SELECT 1 FROM project_applications pa
+                    WHERE pa.project_id = p.project_id AND pa.user_id = %(user_id)s AND pa.status = 'pending'
                 )
-                ORDER BY p.created_at DESC
-            """, (user_id, user_id, user_id))
+                ORDER BY p.created_at DESC, p.project_id DESC
+                LIMIT %(limit)s
+            """, {'user_id': user_id, 'after': after_project_id, 'limit': limit})
             return cur.fetchall()
     except Exception as e:
         logger.error(f"Ошибка при получении проектов: {e}")
+        db.conn.rollback()
         return []
 
-def show_available_projects(context):
-    """Показывает доступные проекты для присоединения"""
-    chat_id = context.message['recipient']['chat_id']
+def show_available_projects(context, after_project_id=None):
+    """Показывает страницу доступных проектов для присоединения"""
+    chat_id = get_chat_id(context)
     db_user_id = get_db_user_id(chat_id)
     
     if not db_user_id:
         context.reply("❌ Вы не авторизованы.")
         return
     
-    projects = get_available_projects(db_user_id)
+    if after_project_id is not None:
+        try:
+            after_project_id = int(after_project_id)
+        except ValueError:
+            after_project_id = None
+
+    # Лишняя запись показывает, есть ли следующая страница
+    projects = get_available_projects(db_user_id, after_project_id, PROJECTS_PAGE_SIZE + 1)
+    has_next = len(projects) > PROJECTS_PAGE_SIZE
+    projects = projects[:PROJECTS_PAGE_SIZE]
     
     if not projects:
-        context.reply("📭 В настоящее время нет доступных проектов для присоединения.")
+        if after_project_id is None:
+            context.reply("📭 В настоящее время нет доступных проектов для присоединения.")
+        else:
+            context.reply("📭 Больше проектов нет.", keyboard=InlineKeyboard(
+                [{"text": "⏮ К началу списка", "callback": "Join_project"}],
+                [{"text": "🔙 Назад", "callback": "back_to_menu"}]
+            ))
         return
-
-
     
     message = "📋 *Доступные проекты:*\n\n"
     keyboard_rows = []
@@ -176,19 +197,62 @@ def show_available_projects(context):
              "callback": f"view_project_{project['project_id']}"}
         ])
     
+    if after_project_id is None:
+        keyboard_rows.append([{"text": "⭐ Подходящие мне", "callback": "recommended_projects"}])
+    navigation = []
+    if after_project_id is not None:
+        navigation.append({"text": "⏮ В начало", "callback": "Join_project"})
+    if has_next:
+        navigation.append({"text": "Далее ➡️", "callback": f"projects_after_{projects[-1]['project_id']}"})
+    if navigation:
+        keyboard_rows.append(navigation)
     keyboard_rows.append([{"text": "🔙 Назад", "callback": "back_to_menu"}])
     keyboard = InlineKeyboard(*keyboard_rows)
     
     context.reply(message, keyboard=keyboard)
 
+def show_recommended_projects(context):
+    """Показывает проекты, подходящие по прошлым заявкам и оценкам студента"""
+    chat_id = get_chat_id(context)
+    db_user_id = get_db_user_id(chat_id)
+    
+    if not db_user_id:
+        context.reply("❌ Вы не авторизованы.")
+        return
+    
+    try:
+        projects = recommend_projects(db.conn, db_user_id)
+    except Exception as e:
+        logger.error(f"Ошибка при подборе проектов: {e}")
+        db.conn.rollback()
+        context.reply("❌ Произошла ошибка при подборе проектов.")
+        return
+    
+    keyboard_rows = []
+    if not projects:
+        message = "📭 Пока не нашлось проектов по вашим заявкам и оценкам. Посмотрите общий список!"
+    else:
+        message = "⭐ *Проекты, которые вам подходят:*\n\n"
+        for i, project in enumerate(projects, 1):
+            message += f"{i}. *{project['title']}*\n"
+            message += f"   👤 Создатель: {project['creator_name']}\n"
+            message += f"   👥 Команда: {project['team_size']} человек\n\n"
+            keyboard_rows.append([
+                {"text": f"📁 {project['title'][:30]}...",
+                 "callback": f"view_project_{project['project_id']}"}
+            ])
+    
+    keyboard_rows.append([{"text": "📋 Все проекты", "callback": "Join_project"}])
+    keyboard_rows.append([{"text": "🔙 Назад", "callback": "back_to_menu"}])
+    context.reply(message, keyboard=InlineKeyboard(*keyboard_rows))
+
 def show_project_details(context, project_id):
     """Показывает детали проекта"""
     try:
         with db.conn.cursor(cursor_factory=RealDictCursor) as cur:
             cur.execute("""
                 SELECT p.*, 
-                       u.first_name || ' ' || u.last_name as creator_name,
-                       (SELECT COUNT(*) FROM project_members pm WHERE pm.project_id = p.project_id) as team_size
+                       u.first_name || ' ' || u.last_name as creator_name
                 FROM projects p
                 JOIN users u ON p.creator_id = u.user_id
                 WHERE p.project_id = %s
@@ -221,7 +285,7 @@ def show_project_details(context, project_id):
                     message += f"• {member['first_name']} {member['last_name']} - {member['role']}\n"
 
             
-            chat_id = context.message['recipient']['chat_id']
+            chat_id = get_chat_id(context)
             db_user_id = get_db_user_id(chat_id)
             
             # Проверяем, не подал ли уже пользователь заявку
@@ -251,7 +315,7 @@ def show_project_details(context, project_id):
 
 def join_project(context, project_id):
     """Обрабатывает присоединение к проекту"""
-    chat_id = context.message['recipient']['chat_id']
+    chat_id = get_chat_id(context)
     db_user_id = get_db_user_id(chat_id)
     
     if not db_user_id:
@@ -294,7 +358,7 @@ def join_project(context, project_id):
 
 def show_my_projects(context):
     """Показывает проекты пользователя"""
-    chat_id = context.message['recipient']['chat_id']
+    chat_id = get_chat_id(context)
     db_user_id = get_db_user_id(chat_id)
     
     if not db_user_id:
@@ -305,9 +369,7 @@ def show_my_projects(context):
         with db.conn.cursor(cursor_factory=RealDictCursor) as cur:
             # Проекты, созданные пользователем
             cur.execute("""
-                SELECT p.*, 
-                       (SELECT COUNT(*) FROM project_members pm WHERE pm.project_id = p.project_id) as team_size,
-                       (SELECT COUNT(*) FROM project_applications pa WHERE pa.project_id = p.project_id AND pa.status = 'pending') as pending_applications
+                SELECT p.*
                 FROM projects p
                 WHERE p.creator_id = %s
                 ORDER BY p.created_at DESC
@@ -316,8 +378,7 @@ def show_my_projects(context):
             
             # Проекты, в которых пользователь участвует
             cur.execute("""
-                SELECT p.*, pm.role,
-                       (SELECT COUNT(*) FROM project_members pm2 WHERE pm2.project_id = p.project_id) as team_size
+                SELECT p.*, pm.role
                 FROM projects p
                 JOIN project_members pm ON p.project_id = pm.project_id
                 WHERE pm.user_id = %s AND pm.status = 'active'
@@ -374,8 +435,7 @@ def show_my_project_details(context, project_id):
     try:
         with db.conn.cursor(cursor_factory=RealDictCursor) as cur:
             cur.execute("""
-                SELECT p.*, 
-                       (SELECT COUNT(*) FROM project_members pm WHERE pm.project_id = p.project_id) as team_size
+                SELECT p.*
                 FROM projects p
                 WHERE p.project_id = %s
             """, (project_id,))
@@ -422,7 +482,7 @@ def show_my_project_details(context, project_id):
 
 def manage_project_applications(context, project_id):
     """Управление заявками на проект"""
-    chat_id = context.message['recipient']['chat_id']
+    chat_id = get_chat_id(context)
     db_user_id = get_db_user_id(chat_id)
     
     if not db_user_id:
@@ -484,7 +544,7 @@ def manage_project_applications(context, project_id):
 
 def accept_application(context, application_id):
     """Принимает заявку на присоединение к проекту"""
-    chat_id = context.message['recipient']['chat_id']
+    chat_id = get_chat_id(context)
     db_user_id = get_db_user_id(chat_id)
     
     if not db_user_id:
@@ -547,7 +607,7 @@ def accept_application(context, application_id):
 
 def reject_application(context, application_id):
     """Отклоняет заявку на присоединение к проекту"""
-    chat_id = context.message['recipient']['chat_id']
+    chat_id = get_chat_id(context)
     db_user_id = get_db_user_id(chat_id)
     
     if not db_user_id:
@@ -1,16 +1,16 @@
-from config import db, logger
+import os
+import threading
+from config import bot, db, logger
 from datetime import datetime
 from psycopg2.extras import RealDictCursor
-from handlers.authorization_handler import authenticated_users
 from maxgram.keyboards import InlineKeyboard
+from DATABASE.repository import get_identity
+from DATABASE.exports import EXPORTS, FORMATS, export_dataset, open_export_connection
+from attachments import send_file
 
-def get_db_user_id(chat_id):
-    """Получает user_id из базы данных для авторизованного пользователя"""
-    if chat_id in authenticated_users:
-        user_data = authenticated_users[chat_id]
-        if 'user_info' in user_data and 'user_id' in user_data['user_info']:
-            return user_data['user_info']['user_id']
-    return None
+# Чаты, для которых сейчас готовится выгрузка (одна выгрузка на чат)
+_exports_in_progress = set()
+_exports_lock = threading.Lock()
 
 def get_rector_stats():
     """Собирает всю статистику для дашборда ректора"""
@@ -18,58 +18,66 @@ def get_rector_stats():
     
     try:
         with db.conn.cursor(cursor_factory=RealDictCursor) as cur:
-            # 1. Средняя успеваемость студентов
+            # 1-15. Все счетчики одним запросом (вместо отдельного запроса на каждый показатель)
             cur.execute("""
-                SELECT ROUND(AVG(grade), 2) as avg_gpa 
-                FROM student_grades
+                SELECT
+                    -- Сводка по факультетам поддерживается триггерами: несколько строк вместо всех оценок
+                    (SELECT ROUND(SUM(grade_sum) / NULLIF(SUM(grade_count), 0), 2) FROM faculty_gpa) as avg_gpa,
+                    (SELECT COUNT(*) FROM news) as news_count,
+                    u.students_count,
+                    u.teachers_count,
+                    u.applicants_count,
+                    p.projects_count,
+                    p.active_projects_count,
+                    d.digital_applications_count,
+                    d.digital_pending,
+                    d.digital_approved,
+                    d.digital_rejected,
+                    (SELECT COUNT(*) FROM open_day_registrations) as open_day_registrations,
+                    ep.total_programs,
+                    ep.total_budget_places,
+                    ep.avg_pass_score,
+                    pa.project_applications_total,
+                    pa.project_applications_pending,
+                    pa.project_applications_approved,
+                    bt.trips_pending,
+                    bt.trips_approved,
+                    v.vacations_pending,
+                    v.vacations_approved,
+                    (SELECT COUNT(*) FROM book_reservations) as book_reservations,
+                    (SELECT COUNT(*) FROM books) as total_books
+                FROM
+                    (SELECT COUNT(*) FILTER (WHERE role = 'student') as students_count,
+                            COUNT(*) FILTER (WHERE role = 'teacher') as teachers_count,
+                            COUNT(*) FILTER (WHERE role = 'applicant') as applicants_count
+                     FROM users) u,
+                    (SELECT COUNT(*) as projects_count,
+                            COUNT(*) FILTER (WHERE status = 'active') as active_projects_count
+                     FROM projects) p,
+                    (SELECT COUNT(*) as digital_applications_count,
+                            COUNT(*) FILTER (WHERE status = 'pending') as digital_pending,
+                            COUNT(*) FILTER (WHERE status = 'approved') as digital_approved,
+                            COUNT(*) FILTER (WHERE status = 'rejected') as digital_rejected
+                     FROM digital_department_applications) d,
+                    (SELECT COUNT(*) as total_programs,
+                            SUM(budget_places) as total_budget_places,
+                            AVG(last_year_pass_score) as avg_pass_score
+                     FROM educational_programs) ep,
+                    (SELECT COUNT(*) as project_applications_total,
+                            COUNT(*) FILTER (WHERE status = 'pending') as project_applications_pending,
+                            COUNT(*) FILTER (WHERE status = 'approved') as project_applications_approved
+                     FROM project_applications) pa,
+                    (SELECT COUNT(*) FILTER (WHERE status = 'pending') as trips_pending,
+                            COUNT(*) FILTER (WHERE status = 'approved') as trips_approved
+                     FROM business_trips) bt,
+                    (SELECT COUNT(*) FILTER (WHERE status = 'pending') as vacations_pending,
+                            COUNT(*) FILTER (WHERE status = 'approved') as vacations_approved
+                     FROM vacations) v
             """)
-            stats['avg_gpa'] = cur.fetchone()['avg_gpa'] or 0.0
-            
-            # 2. Количество новостей
-            cur.execute("SELECT COUNT(*) as count FROM news")
-            stats['news_count'] = cur.fetchone()['count']
-            
-            # 3. Количество студентов
-            cur.execute("SELECT COUNT(*) as count FROM users WHERE role = 'student'")
-            stats['students_count'] = cur.fetchone()['count']
-            
-            # 4. Количество преподавателей
-            cur.execute("SELECT COUNT(*) as count FROM users WHERE role = 'teacher'")
-            stats['teachers_count'] = cur.fetchone()['count']
-            
-            # 5. Количество проектов
-            cur.execute("SELECT COUNT(*) as count FROM projects")
-            stats['projects_count'] = cur.fetchone()['count']
-            
-            # 6. Активные проекты
-            cur.execute("SELECT COUNT(*) as count FROM projects WHERE status = 'active'")
-            stats['active_projects_count'] = cur.fetchone()['count']
-            
-            # 7. Количество заявок на цифровую кафедру
-            cur.execute("SELECT COUNT(*) as count FROM digital_department_applications")
-            stats['digital_applications_count'] = cur.fetchone()['count']
-            
-            # 8. Заявки на цифровую кафедру по статусам
-            cur.execute("""
-                SELECT status, COUNT(*) as count 
-                FROM digital_department_applications 
-                GROUP BY status
-            """)
-            digital_statuses = cur.fetchall()
-            stats['digital_pending'] = 0
-            stats['digital_approved'] = 0
-            stats['digital_rejected'] = 0
-            for status in digital_statuses:
-                if status['status'] == 'pending':
-                    stats['digital_pending'] = status['count']
-                elif status['status'] == 'approved':
-                    stats['digital_approved'] = status['count']
-                elif status['status'] == 'rejected':
-                    stats['digital_rejected'] = status['count']
-            
-            # 9. Количество регистраций на открытые дни
-            cur.execute("SELECT COUNT(*) as count FROM open_day_registrations")
-            stats['open_day_registrations'] = cur.fetchone()['count']
+            stats.update(cur.fetchone())
+            stats['avg_gpa'] = stats['avg_gpa'] or 0.0
+            stats['total_budget_places'] = stats['total_budget_places'] or 0
+            stats['avg_pass_score'] = round(stats['avg_pass_score'] or 0)
             
             # 10. Популярность факультетов по регистрациям на открытые дни
             cur.execute("""
@@ -83,70 +91,6 @@ def get_rector_stats():
             """)
             stats['popular_faculties'] = cur.fetchall()
             
-            # 11. Статистика по образовательным программам
-            cur.execute("""
-                SELECT COUNT(*) as total_programs,
-                       SUM(budget_places) as total_budget_places,
-                       AVG(last_year_pass_score) as avg_pass_score
-                FROM educational_programs
-            """)
-            programs_stats = cur.fetchone()
-            stats['total_programs'] = programs_stats['total_programs']
-            stats['total_budget_places'] = programs_stats['total_budget_places'] or 0
-            stats['avg_pass_score'] = round(programs_stats['avg_pass_score'] or 0)
-            
-            # 12. Количество абитуриентов
-            cur.execute("SELECT COUNT(*) as count FROM users WHERE role = 'applicant'")
-            stats['applicants_count'] = cur.fetchone()['count']
-            
-            # 13. Статистика заявок на проекты
-            cur.execute("""
-                SELECT COUNT(*) as total_applications,
-                       SUM(CASE WHEN status = 'pending' THEN 1 ELSE 0 END) as pending_applications,
-                       SUM(CASE WHEN status = 'approved' THEN 1 ELSE 0 END) as approved_applications
-                FROM project_applications
-            """)
-            project_apps = cur.fetchone()
-            stats['project_applications_total'] = project_apps['total_applications']
-            stats['project_applications_pending'] = project_apps['pending_applications']
-            stats['project_applications_approved'] = project_apps['approved_applications']
-            
-            # 14. Статистика по командировкам и отпускам
-            cur.execute("""
-                SELECT status, COUNT(*) as count 
-                FROM business_trips 
-                GROUP BY status
-            """)
-            trips_stats = cur.fetchall()
-            stats['trips_pending'] = 0
-            stats['trips_approved'] = 0
-            for trip in trips_stats:
-                if trip['status'] == 'pending':
-                    stats['trips_pending'] = trip['count']
-                elif trip['status'] == 'approved':
-                    stats['trips_approved'] = trip['count']
-            
-            cur.execute("""
-                SELECT status, COUNT(*) as count 
-                FROM vacations 
-                GROUP BY status
-            """)
-            vacations_stats = cur.fetchall()
-            stats['vacations_pending'] = 0
-            stats['vacations_approved'] = 0
-            for vacation in vacations_stats:
-                if vacation['status'] == 'pending':
-                    stats['vacations_pending'] = vacation['count']
-                elif vacation['status'] == 'approved':
-                    stats['vacations_approved'] = vacation['count']
-            
-            # 15. Активность библиотеки
-            cur.execute("SELECT COUNT(*) as count FROM book_reservations")
-            stats['book_reservations'] = cur.fetchone()['count']
-            
-            cur.execute("SELECT COUNT(*) as count FROM books")
-            stats['total_books'] = cur.fetchone()['count']
-            
     except Exception as e:
         logger.error(f"Ошибка при сборе статистики для дашборда: {e}")
     
@@ -154,26 +98,15 @@ def get_rector_stats():
 
 def show_rector_dashboard(context):
     """Показывает дашборд ректора"""
-    chat_id = context.message['recipient']['chat_id']
-    db_user_id = get_db_user_id(chat_id)
+    identity = get_identity(context)
     
-    if not db_user_id:
+    if not identity.is_authenticated:
         context.reply("❌ Вы не авторизованы.")
         return
     
-    # Проверяем, что пользователь - ректор
-    user_query = "SELECT role FROM users WHERE user_id = %s"
-    try:
-        with db.conn.cursor(cursor_factory=RealDictCursor) as cur:
-            cur.execute(user_query, (db_user_id,))
-            user_result = cur.fetchone()
-            
-            if not user_result or user_result['role'] != 'rector':
-                context.reply("❌ Эта функция доступна только ректору.")
-                return
-    except Exception as e:
-        logger.error(f"Ошибка при проверке роли пользователя: {e}")
-        context.reply("❌ Произошла ошибка.")
+    # Проверяем, что пользователь - ректор (роль уже есть в сессии)
+    if identity.role != 'rector':
+        context.reply("❌ Эта функция доступна только ректору.")
         return
     
     # Собираем статистику
@@ -241,11 +174,71 @@ def show_rector_dashboard(context):
 
     keyboard = InlineKeyboard(
         [{"text": "🔄 Обновить статистику", "callback": "rector_stats"}],
+        [{"text": "📥 Выгрузить данные", "callback": "rector_exports"}],
         [{"text": "🔙 Назад", "callback": "back_to_menu"}]
     )
     
     context.reply(message, keyboard=keyboard)
 
+def show_export_menu(context):
+    """Меню выгрузок: набор данных и формат файла"""
+    identity = get_identity(context)
+    if not identity.is_authenticated or identity.role != 'rector':
+        context.reply("❌ Эта функция доступна только ректору.")
+        return
+
+    rows = [
+        [{"text": f"{dataset['title']} ({fmt.upper()})", "callback": f"rector_export_{name}_{fmt}"}
+         for fmt in FORMATS]
+        for name, dataset in EXPORTS.items()
+    ]
+    rows.append([{"text": "🔙 Назад", "callback": "rector_stats"}])
+    context.reply("📥 Выгрузка данных\n\nФайл придет сообщением в этот чат.", keyboard=InlineKeyboard(*rows))
+
+def _run_export(chat_id, name, fmt):
+    """Фоновая выгрузка: отдельное соединение, файл отправляется вложением и удаляется"""
+    path = None
+    try:
+        conn = open_export_connection(db.db_config)
+        try:
+            path, count = export_dataset(conn, name, fmt)
+        finally:
+            conn.close()
+        send_file(chat_id, path, f"📥 {EXPORTS[name]['title']}: {count} строк")
+    except Exception as e:
+        logger.error(f"Ошибка выгрузки {name}.{fmt} для чата {chat_id}: {e}")
+        try:
+            bot.api.send_message(chat_id, "❌ Не удалось подготовить файл выгрузки.")
+        except Exception as e:
+            logger.error(f"Не удалось сообщить об ошибке выгрузки в чат {chat_id}: {e}")
+    finally:
+        if path and os.path.exists(path):
+            os.remove(path)
+        with _exports_lock:
+            _exports_in_progress.discard(chat_id)
+
+def start_export(context, export_key):
+    """Запускает выгрузку набора данных (export_key: <набор>_<формат>) в фоне"""
+    identity = get_identity(context)
+    if not identity.is_authenticated or identity.role != 'rector':
+        context.reply("❌ Эта функция доступна только ректору.")
+        return
+
+    name, _, fmt = export_key.rpartition('_')
+    if name not in EXPORTS or fmt not in FORMATS:
+        context.reply("❌ Неизвестная выгрузка.")
+        return
+
+    with _exports_lock:
+        if context.chat_id in _exports_in_progress:
+            context.reply("⏳ Предыдущая выгрузка еще готовится.")
+            return
+        _exports_in_progress.add(context.chat_id)
+
+    threading.Thread(target=_run_export, args=(context.chat_id, name, fmt),
+                     name="rector-export", daemon=True).start()
+    context.reply(f"⏳ Готовлю файл «{EXPORTS[name]['title']}» ({fmt.upper()}), он придет отдельным сообщением.")
+
 def show_detailed_analytics(context):
     """Показывает расширенную аналитику"""
     # Здесь можно добавить более детальную аналитику
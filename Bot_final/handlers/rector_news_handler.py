@@ -1,18 +1,13 @@
 from config import bot, logger, db
 from maxgram.keyboards import InlineKeyboard
 from collections import Counter
+from datetime import date, timedelta
 from urllib.parse import urlparse
-
-def get_safe_user_id(context):
-    """Безопасное получение user_id"""
-    try:
-        return context.message['recipient']['chat_id']
-    except:
-        return "unknown"
+from DATABASE.repository import get_chat_id
 
 def handle_rector_documents(context):
     """Обработчик для кнопки '📑 Последние новости' - загружает новости и показывает последние 10"""
-    user_id = get_safe_user_id(context)
+    user_id = get_chat_id(context)
     
     # Запускаем парсер
     context.reply_callback("🔄 Запускаю парсер новостей... Это может занять несколько секунд.")
@@ -34,7 +29,7 @@ def handle_rector_documents(context):
                 # Формируем сообщение со статистикой и списком новостей
                 message = "✅ Новости успешно загружены!\n\n"
                 message += stats_message
-                message += "\n\n📰 Последние 10 новостей НГТУ:\n\n"
+                message += "\n\n📰 Последние 10 новостей НГТУ (перепечатки одной истории объединены):\n\n"
                 
                 for i, news in enumerate(news_list, 1):
                     sentiment_emoji = {
@@ -54,7 +49,10 @@ def handle_rector_documents(context):
                         source = source[:22] + "..."
                     
                     message += f"{i}. {sentiment_emoji} [{news['sentiment']}] {title}\n"
-                    message += f"   📅 {news['date_text']} | 📰 {source}\n\n"
+                    message += f"   📅 {news['date_text']} | 📰 {source}"
+                    if news['source_count'] > 1:
+                        message += f" (изданий: {news['source_count']})"
+                    message += "\n\n"
                 
                 # Создаем клавиатуру с кнопками-ссылками на каждую новость
                 keyboard_rows = []
@@ -92,12 +90,11 @@ def handle_rector_documents(context):
 def run_parser_with_stats():
     """Запускает парсер и возвращает результаты со статистикой"""
     # Импортируем здесь чтобы избежать циклических импортов
-    from rector.parser import search_google_news_alternative, save_news_to_db
-    
-    query = "НГТУ новости"
+    from rector.crawler import crawl_news
+    from rector.parser import save_news_to_db
     
     print("Запуск парсера новостей...")
-    results = search_google_news_alternative(query)
+    results = crawl_news()
     
     if not results:
         print("Новости не найдены")
@@ -106,7 +103,7 @@ def run_parser_with_stats():
     print(f"Найдено {len(results)} новостей")
     
     # Сохраняем в базу данных
-    save_news_to_db(results)
+    inserted = save_news_to_db(results)
     
     # Считаем статистику
     sentiment_counts = Counter([news['sentiment'] for news in results])
@@ -118,6 +115,8 @@ def run_parser_with_stats():
         count = sentiment_counts.get(sentiment, 0)
         stats_message += f"  {sentiment}: {count} новостей\n"
     stats_message += f"  Средняя оценка тональности: {avg_score:.3f}"
+    if inserted is not None:
+        stats_message += f"\n  Новых в базе: {len(inserted)} из {len(results)}"
     
     # Выводим статистику в консоль (как было раньше)
     print(f"\n{stats_message}")
@@ -125,13 +124,19 @@ def run_parser_with_stats():
     return results, stats_message
 
 def get_recent_news_from_db(limit=10):
-    """Получает последние новости из базы данных"""
+    """Получает последние истории из базы данных: первая новость каждой истории
+    и число изданий, которые ее опубликовали"""
     try:
         with db.conn.cursor() as cur:
             cur.execute("""
-                SELECT title, link, source, date_text, sentiment, sentiment_score
-                FROM news 
-                ORDER BY parsed_at DESC 
+                SELECT n.title, n.link, n.source, n.date_text, n.sentiment, n.sentiment_score, s.source_count
+                FROM news_clusters c
+                JOIN news n ON n.news_id = c.cluster_id
+                CROSS JOIN LATERAL (
+                    SELECT COUNT(DISTINCT substring(m.link from '://([^/]+)')) as source_count
+                    FROM news m WHERE m.cluster_id = c.cluster_id
+                ) s
+                ORDER BY c.last_seen DESC, c.cluster_id DESC
                 LIMIT %s
             """, (limit,))
             
@@ -143,7 +148,8 @@ def get_recent_news_from_db(limit=10):
                     'source': row[2],
                     'date_text': row[3],
                     'sentiment': row[4],
-                    'sentiment_score': float(row[5]) if row[5] else 0.0
+                    'sentiment_score': float(row[5]) if row[5] else 0.0,
+                    'source_count': row[6]
                 })
             
             return news_list
@@ -152,6 +158,49 @@ def get_recent_news_from_db(limit=10):
         print(f"Ошибка при получении новостей из БД: {e}")
         return []
 
+# Периоды тренда: (заголовок, глубина в днях)
+TREND_PERIODS = {
+    'week': ("по неделям за полгода", 182),
+    'day': ("по дням за месяц", 30),
+}
+
+def show_news_sentiment_trend(context, period):
+    """Тренд тональности новостей из сводок news_sentiment_daily / news_sentiment_weekly"""
+    from DATABASE.news_rollups import get_sentiment_trend
+    
+    if period not in TREND_PERIODS:
+        period = 'week'
+    title, depth = TREND_PERIODS[period]
+    
+    try:
+        today = date.today()
+        trend = get_sentiment_trend(db.conn, period, today - timedelta(days=depth), today)
+    except Exception as e:
+        logger.error(f"Ошибка при получении тренда тональности: {e}")
+        db.conn.rollback()
+        trend = None
+    
+    if trend is None:
+        message = "❌ Произошла ошибка при загрузке тренда."
+    elif not trend:
+        message = "📭 За этот период нет новостей с датой публикации."
+    else:
+        message = f"📈 Тональность новостей {title}:\n\n"
+        for start, count, avg_score, positive, neutral, negative in trend:
+            # Пороги как в SentimentAnalyzer.classify_sentiment
+            emoji = "📈" if avg_score > 0.3 else "📉" if avg_score < -0.3 else "😐"
+            message += f"{start.strftime('%d.%m.%Y')} {emoji} {avg_score:+.2f} | {count} нов. (+{positive} / −{negative})\n"
+        total = sum(row[1] for row in trend)
+        average = sum(row[1] * row[2] for row in trend) / total
+        message += f"\nВсего новостей: {total}, средняя оценка: {average:+.3f}"
+    
+    other = 'day' if period == 'week' else 'week'
+    keyboard = InlineKeyboard(
+        [{"text": f"📊 {TREND_PERIODS[other][0].capitalize()}", "callback": f"news_trend_{other}"}],
+        [{"text": "🔙 Назад в меню", "callback": "back_to_menu"}]
+    )
+    context.reply_callback(message, keyboard=keyboard)
+
 def get_clean_news_link(url):
     """Очищает ссылку на новость от параметров Google"""
     try:
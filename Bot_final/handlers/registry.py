@@ -0,0 +1,145 @@
+import importlib
+
+# Ленивый реестр маршрутов: модуль обработчика импортируется при первом нажатии
+# соответствующей кнопки, а не при старте бота
+
+
+class LazyHandler:
+    """Обработчик, модуль которого загружается при первом вызове"""
+    __slots__ = ('module_name', 'func_name', '_func')
+
+    def __init__(self, module_name, func_name):
+        self.module_name = module_name
+        self.func_name = func_name
+        self._func = None
+
+    def __call__(self, *args, **kwargs):
+        if self._func is None:
+            module = importlib.import_module(self.module_name)
+            self._func = getattr(module, self.func_name)
+        return self._func(*args, **kwargs)
+
+    @property
+    def is_loaded(self):
+        return self._func is not None
+
+
+_handlers = {}
+
+
+def lazy(module_name, func_name):
+    """Ленивая ссылка на функцию обработчика (одна на функцию)"""
+    key = (module_name, func_name)
+    if key not in _handlers:
+        _handlers[key] = LazyHandler(module_name, func_name)
+    return _handlers[key]
+
+
+# Как передавать аргументы обработчику:
+#   None     -> handler(context)
+#   'chat'   -> handler(context, chat_id)
+#   'suffix' -> handler(context, <часть payload после префикса>)
+#   'int'    -> handler(context, int(<часть payload после префикса>))
+#   'suffix_chat' -> handler(context, <суффикс>, chat_id)
+
+
+def _route(module, func, args=None, auth=False):
+    return lazy(f"handlers.{module}", func), args, auth
+
+
+# Точные совпадения payload
+ROUTES = {
+    "authorization": _route("authorization_handler", "start_authorization"),
+    "programs": _route("faculty_handlers", "show_faculties"),
+    "can_program": _route("ege_handler", "start_program_selection"),
+    "open_days": _route("open_days_handlers", "show_open_days"),
+    "reset_subjects": _route("ege_handler", "reset_subjects_selection", 'chat'),
+    "show_available_programs": _route("ege_handler", "show_available_programs_result", 'chat'),
+    "logout": _route("authorization_handler", "handle_logout"),
+
+    # Только для авторизованных
+    "rector_documents": _route("rector_news_handler", "handle_rector_documents", auth=True),
+    "business_trip": _route("business_trip_handler", "start_business_trip", auth=True),
+    "cancel_business_trip": _route("business_trip_handler", "cancel_business_trip", auth=True),
+    "arrange_vacation": _route("vacation_handler", "start_vacation", auth=True),
+    "cancel_vacation": _route("vacation_handler", "cancel_vacation", auth=True),
+    "submit_vacation": _route("vacation_handler", "submit_vacation", auth=True),
+    "teacher_classes": _route("schedule_handler", "show_teacher_schedule", auth=True),
+    "student_schedule": _route("schedule_handler", "show_student_schedule", auth=True),
+    "show_notifications": _route("notification_handler", "check_and_show_notifications", auth=True),
+    "find_book": _route("library_handlers", "start_book_search", auth=True),
+    "digital_department": _route("digital_department_handler", "start_digital_department_registration", auth=True),
+    "digital_department_status": _route("digital_department_handler", "show_digital_department_status", auth=True),
+    "create_project": _route("project_handler", "start_project_creation", auth=True),
+    "Join_project": _route("project_handler", "show_available_projects", auth=True),
+    "my_projects": _route("project_handler", "show_my_projects", auth=True),
+    "recommended_projects": _route("project_handler", "show_recommended_projects", auth=True),
+    "approval_inbox": _route("approval_handler", "show_approval_inbox", auth=True),
+    "rector_stats": _route("rector_dashboard_handler", "show_rector_dashboard", auth=True),
+    "detailed_analytics": _route("rector_dashboard_handler", "show_detailed_analytics", auth=True),
+    "rector_exports": _route("rector_dashboard_handler", "show_export_menu", auth=True),
+    "study_certificate": _route("certificate_handler", "handle_study_certificate_request", auth=True),
+    "select_certificate_delivery": _route("certificate_handler", "select_certificate_delivery", auth=True),
+    "confirm_digital_certificate": _route("certificate_handler", "confirm_digital_certificate", auth=True),
+    "confirm_office_certificate": _route("certificate_handler", "confirm_office_certificate", auth=True),
+    "cancel_certificate": _route("certificate_handler", "cancel_certificate", auth=True),
+    "competition": _route("competition_handler", "handle_competition_menu", auth=True),
+    "teacher_contracts": _route("competition_handler", "show_teacher_contract_info", auth=True),
+    "vacancy_competitions": _route("competition_handler", "show_vacancy_competitions", auth=True),
+}
+
+# Маршруты с параметром в payload; проверяются по порядку, более длинные префиксы — раньше
+PREFIX_ROUTES = [
+    ("faculty_", _route("faculty_handlers", "show_faculty_programs", 'suffix')),
+    ("program_", _route("faculty_handlers", "show_program_details", 'suffix')),
+    ("register_open_day_", _route("open_days_handlers", "start_open_day_registration", 'suffix_chat')),
+    ("cancel_open_day_", _route("open_days_handlers", "cancel_open_day", 'suffix_chat')),
+    ("select_subject_", _route("ege_handler", "handle_subject_selection", 'suffix')),
+
+    # Только для авторизованных
+    ("digital_book_", _route("library_handlers", "handle_digital_book_request", 'int', auth=True)),
+    ("reserve_book_", _route("library_handlers", "handle_book_reservation", 'int', auth=True)),
+    ("prev_book_", _route("library_handlers", "handle_navigation", 'int', auth=True)),
+    ("next_book_", _route("library_handlers", "handle_navigation", 'int', auth=True)),
+    ("select_department_", _route("digital_department_handler", "handle_department_selection", 'suffix', auth=True)),
+    ("view_my_project_", _route("project_handler", "show_my_project_details", 'suffix', auth=True)),
+    ("projects_after_", _route("project_handler", "show_available_projects", 'suffix', auth=True)),
+    ("news_trend_", _route("rector_news_handler", "show_news_sentiment_trend", 'suffix', auth=True)),
+    ("rector_export_", _route("rector_dashboard_handler", "start_export", 'suffix', auth=True)),
+    ("view_project_", _route("project_handler", "show_project_details", 'suffix', auth=True)),
+    ("join_project_", _route("project_handler", "join_project", 'suffix', auth=True)),
+    ("manage_project_", _route("project_handler", "manage_project_applications", 'suffix', auth=True)),
+    ("accept_application_", _route("project_handler", "accept_application", 'suffix', auth=True)),
+    ("reject_application_", _route("project_handler", "reject_application", 'suffix', auth=True)),
+    ("approvals_after_", _route("approval_handler", "show_approval_inbox", 'suffix', auth=True)),
+    ("approve_requests_", _route("approval_handler", "approve_requests", 'suffix', auth=True)),
+    ("reject_requests_", _route("approval_handler", "reject_requests", 'suffix', auth=True)),
+    ("certificate_status_", _route("certificate_handler", "show_certificate_status", 'suffix', auth=True)),
+]
+
+
+def resolve(payload):
+    """Найти маршрут по payload: (handler, args, auth, suffix) или None"""
+    route = ROUTES.get(payload)
+    if route is not None:
+        return route + (None,)
+
+    for prefix, route in PREFIX_ROUTES:
+        if payload.startswith(prefix):
+            return route + (payload[len(prefix):],)
+    return None
+
+
+def call(handler, args, context, chat_id, suffix):
+    """Вызвать обработчик маршрута с нужными аргументами"""
+    if args is None:
+        return handler(context)
+    if args == 'chat':
+        return handler(context, chat_id)
+    if args == 'suffix':
+        return handler(context, suffix)
+    if args == 'int':
+        return handler(context, int(suffix))
+    if args == 'suffix_chat':
+        return handler(context, suffix, chat_id)
+    raise ValueError(f"Неизвестный способ передачи аргументов: {args}")
@@ -3,25 +3,13 @@ from maxgram.keyboards import InlineKeyboard
 from datetime import datetime, timedelta
 from handlers.authorization_handler import authenticated_users
 from psycopg2.extras import RealDictCursor
-
-def get_safe_user_id(context):
-    """Безопасное получение user_id"""
-    try:
-        return context.message['recipient']['chat_id']
-    except:
-        return "unknown"
-
-def get_db_user_id(chat_id):
-    """Получает user_id из базы данных для авторизованного пользователя"""
-    if chat_id in authenticated_users:
-        user_data = authenticated_users[chat_id]
-        if 'user_info' in user_data and 'user_id' in user_data['user_info']:
-            return user_data['user_info']['user_id']
-    return None
+from DATABASE.prepared_statements import execute_prepared
+from DATABASE.read_cache import cached_read
+from DATABASE.repository import get_chat_id, get_db_user_id, get_session
 
 def show_student_schedule(context):
     """Показ расписания для студента"""
-    user_id = get_safe_user_id(context)
+    user_id = get_chat_id(context)
     
     # Проверяем, авторизован ли пользователь
     if user_id not in authenticated_users:
@@ -33,8 +21,8 @@ def show_student_schedule(context):
         context.reply("❌ Не удалось найти ваш профиль в системе.")
         return
     
-    # Получаем группу студента
-    group_id = get_student_group(db_user_id)
+    # Группа студента загружается при авторизации; запрос — только если ее нет в сессии
+    group_id = get_session(user_id).user.group_id or get_student_group(db_user_id)
     if not group_id:
         context.reply("❌ Вы не привязаны к учебной группе. Обратитесь в деканат.")
         return
@@ -81,7 +69,7 @@ def show_student_schedule(context):
 
 def show_teacher_schedule(context):
     """Показ расписания для преподавателя"""
-    user_id = get_safe_user_id(context)
+    user_id = get_chat_id(context)
     
     # Проверяем, авторизован ли пользователь
     if user_id not in authenticated_users:
@@ -170,47 +158,46 @@ def get_student_group(user_id):
     """Получает group_id студента"""
     try:
         with db.conn.cursor() as cur:
-            cur.execute("SELECT group_id FROM users WHERE user_id = %s", (user_id,))
+            execute_prepared(cur, "get_student_group", (user_id,))
             result = cur.fetchone()
-            return result[0] if result else None
+        # Транзакция чтения не остается открытой: следующий подготовленный запрос начнет новую
+        # и при потере запроса сервером сможет его повторить (DATABASE/prepared_statements.py)
+        db.conn.commit()
+        return result[0] if result else None
     except Exception as e:
         logger.error(f"Ошибка при получении группы студента: {e}")
+        db.conn.rollback()
         return None
 
 def get_group_schedule(group_id, week_type):
     """Получает расписание группы из БД"""
     try:
-        with db.conn.cursor(cursor_factory=RealDictCursor) as cur:
-            cur.execute("""
-                SELECT s.day_of_week, s.start_time, s.end_time, s.subject_name, s.classroom,
-                       u.first_name, u.last_name, u.surname
-                FROM schedule s
-                LEFT JOIN users u ON s.teacher_id = u.user_id
-                WHERE s.group_id = %s AND s.week_type = %s
-                ORDER BY s.day_of_week, s.start_time
-            """, (group_id, week_type))
-            
-            return cur.fetchall()
+        return load_group_schedule(group_id, week_type)
     except Exception as e:
         logger.error(f"Ошибка при получении расписания группы: {e}")
+        db.conn.rollback()
         return []
 
+@cached_read("group_schedule", ttl=60)
+def load_group_schedule(group_id, week_type):
+    """Вся группа открывает расписание одновременно — запрос выполняется один раз в минуту"""
+    with db.conn.cursor(cursor_factory=RealDictCursor) as cur:
+        execute_prepared(cur, "get_group_schedule", (group_id, week_type))
+        rows = cur.fetchall()
+    db.conn.commit()
+    return rows
+
 def get_teacher_schedule(teacher_id, week_type):
     """Получает расписание преподавателя из БД"""
     try:
         with db.conn.cursor(cursor_factory=RealDictCursor) as cur:
-            cur.execute("""
-                SELECT s.day_of_week, s.start_time, s.end_time, s.subject_name, s.classroom,
-                       g.group_name
-                FROM schedule s
-                LEFT JOIN student_groups g ON s.group_id = g.group_id
-                WHERE s.teacher_id = %s AND s.week_type = %s
-                ORDER BY s.day_of_week, s.start_time
-            """, (teacher_id, week_type))
-            
-            return cur.fetchall()
+            execute_prepared(cur, "get_teacher_schedule", (teacher_id, week_type))
+            rows = cur.fetchall()
+        db.conn.commit()
+        return rows
     except Exception as e:
         logger.error(f"Ошибка при получении расписания преподавателя: {e}")
+        db.conn.rollback()
         return []
 
 def format_schedule_message(schedule, week_type, week_dates, title):
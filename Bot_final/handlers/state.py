@@ -0,0 +1,24 @@
+# Состояние многошаговых диалогов (chat_id -> данные шага).
+# Вынесено в отдельный легкий модуль: диспетчер проверяет, в каком диалоге находится чат,
+# не импортируя сами модули обработчиков (они загружаются лениво, см. handlers/registry.py)
+
+auth_sessions = {}                # authorization_handler
+registration_data = {}            # open_days_handlers
+user_selection_data = {}          # ege_handler
+business_trip_sessions = {}       # business_trip_handler
+vacation_sessions = {}            # vacation_handler
+project_creation_sessions = {}    # project_handler
+digital_department_sessions = {}  # digital_department_handler
+user_book_search = {}             # library_handlers
+
+# Что сохраняется при остановке бота и восстанавливается при следующем запуске (lifecycle.py)
+CONVERSATION_STORES = {
+    'auth_sessions': auth_sessions,
+    'registration_data': registration_data,
+    'user_selection_data': user_selection_data,
+    'business_trip_sessions': business_trip_sessions,
+    'vacation_sessions': vacation_sessions,
+    'project_creation_sessions': project_creation_sessions,
+    'digital_department_sessions': digital_department_sessions,
+    'user_book_search': user_book_search,
+}
@@ -3,25 +3,11 @@ from maxgram.keyboards import InlineKeyboard
 from datetime import datetime, timedelta
 from handlers.authorization_handler import authenticated_users
 from psycopg2.extras import RealDictCursor
-
-def get_safe_user_id(context):
-    """Безопасное получение user_id"""
-    try:
-        return context.message['recipient']['chat_id']
-    except:
-        return "unknown"
-
-def get_db_user_id(chat_id):
-    """Получает user_id из базы данных для авторизованного пользователя"""
-    if chat_id in authenticated_users:
-        user_data = authenticated_users[chat_id]
-        if 'user_info' in user_data and 'user_id' in user_data['user_info']:
-            return user_data['user_info']['user_id']
-    return None
+from DATABASE.repository import get_chat_id, get_db_user_id
 
 def show_teacher_schedule(context):
     """Показ расписания преподавателя"""
-    user_id = get_safe_user_id(context)
+    user_id = get_chat_id(context)
     
     # Проверяем, авторизован ли пользователь
     if user_id not in authenticated_users:
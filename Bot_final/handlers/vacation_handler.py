@@ -3,28 +3,15 @@ from maxgram.keyboards import InlineKeyboard
 from datetime import datetime, timedelta
 import re
 from handlers.authorization_handler import authenticated_users
+from DATABASE.repository import get_chat_id, get_db_user_id
+from handlers.leave_conflicts import check_leave_conflicts
 
 # Глобальный словарь для хранения данных об отпусках
-vacation_sessions = {}
-
-def get_safe_user_id(context):
-    """Безопасное получение user_id"""
-    try:
-        return context.message['recipient']['chat_id']
-    except:
-        return "unknown"
-
-def get_db_user_id(chat_id):
-    """Получает user_id из базы данных для авторизованного пользователя"""
-    if chat_id in authenticated_users:
-        user_data = authenticated_users[chat_id]
-        if 'user_info' in user_data and 'user_id' in user_data['user_info']:
-            return user_data['user_info']['user_id']
-    return None
+from handlers.state import vacation_sessions
 
 def start_vacation(context):
     """Начало оформления отпуска"""
-    user_id = get_safe_user_id(context)
+    user_id = get_chat_id(context)
     
     # Проверяем, авторизован ли пользователь
     if user_id not in authenticated_users:
@@ -61,7 +48,7 @@ def start_vacation(context):
 
 def handle_vacation_dates(context, text):
     """Обработка ввода дат отпуска"""
-    user_id = get_safe_user_id(context)
+    user_id = get_chat_id(context)
     
     if user_id not in vacation_sessions:
         context.reply("❌ Сессия устарела. Начните заново.")
@@ -162,10 +149,27 @@ def confirm_vacation(context, user_id):
         context.reply(message, keyboard=keyboard)
         return
     
+    # Пересечения с другими заявками и отсутствие коллег по кафедре
+    conflict, warning = check_leave_conflicts(session_data['db_user_id'], start_date, end_date)
+    if conflict:
+        vacation_sessions[user_id]['start_date'] = ''
+        vacation_sessions[user_id]['end_date'] = ''
+        vacation_sessions[user_id]['days_count'] = 0
+        vacation_sessions[user_id]['step'] = 'dates'
+        
+        keyboard = InlineKeyboard(
+            [{"text": "🔄 Ввести другие даты", "callback": "arrange_vacation"}],
+            [{"text": "❌ Отмена", "callback": "cancel_vacation"}]
+        )
+        
+        context.reply(conflict, keyboard=keyboard)
+        return
+    
     message = "✅ Проверьте данные отпуска:\n\n"
     message += f"📅 Период: {start_date.strftime('%d.%m.%Y')} - {end_date.strftime('%d.%m.%Y')}\n"
     message += f"⏰ Количество дней: {days_count}\n"
     message += f"📋 Доступно дней: {available_days}\n\n"
+    message += warning
     message += "Всё верно?"
     
     keyboard = InlineKeyboard(
@@ -178,7 +182,7 @@ def confirm_vacation(context, user_id):
 
 def submit_vacation(context):
     """Отправка заявки на отпуск"""
-    user_id = get_safe_user_id(context)
+    user_id = get_chat_id(context)
     
     if user_id not in vacation_sessions:
         context.reply("❌ Сессия устарела. Начните заново.")
@@ -212,7 +216,7 @@ def submit_vacation(context):
 
 def cancel_vacation(context):
     """Отмена оформления отпуска"""
-    user_id = get_safe_user_id(context)
+    user_id = get_chat_id(context)
     
     if user_id in vacation_sessions:
         del vacation_sessions[user_id]
@@ -263,20 +267,23 @@ def save_vacation_to_db(user_id):
         # Используем user_id из базы данных
         db_user_id = session_data['db_user_id']
         
-        # Получаем rector_id (ответственный - ректор)
-        rector_id = get_random_rector_id()
-        
         with db.conn.cursor() as cur:
+            # Ответственный — ректор с самой короткой очередью заявок на согласование
             cur.execute("""
                 INSERT INTO vacations 
                 (user_id, start_date, end_date, days_count, rector_id, status)
-                VALUES (%s, %s, %s, %s, %s, 'pending')
+                SELECT %s, %s, %s, %s, (
+                    SELECT u.user_id FROM users u
+                    WHERE u.role = 'rector'
+                    ORDER BY (SELECT COUNT(*) FROM vacations v
+                              WHERE v.rector_id = u.user_id AND v.status = 'pending'), random()
+                    LIMIT 1
+                ), 'pending'
             """, (
                 db_user_id,
                 session_data['start_date'],
                 session_data['end_date'],
-                session_data['days_count'],
-                rector_id
+                session_data['days_count']
             ))
             
             db.conn.commit()
@@ -287,24 +294,9 @@ def save_vacation_to_db(user_id):
         db.conn.rollback()
         return False
 
-def get_random_rector_id():
-    """Получает ID случайного ректора из БД"""
-    try:
-        with db.conn.cursor() as cur:
-            cur.execute("""
-                SELECT user_id FROM users 
-                WHERE role = 'rector' 
-                LIMIT 1
-            """)
-            result = cur.fetchone()
-            return result[0] if result else None
-    except Exception as e:
-        logger.error(f"Ошибка при получении ректора: {e}")
-        return None
-
 def process_vacation_message(context, text):
     """Обрабатывает текстовые сообщения для отпуска"""
-    user_id = get_safe_user_id(context)
+    user_id = get_chat_id(context)
     
     if user_id not in vacation_sessions:
         return False
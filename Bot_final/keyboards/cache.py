@@ -0,0 +1,62 @@
+import functools
+import threading
+
+from maxgram.keyboards import InlineKeyboard
+
+# Клавиатуры меню одинаковы для всех пользователей: строятся один раз, вложение для API
+# (to_attachment) вычисляется при создании и дальше отдается готовым. Клавиатуры из
+# справочников (факультеты, программы) кэшируются по версии справочника — счетчику
+# в reference_versions, который увеличивают триггеры при любом изменении таблицы.
+
+# Сколько клавиатур с параметром (id программы, события) держать в памяти
+PARAM_KEYBOARDS_MAXSIZE = 1024
+
+
+class StaticKeyboard(InlineKeyboard):
+    """Неизменяемая клавиатура: вложение вычисляется один раз"""
+
+    def __init__(self, *rows):
+        super().__init__(*rows)
+        self._attachment = super().to_attachment()
+
+    def to_attachment(self):
+        return self._attachment
+
+
+def static_keyboard(builder=None, maxsize=None):
+    """Декоратор построителя клавиатуры: результат строится один раз на набор аргументов"""
+    if builder is None:
+        return lambda func: static_keyboard(func, maxsize)
+    return functools.lru_cache(maxsize=maxsize)(builder)
+
+
+class VersionedCache:
+    """Значения по ключу, пока не изменилась версия справочника, из которого они построены.
+    None не кэшируется: построитель возвращает его, когда данные не удалось получить"""
+
+    def __init__(self, maxsize=256):
+        self.maxsize = maxsize
+        self.lock = threading.Lock()
+        self.entries = {}  # key -> (version, value)
+
+    def get_or_build(self, key, version, builder, *args, **kwargs):
+        # Версию не удалось прочитать — строим без кэша
+        if version is None:
+            return builder(*args, **kwargs)
+        with self.lock:
+            entry = self.entries.get(key)
+        if entry is not None and entry[0] == version:
+            return entry[1]
+
+        value = builder(*args, **kwargs)
+        if value is None:
+            return None
+        with self.lock:
+            if len(self.entries) >= self.maxsize and key not in self.entries:
+                self.entries.clear()
+            self.entries[key] = (version, value)
+        return value
+
+    def invalidate(self):
+        with self.lock:
+            self.entries.clear()
@@ -1,15 +1,17 @@
-from maxgram.keyboards import InlineKeyboard
+from keyboards.cache import PARAM_KEYBOARDS_MAXSIZE, StaticKeyboard, static_keyboard
 
 
+@static_keyboard
 def get_main_non_auth_keyboard():
-    return InlineKeyboard(
+    return StaticKeyboard(
         [{"text": "Авторизация", "callback": "authorization"}],
         [{"text": "Ознакомиться с программами ВУЗА", "callback": "programs"}],
         [{"text": "Куда я пройду по баллам ЕГЭ", "callback": "can_program"}],
         [{"text": "День открытых дверей", "callback": "open_days"}]
     )
+@static_keyboard
 def get_main_auth_keyboard():
-    return InlineKeyboard(
+    return StaticKeyboard(
         [{"text": "Ознакомиться с программами ВУЗА", "callback": "programs"}],
         [{"text": "Куда я пройду по баллам ЕГЭ", "callback": "can_program"}],
         [{"text": "День открытых дверей", "callback": "open_days"}]
@@ -17,6 +19,7 @@ def get_main_auth_keyboard():
 
 
 def get_faculties_keyboard(faculty_names,keys):
+    """Клавиатура списка факультетов; кэшируется вызывающим по версии справочника"""
     keyboard_rows = []
     idx = 0
     for i in faculty_names:
@@ -25,10 +28,11 @@ def get_faculties_keyboard(faculty_names,keys):
         ])
         idx += 1
     keyboard_rows.append([{"text": "Назад", "callback": "back_to_menu"}])
-    return InlineKeyboard(*keyboard_rows)
+    return StaticKeyboard(*keyboard_rows)
 
 
 def get_programs_keyboard(programs):
+    """Клавиатура программ факультета; кэшируется вызывающим по версии справочника"""
     keyboard_rows = []
     for program in programs:
         program_name = program['program_name']
@@ -42,11 +46,12 @@ def get_programs_keyboard(programs):
         {"text": "🔙 Назад к факультетам", "callback": "programs"},
         {"text": "🏠 Главное меню", "callback": "back_to_menu"}
     ])
-    return InlineKeyboard(*keyboard_rows)
+    return StaticKeyboard(*keyboard_rows)
 
 
+@static_keyboard(maxsize=PARAM_KEYBOARDS_MAXSIZE)
 def get_program_detail_keyboard(faculty_id):
-    return InlineKeyboard(
+    return StaticKeyboard(
         [
             {"text": "📋 Вернуться к программам", "callback": f"faculty_{faculty_id}"},
             {"text": "🎓 Все факультеты", "callback": "programs"}
@@ -57,6 +62,7 @@ def get_program_detail_keyboard(faculty_id):
     )
 
 
+@static_keyboard(maxsize=PARAM_KEYBOARDS_MAXSIZE)
 def get_open_days_registration_keyboard(event_id, event_index=None):
     """Создает клавиатуру для регистрации на конкретное событие"""
     if event_index:
@@ -64,17 +70,21 @@ def get_open_days_registration_keyboard(event_id, event_index=None):
     else:
         button_text = "📝 Записаться"
 
-    return InlineKeyboard(
+    return StaticKeyboard(
         [
             {"text": button_text, "callback": f"register_open_day_{event_id}"}
         ],
+        [
+            {"text": "❌ Отменить запись", "callback": f"cancel_open_day_{event_id}"}
+        ],
         [
             {"text": "🔙 Назад", "callback": "back_to_menu"}
         ]
     )
 
+@static_keyboard
 def get_app_keyboard():
-    keyboard = InlineKeyboard(
+    keyboard = StaticKeyboard(
         [{"text": "📚 Ознакомиться с программами", "callback": "programs"}],
         [{"text": "🎯 Подбор программ по баллам", "callback": "can_program"}],
         [{"text": "📅 Дни открытых дверей", "callback": "open_days"}],
@@ -82,8 +92,9 @@ def get_app_keyboard():
     )
     return keyboard
 
+@static_keyboard
 def get_student_keyboard():
-    keyboard = InlineKeyboard(
+    keyboard = StaticKeyboard(
         [{"text": "📖 Мое расписание", "callback": "student_schedule"}],
         [{"text": "🔔 Уведомления", "callback": "show_notifications"}],
         [{"text": "📊 Записаться на цифровую кафедру", "callback": "digital_department"}],  
@@ -97,8 +108,9 @@ def get_student_keyboard():
     )
     return keyboard
 
+@static_keyboard
 def get_teacher_keyboard():
-    keyboard = InlineKeyboard(
+    keyboard = StaticKeyboard(
         [{"text": "👨‍🏫 Мои занятия", "callback": "teacher_classes"}],
         [{"text": "🔔 Уведомления", "callback": "show_notifications"}],
         [{"text": "📝 Оформить командировку", "callback": "business_trip"}],
@@ -108,17 +120,31 @@ def get_teacher_keyboard():
     )
     return keyboard
 
+@static_keyboard
 def get_rector_keyboard():
-    keyboard = InlineKeyboard(
+    keyboard = StaticKeyboard(
         [{"text": "📊 Дашборд университета", "callback": "rector_stats"}],
         [{"text": "📑 Последние новости", "callback": "rector_documents"}],
+        [{"text": "📈 Тренд тональности новостей", "callback": "news_trend_week"}],
+        [{"text": "📥 Заявки на согласование", "callback": "approval_inbox"}],
+        [{"text": "🚪 Выйти", "callback": "logout"}]
+    )
+
+    return keyboard
+
+@static_keyboard
+def get_dean_keyboard():
+    keyboard = StaticKeyboard(
+        [{"text": "📥 Заявки на согласование", "callback": "approval_inbox"}],
+        [{"text": "🔔 Уведомления", "callback": "show_notifications"}],
         [{"text": "🚪 Выйти", "callback": "logout"}]
     )
 
     return keyboard
 
+@static_keyboard
 def get_auth_keyboard():
-    keyboard = InlineKeyboard(
+    keyboard = StaticKeyboard(
         [{"text": "Авторизация", "callback": "authorization"}],
     )
     return keyboard
\ No newline at end of file
@@ -0,0 +1,149 @@
+import functools
+import logging
+import os
+import signal
+import sys
+import threading
+import time
+
+from config import bot, db, logger
+from handlers.state import CONVERSATION_STORES
+from DATABASE.repository import authenticated_users, get_users_by_ids, SessionRecord
+from DATABASE.conversation_state import SESSION_STORE, save_state, load_state
+
+# Сколько ждать дообработки уже полученных обновлений после SIGTERM, секунд.
+# Должно быть меньше stop_grace_period в docker-compose.yml
+DRAIN_TIMEOUT = float(os.getenv("SHUTDOWN_DRAIN_TIMEOUT", "20"))
+
+# Бот либо ждет ответа лонгполлинга, либо обрабатывает полученную пачку обновлений.
+# Останавливаться сразу безопасно только в первом случае: пачка еще не получена.
+_gate = threading.Lock()
+_waiting_for_updates = False
+_stopping = threading.Event()
+_finished = threading.Event()
+
+# Сброс буферов на диск перед os._exit, который пропускает atexit: (модуль, функция).
+# Вызываются только для уже загруженных модулей — остановка ничего не импортирует
+FLUSH_ON_EXIT = (
+    ("rector.morphology", "flush_lemma_cache"),
+)
+
+
+def _track_polling(get_updates):
+    @functools.wraps(get_updates)
+    def wrapper(*args, **kwargs):
+        global _waiting_for_updates
+        with _gate:
+            _waiting_for_updates = True
+        try:
+            return get_updates(*args, **kwargs)
+        finally:
+            # Если идет остановка, поток ждет здесь до выхода процесса и пачку не отдает
+            with _gate:
+                _waiting_for_updates = False
+    return wrapper
+
+
+def checkpoint_state(conn=None):
+    """Сохранить незавершенные диалоги и авторизации"""
+    try:
+        saved = save_state(conn or db.conn, CONVERSATION_STORES, authenticated_users)
+        logger.info(f"Сохранено состояние диалогов: {saved} записей")
+    except Exception as e:
+        logger.error(f"Ошибка при сохранении состояния диалогов: {e}")
+
+
+def restore_state():
+    """Вернуть состояние, сохраненное при прошлой остановке"""
+    try:
+        rows = load_state(db.conn)
+    except Exception as e:
+        logger.error(f"Ошибка при восстановлении состояния диалогов: {e}")
+        return
+
+    session_rows = [(chat_id, data) for chat_id, store, data in rows if store == SESSION_STORE]
+    # Пользователей перечитываем из БД одним запросом: роль или группа могли измениться
+    users = get_users_by_ids(db.conn, [data['user_id'] for _, data in session_rows])
+    for chat_id, data in session_rows:
+        user = users.get(data['user_id'])
+        if user is not None:
+            authenticated_users[chat_id] = SessionRecord(user, data.get('authenticated_at'))
+
+    dialogs = 0
+    for chat_id, store, data in rows:
+        if store in CONVERSATION_STORES:
+            CONVERSATION_STORES[store][chat_id] = data
+            dialogs += 1
+    logger.info(f"Восстановлено авторизаций: {len(authenticated_users)}, диалогов: {dialogs}")
+
+
+def _flush_buffers():
+    for module_name, func_name in FLUSH_ON_EXIT:
+        module = sys.modules.get(module_name)
+        if module is None:
+            continue
+        try:
+            getattr(module, func_name)()
+        except Exception as e:
+            logger.error(f"Ошибка при сбросе {module_name}.{func_name}: {e}")
+
+
+def _exit_process():
+    # os._exit не выполняет обработчики atexit, поэтому буферы сбрасываем сами
+    _flush_buffers()
+    db.close()
+    logging.shutdown()
+    os._exit(0)
+
+
+def _drain_and_exit():
+    """Ждем, пока бот дообработает полученные обновления, затем сохраняем состояние и выходим"""
+    deadline = time.monotonic() + DRAIN_TIMEOUT
+    while time.monotonic() < deadline:
+        if _finished.wait(0.1):
+            # Цикл бота завершился сам, остальное сделает shutdown()
+            return
+        with _gate:
+            if _waiting_for_updates:
+                # Обработчики не выполняются; ответ лонгполлинга не нужен — обновления
+                # из него сервер отдаст следующему запуску
+                checkpoint_state()
+                _exit_process()
+
+    logger.warning(f"Обработка обновлений не завершилась за {DRAIN_TIMEOUT} с, сохраняем состояние")
+    import psycopg2
+
+    # Основное соединение занято незавершенным обработчиком — берем отдельное
+    try:
+        conn = psycopg2.connect(**db.db_config)
+        try:
+            checkpoint_state(conn)
+        finally:
+            conn.close()
+    except Exception as e:
+        logger.error(f"Не удалось сохранить состояние диалогов: {e}")
+    _exit_process()
+
+
+def _handle_signal(signum, frame):
+    if _stopping.is_set():
+        return
+    _stopping.set()
+    logger.info(f"Получен сигнал {signal.Signals(signum).name}, прекращаем прием обновлений")
+    bot.stop()
+    threading.Thread(target=_drain_and_exit, name="shutdown-drain", daemon=True).start()
+
+
+def install_signal_handlers():
+    """SIGTERM (docker stop) и SIGINT останавливают бота без потери диалогов"""
+    bot.api.get_updates = _track_polling(bot.api.get_updates)
+    signal.signal(signal.SIGTERM, _handle_signal)
+    signal.signal(signal.SIGINT, _handle_signal)
+
+
+def shutdown():
+    """Завершение после выхода из цикла бота"""
+    with _gate:
+        checkpoint_state()
+        db.close()
+        _finished.set()
@@ -0,0 +1,126 @@
+import threading
+import time
+from array import array
+
+# Ограничение частоты запросов перед диспетчером: общий бакет токенов на чат,
+# отдельные бакеты на дорогие маршруты, отбрасывание повторных нажатий одной кнопки.
+
+# Общий бакет чата: емкость и пополнение (токенов в секунду)
+CHAT_CAPACITY = 20
+CHAT_RATE = 2.0
+
+# Дорогие маршруты: (емкость, токенов в секунду) на чат
+ROUTE_LIMITS = {
+    "rector_documents": (1, 1 / 60),      # запускает парсер новостей
+    "rector_stats": (3, 1 / 10),
+    "detailed_analytics": (3, 1 / 10),
+    "rector_export_": (2, 1 / 60),        # выгрузка архива в файл
+    "show_available_programs": (5, 1 / 5),
+    "find_book": (5, 1 / 5),
+    "student_schedule": (5, 1 / 5),
+    "teacher_classes": (5, 1 / 5),
+}
+
+# Повторное нажатие той же кнопки в течение окна не обрабатывается
+DUPLICATE_WINDOW = 1.0
+
+# Чаты без активности дольше этого времени забываются (их бакеты к этому моменту полные)
+IDLE_TTL = 600
+SWEEP_EVERY = 1000
+
+ALLOWED = "allowed"
+DUPLICATE = "duplicate"
+LIMITED = "limited"
+
+
+class RateLimiter:
+    """Бакеты токенов в плоских массивах: у каждого активного чата свой номер слота,
+    на слот приходится по одному double на токены и время каждого бакета"""
+
+    def __init__(self, chat_capacity=CHAT_CAPACITY, chat_rate=CHAT_RATE, route_limits=ROUTE_LIMITS,
+                 duplicate_window=DUPLICATE_WINDOW, idle_ttl=IDLE_TTL, clock=time.monotonic):
+        # Бакет 0 — общий бакет чата, остальные — по маршрутам из route_limits
+        self.route_index = {route: i for i, route in enumerate(route_limits, 1)}
+        self.capacity = [float(chat_capacity)] + [float(limit[0]) for limit in route_limits.values()]
+        self.rate = [float(chat_rate)] + [float(limit[1]) for limit in route_limits.values()]
+        self.duplicate_window = duplicate_window
+        self.idle_ttl = idle_ttl
+        self.clock = clock
+
+        self.slots = {}                 # chat_id -> номер слота
+        self.free_slots = []
+        self.tokens = [array('d') for _ in self.capacity]
+        self.updated = [array('d') for _ in self.capacity]
+        self.last_seen = array('d')
+        self.last_payload = array('q')  # hash последнего payload чата
+        self.calls = 0
+        self.lock = threading.Lock()
+
+    def _slot(self, chat_id, now):
+        slot = self.slots.get(chat_id)
+        if slot is not None:
+            return slot
+
+        if self.free_slots:
+            slot = self.free_slots.pop()
+            for bucket, capacity in enumerate(self.capacity):
+                self.tokens[bucket][slot] = capacity
+                self.updated[bucket][slot] = now
+            self.last_seen[slot] = 0.0
+            self.last_payload[slot] = 0
+        else:
+            slot = len(self.last_seen)
+            for bucket, capacity in enumerate(self.capacity):
+                self.tokens[bucket].append(capacity)
+                self.updated[bucket].append(now)
+            self.last_seen.append(0.0)
+            self.last_payload.append(0)
+        self.slots[chat_id] = slot
+        return slot
+
+    def _take(self, bucket, slot, now):
+        tokens = self.tokens[bucket]
+        updated = self.updated[bucket]
+        available = min(self.capacity[bucket], tokens[slot] + (now - updated[slot]) * self.rate[bucket])
+        updated[slot] = now
+        if available < 1.0:
+            tokens[slot] = available
+            return False
+        tokens[slot] = available - 1.0
+        return True
+
+    def _sweep(self, now):
+        idle = [chat_id for chat_id, slot in self.slots.items() if now - self.last_seen[slot] > self.idle_ttl]
+        for chat_id in idle:
+            self.free_slots.append(self.slots.pop(chat_id))
+
+    def check(self, chat_id, route=None, payload=None):
+        """ALLOWED, DUPLICATE (то же нажатие в пределах окна) или LIMITED"""
+        now = self.clock()
+        with self.lock:
+            self.calls += 1
+            if self.calls % SWEEP_EVERY == 0:
+                self._sweep(now)
+
+            slot = self._slot(chat_id, now)
+            if payload is not None:
+                payload_hash = hash(payload)
+                if (self.last_payload[slot] == payload_hash
+                        and now - self.last_seen[slot] < self.duplicate_window):
+                    return DUPLICATE
+                self.last_payload[slot] = payload_hash
+            self.last_seen[slot] = now
+
+            if not self._take(0, slot, now):
+                return LIMITED
+            bucket = self.route_index.get(route)
+            if bucket is not None and not self._take(bucket, slot, now):
+                # Общий токен не возвращаем: отклоненное нажатие тоже нагрузка
+                return LIMITED
+            return ALLOWED
+
+    def active_chats(self):
+        return len(self.slots)
+
+
+limiter = RateLimiter()
@@ -0,0 +1,231 @@
+"""Сбор новостей из нескольких источников: поисковые запросы Google и RSS/Atom-ленты сайтов
+
+Источники опрашиваются параллельно через общий requests.Session с пулом соединений,
+не более PER_HOST_LIMIT одновременных запросов к одному хосту, с повторами и экспоненциальной
+паузой на 429/5xx. Повторный запрос к источнику идет с If-None-Match / If-Modified-Since:
+на 304 используются карточки, разобранные в прошлый раз. Результаты всех источников
+сливаются в один поток без повторов по нормализованной ссылке.
+
+Адреса и запросы настраиваются через окружение (и подменяются на локальную заглушку в
+benchmarks/crawler_stub.py):
+    NEWS_QUERIES="НГТУ новости;НЭТИ"          поисковые запросы через ;
+    NEWS_FEEDS="https://a/rss https://b/atom"  ленты через пробел
+    GOOGLE_SEARCH_URL                          адрес поиска
+"""
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+
+import requests
+from lxml import etree
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from rector import parser as news_parser
+
+GOOGLE_SEARCH_URL = os.getenv("GOOGLE_SEARCH_URL", "https://www.google.com/search")
+NEWS_QUERIES = [query.strip() for query in os.getenv("NEWS_QUERIES", "НГТУ новости").split(";") if query.strip()]
+NEWS_FEEDS = os.getenv("NEWS_FEEDS", "").split()
+
+# Одновременных запросов всего и к одному хосту
+CRAWLER_WORKERS = 8
+PER_HOST_LIMIT = 2
+REQUEST_TIMEOUT = 15
+
+HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+}
+
+# Повторы: 3 попытки с паузой 0.5, 1, 2 с; Retry-After сервера учитывается
+RETRY = Retry(
+    total=3,
+    backoff_factor=0.5,
+    status_forcelist=(429, 500, 502, 503, 504),
+    allowed_methods=frozenset({'GET'}),
+    respect_retry_after_header=True,
+    raise_on_status=False,
+)
+
+FEED_PARSER = etree.XMLParser(recover=True, resolve_entities=False, no_network=True)
+# RSS 2.0 (item) и Atom (entry) без учета пространств имен
+FEED_ITEMS_XPATH = etree.XPath("//*[local-name()='item' or local-name()='entry']")
+
+_session = None
+_session_lock = threading.Lock()
+
+# Семафоры хостов и валидаторы условных запросов общие на процесс
+_host_limits = {}
+_host_limits_lock = threading.Lock()
+_validators = {}
+_validators_lock = threading.Lock()
+
+
+def google_source(query, url=None):
+    return {
+        'kind': 'google',
+        'name': query,
+        'url': url or GOOGLE_SEARCH_URL,
+        'params': {
+            'q': query,
+            'tbm': 'nws',
+            'hl': 'ru',
+            'gl': 'ru',
+            'ceid': 'RU:ru',
+            'tbs': 'qdr:w'
+        },
+    }
+
+
+def feed_source(url):
+    return {'kind': 'feed', 'name': url, 'url': url, 'params': None}
+
+
+def news_sources(queries=None, feeds=None):
+    """Источники из настроек: сначала поисковые запросы, затем ленты"""
+    queries = NEWS_QUERIES if queries is None else queries
+    feeds = NEWS_FEEDS if feeds is None else feeds
+    return [google_source(query) for query in queries] + [feed_source(url) for url in feeds]
+
+
+def create_session(pool_size=CRAWLER_WORKERS):
+    """Сессия с пулом keep-alive соединений на хост и повторами"""
+    session = requests.Session()
+    session.headers.update(HEADERS)
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=RETRY)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+def get_session():
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = create_session()
+        return _session
+
+
+def _host_limit(url):
+    host = urlsplit(url).netloc
+    with _host_limits_lock:
+        if host not in _host_limits:
+            _host_limits[host] = threading.BoundedSemaphore(PER_HOST_LIMIT)
+        return _host_limits[host]
+
+
+def _feed_date(value):
+    """Дата из pubDate (RFC 822) или published/updated (ISO 8601) в формате дд.мм.гггг"""
+    if not value:
+        return ""
+    try:
+        return parsedate_to_datetime(value).strftime("%d.%m.%Y")
+    except (TypeError, ValueError):
+        pass
+    try:
+        return datetime.fromisoformat(value).strftime("%d.%m.%Y")
+    except ValueError:
+        return value
+
+
+def extract_feed_items(content, feed_url):
+    """Разбирает RSS/Atom-ленту: карточки в том же виде, что extract_news_cards"""
+    root = etree.fromstring(content, FEED_PARSER)
+    if root is None:
+        return
+    source = root.xpath(
+        "string((//*[local-name()='channel' or local-name()='feed'])[1]/*[local-name()='title'])"
+    ).strip() or urlsplit(feed_url).netloc
+    for item in FEED_ITEMS_XPATH(root):
+        link = (item.xpath("string(*[local-name()='link'])").strip()
+                or item.xpath("string(*[local-name()='link']/@href)").strip())
+        yield {
+            'title': " ".join(item.xpath("string(*[local-name()='title'])").split()),
+            'link': news_parser.normalize_link(link),
+            'source': source,
+            'date_text': _feed_date(item.xpath(
+                "string(*[local-name()='pubDate' or local-name()='published' or local-name()='updated'])"
+            ).strip()),
+        }
+
+
+def fetch_source(session, source):
+    """Загружает и разбирает один источник: (карточки, не изменился ли с прошлого раза)"""
+    key = (source['url'], tuple(sorted((source['params'] or {}).items())))
+    with _validators_lock:
+        cached = _validators.get(key)
+
+    headers = {}
+    if cached:
+        if cached['etag']:
+            headers['If-None-Match'] = cached['etag']
+        if cached['last_modified']:
+            headers['If-Modified-Since'] = cached['last_modified']
+
+    with _host_limit(source['url']):
+        response = session.get(source['url'], params=source['params'], headers=headers, timeout=REQUEST_TIMEOUT)
+
+    if response.status_code == 304 and cached:
+        return cached['items'], True
+    response.raise_for_status()
+
+    if source['kind'] == 'google':
+        if news_parser.NEWS_PAGES_DIR:
+            news_parser.save_result_page(response.text, source['name'])
+        items = list(news_parser.extract_news_cards(response.text))
+    else:
+        items = list(extract_feed_items(response.content, source['url']))
+
+    etag = response.headers.get('ETag')
+    last_modified = response.headers.get('Last-Modified')
+    if etag or last_modified:
+        with _validators_lock:
+            _validators[key] = {'etag': etag, 'last_modified': last_modified, 'items': items}
+    return items, False
+
+
+def crawl_news(sources=None, session=None, workers=CRAWLER_WORKERS):
+    """Опрашивает источники параллельно и возвращает новости без повторов с оценкой тональности
+    (в том же виде, что search_google_news_alternative). Ошибка источника не прерывает сбор"""
+    sources = news_sources() if sources is None else sources
+    if not sources:
+        return []
+    session = session or get_session()
+
+    with ThreadPoolExecutor(max_workers=min(workers, len(sources)), thread_name_prefix="news-crawler") as pool:
+        futures = [pool.submit(fetch_source, session, source) for source in sources]
+
+    cards = []
+    seen = set()
+    # Порядок источников сохраняется: при повторе остается карточка из более раннего источника
+    for source, future in zip(sources, futures):
+        try:
+            items, not_modified = future.result()
+        except Exception as e:
+            print(f"Ошибка при загрузке источника {source['name']}: {e}")
+            continue
+        for card in items:
+            if not card['title'] or not card['link'] or card['link'] in seen:
+                continue
+            seen.add(card['link'])
+            cards.append(card)
+
+    # Тональность всех уникальных заголовков одним пакетом
+    from rector.sentiment_batch import BatchSentimentScorer
+    sentiments = BatchSentimentScorer().analyze([card['title'] for card in cards])
+
+    news_results = []
+    for card, (sentiment, score) in zip(cards, sentiments):
+        date_text = news_parser.format_date(card['date_text'])
+        news_results.append({
+            'title': card['title'],
+            'link': card['link'],
+            'source': card['source'],
+            'date_text': date_text,
+            'published_at': news_parser.parse_published_date(date_text),
+            'sentiment': sentiment,
+            'sentiment_score': round(score, 3)
+        })
+    return news_results
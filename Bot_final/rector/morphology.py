@@ -0,0 +1,134 @@
+# Общий морфологический анализатор для модулей новостей и рекомендаций проектов.
+# pymorphy3 грузит словари ~полсекунды и десятки мегабайт памяти, поэтому импортируется
+# и создается только при первом обращении, а не при старте бота.
+#
+# Разборы слов кэшируются в SQLite (LEMMA_CACHE_PATH): при первом обращении файл целиком
+# читается в память, новые слова дописываются пачками. Файл общий для процессов (WAL) и
+# переживает перезапуск, поэтому на знакомой лексике заголовков pymorphy3 даже не загружается
+import atexit
+import logging
+import os
+import re
+import sqlite3
+import threading
+
+logger = logging.getLogger(__name__)
+
+# По умолчанию — в пользовательском кэше (XDG), а не в каталоге с кодом
+LEMMA_CACHE_PATH = os.getenv(
+    "LEMMA_CACHE_PATH",
+    os.path.join(os.getenv("XDG_CACHE_HOME") or os.path.expanduser("~/.cache"), "education_bot", "lemmas.sqlite"),
+)
+# Сколько новых разборов копить перед записью в файл
+LEMMA_FLUSH_SIZE = 200
+
+_morph = None
+
+# Слово -> (нормальная форма, часть речи)
+_parses = {}
+_pending = []
+_cache_db = None
+_cache_ready = False
+_cache_lock = threading.Lock()
+
+
+def get_morph_analyzer():
+    """Общий экземпляр pymorphy3.MorphAnalyzer (создается лениво, один на процесс)"""
+    global _morph
+    if _morph is None:
+        import pymorphy3
+        _morph = pymorphy3.MorphAnalyzer()
+    return _morph
+
+
+def _open_cache():
+    """Открыть файл кэша и прочитать его в память (под _cache_lock, один раз на процесс)"""
+    global _cache_db, _cache_ready
+    _cache_ready = True
+    try:
+        os.makedirs(os.path.dirname(LEMMA_CACHE_PATH), exist_ok=True)
+        conn = sqlite3.connect(LEMMA_CACHE_PATH, timeout=5, check_same_thread=False, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS lemmas (
+                word TEXT PRIMARY KEY,
+                normal_form TEXT NOT NULL,
+                pos TEXT
+            ) WITHOUT ROWID
+        """)
+        for word, normal, pos in conn.execute("SELECT word, normal_form, pos FROM lemmas"):
+            _parses[word] = (normal, pos)
+        _cache_db = conn
+        atexit.register(flush_lemma_cache)
+    except sqlite3.Error as e:
+        # Без файла кэш работает только в памяти процесса
+        logger.warning(f"Кэш лемм {LEMMA_CACHE_PATH} недоступен: {e}")
+
+
+def flush_lemma_cache():
+    """Записать накопленные разборы в файл кэша"""
+    with _cache_lock:
+        if not _pending or _cache_db is None:
+            _pending.clear()
+            return
+        try:
+            with _cache_db:
+                _cache_db.executemany("INSERT OR IGNORE INTO lemmas VALUES (?, ?, ?)", _pending)
+        except sqlite3.Error as e:
+            logger.warning(f"Не удалось сохранить кэш лемм: {e}")
+        _pending.clear()
+
+
+def parse_word(word):
+    """(нормальная форма, часть речи) слова: из кэша, иначе pymorphy3 с записью в кэш"""
+    cached = _parses.get(word)
+    if cached is not None:
+        return cached
+
+    with _cache_lock:
+        if not _cache_ready:
+            _open_cache()
+            cached = _parses.get(word)
+        elif _cache_db is not None:
+            # Слово мог разобрать другой процесс после загрузки кэша
+            try:
+                row = _cache_db.execute("SELECT normal_form, pos FROM lemmas WHERE word = ?", (word,)).fetchone()
+            except sqlite3.Error:
+                row = None
+            if row:
+                cached = _parses[word] = (row[0], row[1])
+    if cached is not None:
+        return cached
+
+    parsed = get_morph_analyzer().parse(word)[0]
+    result = _parses[word] = (parsed.normal_form, parsed.tag.POS)
+    with _cache_lock:
+        _pending.append((word, result[0], result[1]))
+        full = len(_pending) >= LEMMA_FLUSH_SIZE
+    if full:
+        flush_lemma_cache()
+    return result
+
+
+def normal_form(word):
+    """Нормальная форма слова"""
+    return parse_word(word)[0]
+
+
+# Служебные части речи не несут смысла для поиска
+_FUNCTIONAL_POS = {'PREP', 'CONJ', 'PRCL', 'INTJ', 'NPRO'}
+
+
+def lemmas(text):
+    """Нормальные формы значимых слов текста (латиница — как есть, в нижнем регистре)"""
+    result = []
+    for word in re.findall(r'[а-яёa-z0-9+#]+', text.lower()):
+        if not re.search(r'[а-яё]', word):
+            if len(word) > 1:
+                result.append(word)
+            continue
+        normal, pos = parse_word(word)
+        if pos in _FUNCTIONAL_POS or len(normal) < 3:
+            continue
+        result.append(normal)
+    return result
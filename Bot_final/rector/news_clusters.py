@@ -0,0 +1,262 @@
+"""Кластеры почти одинаковых заголовков: одна история, перепечатанная разными изданиями
+
+Заголовок — множество лемм (rector.morphology.lemmas). Его MinHash-сигнатура из NUM_PERM
+значений делится на BANDS полос по ROWS значений (LSH): заголовки, совпавшие хотя бы в одной
+полосе, — кандидаты в одну историю. Кандидат принимается, если доля совпавших значений
+сигнатур (оценка сходства Жаккара) не меньше SIMILARITY_THRESHOLD. Поиск кандидатов — выборка
+полос по первичному ключу, а не сравнение с каждым заголовком архива.
+
+Индекс хранится в БД и переживает перезапуски: news_clusters (сигнатура первой новости
+истории) и news_lsh_buckets (полосы), news.cluster_id — news_id первой новости истории.
+
+Пересборка кластеров по всему архиву (из каталога Bot_final):
+    python -m rector.news_clusters --rebuild
+"""
+import argparse
+import hashlib
+import time
+import zlib
+from collections import defaultdict
+
+import numpy as np
+
+from rector.morphology import lemmas
+
+NUM_PERM = 128
+BANDS = 32
+ROWS = NUM_PERM // BANDS
+# Порог LSH при таких полосах ≈ (1 / BANDS) ** (1 / ROWS) ≈ 0.42; кандидаты проверяются по сигнатурам
+SIMILARITY_THRESHOLD = 0.5
+MINHASH_SEED = 2024
+
+# Простое число больше 2**32: (a * x + b) mod p — независимые перестановки хешей лемм
+_PRIME = 4294967311
+
+# Новостей за одну транзакцию при пересборке
+REBUILD_CHUNK_SIZE = 5000
+
+
+class MinHasher:
+    def __init__(self, num_perm=NUM_PERM, bands=BANDS, seed=MINHASH_SEED):
+        if num_perm % bands:
+            raise ValueError("num_perm должно делиться на bands")
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        # a, x < 2**32 - 1, поэтому a * x + b помещается в uint64 без переполнения
+        rng = np.random.default_rng(seed)
+        self.a = rng.integers(1, 2 ** 32 - 1, num_perm, dtype=np.uint64)
+        self.b = rng.integers(0, 2 ** 32 - 1, num_perm, dtype=np.uint64)
+
+    def signature(self, title):
+        """MinHash множества лемм заголовка; None, если значимых слов нет"""
+        tokens = set(lemmas(title))
+        if not tokens:
+            return None
+        hashes = np.fromiter((zlib.crc32(token.encode()) for token in tokens), dtype=np.uint64, count=len(tokens))
+        return ((hashes[:, None] * self.a + self.b) % _PRIME).min(axis=0)
+
+    def band_keys(self, signature):
+        """[(номер полосы, ключ корзины)] — ключ укладывается в BIGINT"""
+        return [
+            (band, int.from_bytes(hashlib.blake2b(part.tobytes(), digest_size=8).digest(), 'big', signed=True))
+            for band, part in enumerate(signature.reshape(self.bands, self.rows))
+        ]
+
+
+def similarity(first, second):
+    """Оценка сходства Жаккара по двум сигнатурам"""
+    return float(np.count_nonzero(first == second)) / len(first)
+
+
+class ClusterIndex:
+    """LSH-индекс кластеров в памяти: корзины полос -> кластеры, сигнатуры кластеров"""
+
+    def __init__(self, threshold=SIMILARITY_THRESHOLD):
+        self.threshold = threshold
+        self.buckets = defaultdict(set)
+        self.signatures = {}
+
+    def add_cluster(self, cluster_id, signature, keys):
+        self.signatures[cluster_id] = signature
+        for key in keys:
+            self.buckets[key].add(cluster_id)
+
+    def find(self, signature, keys):
+        """Самый похожий кластер не ниже порога или None (при равенстве — более ранний)"""
+        candidates = set()
+        for key in keys:
+            candidates.update(self.buckets.get(key, ()))
+        best, best_score = None, self.threshold
+        for cluster_id in sorted(candidates):
+            score = similarity(signature, self.signatures[cluster_id])
+            if score > best_score or (best is None and score == best_score):
+                best, best_score = cluster_id, score
+        return best
+
+    def assign(self, news_id, signature, keys):
+        """Кластер новости; новая история получает cluster_id = news_id и попадает в индекс.
+        Возвращает (cluster_id, новый ли кластер)"""
+        cluster_id = self.find(signature, keys) if signature is not None else None
+        if cluster_id is not None:
+            return cluster_id, False
+        if signature is not None:
+            self.add_cluster(news_id, signature, keys)
+        return news_id, True
+
+
+_hasher = None
+
+
+def get_hasher():
+    """Общий MinHasher процесса (коэффициенты фиксированы сидом и совпадают между процессами)"""
+    global _hasher
+    if _hasher is None:
+        _hasher = MinHasher()
+    return _hasher
+
+
+def load_candidates(conn, index, keys):
+    """Загрузить в index кластеры из news_lsh_buckets, попавшие в корзины keys (один запрос)"""
+    if not keys:
+        return
+    bands, buckets = zip(*keys)
+    with conn.cursor() as cur:
+        cur.execute("""
+            SELECT b.band, b.bucket, c.cluster_id, c.signature
+            FROM unnest(%s::smallint[], %s::bigint[]) AS k(band, bucket)
+            JOIN news_lsh_buckets b ON b.band = k.band AND b.bucket = k.bucket
+            JOIN news_clusters c ON c.cluster_id = b.cluster_id
+        """, (list(bands), list(buckets)))
+        for band, bucket, cluster_id, signature in cur.fetchall():
+            index.buckets[(band, bucket)].add(cluster_id)
+            if cluster_id not in index.signatures:
+                index.signatures[cluster_id] = np.array(signature, dtype=np.uint64)
+
+
+SAVE_CLUSTERS = """
+    UPDATE news n SET cluster_id = v.cluster_id
+    FROM unnest(%(news_ids)s::int[], %(cluster_ids)s::int[]) AS v(news_id, cluster_id)
+    WHERE n.news_id = v.news_id;
+
+    INSERT INTO news_clusters (cluster_id, signature)
+    SELECT t.cluster_id,
+           CASE WHEN (%(has_signature)s::bool[])[t.i]
+                THEN (%(signatures)s::bigint[])[(t.i - 1) * %(num_perm)s + 1 : t.i * %(num_perm)s] END
+    FROM unnest(%(new_clusters)s::int[]) WITH ORDINALITY AS t(cluster_id, i);
+
+    UPDATE news_clusters SET last_seen = CURRENT_TIMESTAMP
+    WHERE cluster_id = ANY(%(grown_clusters)s::int[]);
+
+    INSERT INTO news_lsh_buckets (band, bucket, cluster_id)
+    SELECT * FROM unnest(%(bucket_bands)s::smallint[], %(bucket_keys)s::bigint[], %(bucket_clusters)s::int[])
+    ON CONFLICT DO NOTHING;
+"""
+
+
+def assign_clusters(conn, news_rows, hasher=None):
+    """Разложить новые новости [(news_id, title)] по кластерам: один запрос на поиск кандидатов
+    в сохраненном индексе и один на запись. Коммит — на вызывающем. Возвращает {news_id: cluster_id}"""
+    if not news_rows:
+        return {}
+    hasher = hasher or get_hasher()
+    news_rows = sorted(news_rows)
+
+    # Кандидаты из архива для всех корзин пачки сразу
+    pending = []
+    all_keys = set()
+    for news_id, title in news_rows:
+        signature = hasher.signature(title)
+        keys = hasher.band_keys(signature) if signature is not None else []
+        pending.append((news_id, signature, keys))
+        all_keys.update(keys)
+    index = ClusterIndex()
+    load_candidates(conn, index, sorted(all_keys))
+
+    # По порядку news_id: похожие новости внутри пачки тоже попадают в один кластер
+    assignments = {}
+    new_clusters, has_signature, signatures, grown = [], [], [], set()
+    bucket_rows = []
+    for news_id, signature, keys in pending:
+        cluster_id, is_new = index.assign(news_id, signature, keys)
+        if is_new:
+            new_clusters.append(news_id)
+            has_signature.append(signature is not None)
+            signatures.extend(signature.tolist() if signature is not None else [0] * hasher.num_perm)
+            bucket_rows.extend((band, bucket, news_id) for band, bucket in keys)
+        else:
+            grown.add(cluster_id)
+        assignments[news_id] = cluster_id
+
+    bucket_bands, bucket_keys, bucket_clusters = zip(*bucket_rows) if bucket_rows else ((), (), ())
+    with conn.cursor() as cur:
+        cur.execute(SAVE_CLUSTERS, {
+            'news_ids': list(assignments),
+            'cluster_ids': list(assignments.values()),
+            'new_clusters': new_clusters,
+            'has_signature': has_signature,
+            'signatures': signatures,
+            'num_perm': hasher.num_perm,
+            'grown_clusters': sorted(grown),
+            'bucket_bands': list(bucket_bands),
+            'bucket_keys': list(bucket_keys),
+            'bucket_clusters': list(bucket_clusters),
+        })
+    return assignments
+
+
+def rebuild_clusters(conn, chunk_size=REBUILD_CHUNK_SIZE):
+    """Пересобрать кластеры всего архива по возрастанию news_id.
+    Возвращает (новостей, кластеров)"""
+    hasher = get_hasher()
+    try:
+        with conn.cursor() as cur:
+            cur.execute("TRUNCATE news_lsh_buckets, news_clusters")
+            cur.execute("UPDATE news SET cluster_id = NULL WHERE cluster_id IS NOT NULL")
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+    last_id, seen, clusters = 0, 0, 0
+    while True:
+        with conn.cursor() as cur:
+            cur.execute("""
+                SELECT news_id, title FROM news
+                WHERE news_id > %s
+                ORDER BY news_id
+                LIMIT %s
+            """, (last_id, chunk_size))
+            rows = cur.fetchall()
+        if not rows:
+            return seen, clusters
+        try:
+            assignments = assign_clusters(conn, rows, hasher)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        clusters += sum(1 for news_id, cluster_id in assignments.items() if news_id == cluster_id)
+        seen += len(rows)
+        last_id = rows[-1][0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rebuild", action="store_true", help="пересобрать кластеры всего архива news")
+    parser.add_argument("--chunk", type=int, default=REBUILD_CHUNK_SIZE, help="новостей за транзакцию")
+    args = parser.parse_args()
+    if not args.rebuild:
+        parser.print_help()
+        return
+
+    from DATABASE.database import EducationDB
+
+    with EducationDB() as db:
+        started = time.perf_counter()
+        seen, clusters = rebuild_clusters(db.conn, args.chunk)
+    print(f"Новостей: {seen}, историй: {clusters}, время: {time.perf_counter() - started:.2f} с")
+
+
+if __name__ == "__main__":
+    main()
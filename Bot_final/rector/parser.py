@@ -1,16 +1,18 @@
-import requests
-from bs4 import BeautifulSoup
 import csv
+import os
 from datetime import datetime, timedelta
 import re
 import math
 from collections import Counter
-import pymorphy3  
+from urllib.parse import parse_qsl, unquote, urlencode, urlsplit, urlunsplit
+from lxml import etree, html as lxml_html
+from rector.morphology import normal_form
+
+# Куда сохранять полученные страницы выдачи (для офлайн-бенчмарка разбора), если задано
+NEWS_PAGES_DIR = os.getenv("NEWS_PAGES_DIR")
 
 class SentimentAnalyzer:
     def __init__(self):
-        self.morph = pymorphy3.MorphAnalyzer()
-        
         # Расширенные словари с весами
         self.positive_words = {
             'успех': 1.5, 'победа': 2.0, 'развитие': 1.2, 'инновация': 1.8, 'достижение': 1.5,
@@ -44,9 +46,8 @@ class SentimentAnalyzer:
         }
 
     def normalize_word(self, word):
-        """Приводит слово к нормальной форме"""
-        parsed = self.morph.parse(word)[0]
-        return parsed.normal_form
+        """Приводит слово к нормальной форме (через кэш лемм, см. rector/morphology.py)"""
+        return normal_form(word)
 
     def tokenize_text(self, text):
         """Разбивает текст на токены (слова)"""
@@ -108,77 +109,88 @@ class SentimentAnalyzer:
         sentiment = self.classify_sentiment(score)
         return sentiment, score
 
-def search_google_news_alternative(query):
-    """Альтернативный метод поиска новостей с улучшенной эмоциональной оценкой"""
-    try:
-        # Параметры запроса
-        params = {
-            'q': query,
-            'tbm': 'nws',
-            'hl': 'ru',
-            'gl': 'ru',
-            'ceid': 'RU:ru',
-            'tbs': 'qdr:w'
-        }
+def _class_test(classes):
+    """Условие XPath «у элемента есть один из классов» (аналог .a, .b в CSS)"""
+    return " or ".join(f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')" for name in classes)
+
+
+# Карточки результатов в выдаче Google. Они вложены друг в друга (MjjYud > SoaBEf > WlydOe),
+# поэтому одна новость находится несколькими селекторами — дубли отсекаются по ссылке
+CARD_XPATH = etree.XPath(
+    f"//div[{_class_test(('SoaBEf', 'MjjYud', 'g', 'VwiC3b'))}] | //a[{_class_test(('WlydOe',))}]"
+)
+# Поля карточки: первый подходящий элемент в порядке документа
+LINK_XPATH = etree.XPath("(descendant-or-self::a[@href])[1]/@href")
+TITLE_XPATH = etree.XPath(f"(.//h3 | .//*[{_class_test(('n0jPhd', 'ynAwRc', 'mCBkyc', 'JtKRv'))}])[1]")
+SOURCE_XPATH = etree.XPath(f"(.//*[{_class_test(('MgUUmf', 'NUnG9d', 'OSrXXb', 'CEMjEf'))}])[1]")
+DATE_XPATH = etree.XPath(f"(.//*[{_class_test(('OSrXXb', 'r0jCaf', 'hFTDmf'))}])[1]")
+
+
+def normalize_link(link):
+    """Ссылка на новость без редиректа Google, utm-меток и якоря; None, если это не http(s)"""
+    if not link:
+        return None
+    if '/url?q=' in link:
+        link = unquote(link.split('/url?q=')[1].split('&')[0])
+    parts = urlsplit(link)
+    if parts.scheme not in ('http', 'https') or not parts.netloc:
+        return None
+    query = urlencode([(key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+                       if not key.startswith('utm_')])
+    return urlunsplit((parts.scheme, parts.netloc.lower(), parts.path, query, ''))
+
+
+def _first_text(xpath, element):
+    found = xpath(element)
+    return found[0].text_content().strip() if found else ""
+
+
+def extract_news_cards(page):
+    """Разбирает страницу выдачи за один проход: по одной карточке на каждую уникальную ссылку
+    в порядке документа. Заголовок и остальные поля извлекаются только у новых ссылок"""
+    tree = lxml_html.fromstring(page)
+    seen = set()
+    for card in CARD_XPATH(tree):
+        hrefs = LINK_XPATH(card)
+        link = normalize_link(hrefs[0]) if hrefs else None
+        if not link or link in seen:
+            continue
         
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+        title = _first_text(TITLE_XPATH, card)
+        if not title:
+            continue
+        seen.add(link)
+        yield {
+            'title': title,
+            'link': link,
+            'source': _first_text(SOURCE_XPATH, card) or "Неизвестный источник",
+            'date_text': _first_text(DATE_XPATH, card),
         }
-        
-        url = "https://www.google.com/search"
-        response = requests.get(url, params=params, headers=headers, timeout=15)
-        
-        if response.status_code == 200:
-            soup = BeautifulSoup(response.content, 'html.parser')
-            news_results = []
-            
-            selectors = [
-                'div.SoaBEf', 'div.MjjYud', 'div.g', 'div.VwiC3b', 'a.WlydOe',
-            ]
-            
-            # Инициализируем анализатор
-            analyzer = SentimentAnalyzer()
-            
-            for selector in selectors:
-                elements = soup.select(selector)
-                for element in elements:
-                    title_elem = element.select_one('h3, .n0jPhd, .ynAwRc, .mCBkyc, .JtKRv')
-                    link_elem = element.select_one('a')
-                    source_elem = element.select_one('.MgUUmf, .NUnG9d, .OSrXXb, .CEMjEf')
-                    date_elem = element.select_one('.OSrXXb, .r0jCaf, .hFTDmf')
-                    
-                    if title_elem and link_elem:
-                        title = title_elem.get_text().strip()
-                        link = link_elem.get('href')
-                        source = source_elem.get_text().strip() if source_elem else "Неизвестный источник"
-                        date_text = date_elem.get_text().strip() if date_elem else ""
-                        
-                        if link and '/url?q=' in link:
-                            link = link.split('/url?q=')[1].split('&')[0]
-                        
-                        # Анализируем эмоциональную окраску с помощью математического метода
-                        sentiment, score = analyzer.analyze_sentiment(title)
-                        
-                        formatted_date = format_date(date_text)
-                        
-                        if title and link and 'http' in link:
-                            news_results.append({
-                                'title': title,
-                                'link': link,
-                                'source': source,
-                                'date_text': formatted_date,
-                                'sentiment': sentiment,
-                                'sentiment_score': round(score, 3)
-                            })
-            
-            return news_results
-        else:
-            print(f"Ошибка запроса: {response.status_code}")
-            return []
-            
-    except Exception as e:
-        print(f"Ошибка при поиске новостей: {e}")
-        return []
+
+
+def save_result_page(page, query):
+    """Сохраняет страницу выдачи в NEWS_PAGES_DIR для benchmarks/news_extraction.py"""
+    try:
+        os.makedirs(NEWS_PAGES_DIR, exist_ok=True)
+        slug = re.sub(r'\W+', '_', query)
+        name = f"{datetime.now():%Y%m%d_%H%M%S}_{slug}.html"
+        with open(os.path.join(NEWS_PAGES_DIR, name), 'w', encoding='utf-8') as f:
+            f.write(page)
+    except OSError as e:
+        print(f"Не удалось сохранить страницу выдачи: {e}")
+
+def search_google_news_alternative(query):
+    """Поиск новостей по одному запросу с оценкой тональности (см. rector.crawler.crawl_news)"""
+    from rector.crawler import crawl_news, google_source
+    
+    return crawl_news([google_source(query)])
+
+def parse_published_date(formatted_date):
+    """Дата публикации из результата format_date; None, если дату разобрать не удалось"""
+    try:
+        return datetime.strptime(formatted_date, "%d.%m.%Y").date()
+    except (TypeError, ValueError):
+        return None
 
 def format_date(date_text):
     """Преобразует дату в стандартный формат дд.мм.гггг"""
@@ -262,10 +274,10 @@ def save_to_csv(news_list, filename='news_ngtu_with_sentiment.csv'):
         print(f"  Средняя оценка тональности: {avg_score:.3f}")
 
 def parse_score_write():
-    query = "НГТУ новости"
+    from rector.crawler import crawl_news
     
     print("Поиск новостей с математическим анализом тональности...")
-    results = search_google_news_alternative(query)
+    results = crawl_news()
     
     if not results:
         print("Новости не найдены")
@@ -290,51 +302,103 @@ def parse_score_write():
 
 
 
+NEWS_COLUMNS = ('title', 'link', 'source', 'date_text', 'published_at', 'sentiment', 'sentiment_score')
+
+# С какого размера пачки новости грузятся через COPY во временную таблицу: на больших пачках
+# это быстрее многострочного VALUES, на сотне новостей — нет (см. benchmarks/news_insert.py)
+NEWS_COPY_THRESHOLD = 1000
+
+
+def insert_news(conn, news_list):
+    """Вставляет новости одним INSERT без коммита: [(news_id, link), ...] действительно
+    добавленных. Уже известные ссылки (и повторы внутри пачки) пропускаются ON CONFLICT"""
+    if len(news_list) >= NEWS_COPY_THRESHOLD:
+        return insert_news_copy(conn, news_list)
+    return insert_news_values(conn, news_list)
+
+
+def insert_news_values(conn, news_list):
+    """insert_news многострочным INSERT ... VALUES"""
+    from psycopg2.extras import execute_values
+
+    with conn.cursor() as cur:
+        return execute_values(cur, """
+            INSERT INTO news (title, link, source, date_text, published_at, sentiment, sentiment_score)
+            VALUES %s
+            ON CONFLICT (link) DO NOTHING
+            RETURNING news_id, link
+        """, [tuple(news.get(column) for column in NEWS_COLUMNS) for news in news_list],
+            page_size=len(news_list) or 1, fetch=True)
+
+
+def _copy_value(value):
+    """Значение поля в текстовом формате COPY: None — \\N, спецсимволы экранируются"""
+    if value is None:
+        return '\\N'
+    return (str(value).replace('\\', '\\\\').replace('\t', '\\t')
+            .replace('\n', '\\n').replace('\r', '\\r'))
+
+
+def insert_news_copy(conn, news_list):
+    """insert_news через COPY во временную таблицу и INSERT ... SELECT из нее"""
+    import io
+
+    buffer = io.StringIO()
+    for news in news_list:
+        buffer.write('\t'.join(_copy_value(news.get(column)) for column in NEWS_COLUMNS) + '\n')
+    buffer.seek(0)
+
+    with conn.cursor() as cur:
+        # Только столбцы из NEWS_COLUMNS, без умолчаний: LIKE news перенес бы nextval news_id,
+        # и каждая строка во временной таблице тратила бы лишнее значение последовательности
+        columns = ', '.join(NEWS_COLUMNS)
+        cur.execute(f"""
+            CREATE TEMP TABLE IF NOT EXISTS news_staging ON COMMIT DROP AS
+                SELECT {columns} FROM news WITH NO DATA;
+            TRUNCATE news_staging
+        """)
+        cur.copy_from(buffer, 'news_staging', columns=NEWS_COLUMNS)
+        cur.execute("""
+            INSERT INTO news (title, link, source, date_text, published_at, sentiment, sentiment_score)
+            SELECT title, link, source, date_text, published_at, sentiment, sentiment_score FROM news_staging
+            ON CONFLICT (link) DO NOTHING
+            RETURNING news_id, link
+        """)
+        return cur.fetchall()
+
+
 def save_news_to_db(news_list):
-    """Сохраняет список новостей в базу данных"""
+    """Сохраняет список новостей в базу данных одним запросом и раскладывает новые
+    по историям (rector/news_clusters.py) в той же транзакции.
+    Возвращает [(news_id, link), ...] новых новостей или None при ошибке"""
     if not news_list:
         print("Нет данных для сохранения в БД")
-        return False
+        return []
+    
+    # Импортируем db из config здесь, чтобы избежать циклического импорта
+    from config import db
+    from rector.news_clusters import assign_clusters
     
+    conn = db.conn
+    titles = {news['link']: news['title'] for news in news_list}
     try:
-        # Импортируем db из config здесь, чтобы избежать циклического импорта
-        from config import db
-        conn = db.conn
-        with conn.cursor() as cur:
-            # Подготавливаем запрос для вставки
-            insert_query = """
-            INSERT INTO news (title, link, source, date_text, sentiment, sentiment_score)
-            VALUES (%s, %s, %s, %s, %s, %s)
-            ON CONFLICT (link) DO NOTHING
-            """
-            
-            # Вставляем каждую новость
-            for news in news_list:
-                cur.execute(insert_query, (
-                    news['title'],
-                    news['link'],
-                    news['source'],
-                    news['date_text'],
-                    news['sentiment'],
-                    news['sentiment_score']
-                ))
-            
-            conn.commit()
-        
-        print(f"Успешно сохранено новостей в БД: {len(news_list)}")
-        return True
-        
+        inserted = insert_news(conn, news_list)
+        assign_clusters(conn, [(news_id, titles[link]) for news_id, link in inserted])
+        conn.commit()
     except Exception as e:
         print(f"Ошибка при сохранении в БД: {e}")
         conn.rollback()
-        return False
+        return None
+    
+    print(f"Сохранено новых новостей в БД: {len(inserted)} из {len(news_list)}")
+    return inserted
 
 def parse_and_save_news():
     """Парсит новости и сохраняет в базу данных"""
-    query = "НГТУ новости"
+    from rector.crawler import crawl_news
     
     print("Запуск парсера новостей...")
-    results = search_google_news_alternative(query)
+    results = crawl_news()
     
     if not results:
         print("Новости не найдены")
@@ -343,7 +407,7 @@ def parse_and_save_news():
     print(f"Найдено {len(results)} новостей")
     
     # Сохраняем в базу данных
-    success = save_news_to_db(results)
+    success = save_news_to_db(results) is not None
     
     if success:
         # Статистика
@@ -360,10 +424,10 @@ def parse_and_save_news():
 
 def parse_and_save_news_with_stats():
     
-    query = "НГТУ новости"
+    from rector.crawler import crawl_news
     
     print("Запуск парсера новостей...")
-    results = search_google_news_alternative(query)
+    results = crawl_news()
     
     if not results:
         print("Новости не найдены")
@@ -0,0 +1,166 @@
+"""Пакетная оценка тональности заголовков на NumPy
+
+Каждая словоформа один раз приводится к нормальной форме и получает id слова словаря
+(0 — слово не из словаря). Веса тональности и усилителей лежат в массивах по id, поэтому
+оценка тысяч заголовков — несколько операций над общим массивом токенов: вклад слова —
+вес × модификатор предыдущего токена (массив со сдвигом на один), суммы по заголовкам,
+деление на √числа слов. Результат совпадает с SentimentAnalyzer.analyze_sentiment до бита.
+
+Переоценка всего архива news после изменения словаря (из каталога Bot_final):
+    python -m rector.sentiment_batch --rescore
+    python -m rector.sentiment_batch --rescore --chunk 10000
+"""
+import argparse
+import re
+import time
+
+import numpy as np
+
+from rector.parser import SentimentAnalyzer
+
+WORD_RE = re.compile(r'\b[а-яё]+\b')
+
+# Пороги как в SentimentAnalyzer.classify_sentiment
+POSITIVE_THRESHOLD = 0.3
+NEGATIVE_THRESHOLD = -0.3
+
+# Новостей, переоцениваемых и сохраняемых за одну транзакцию
+RESCORE_CHUNK_SIZE = 5000
+
+
+class BatchSentimentScorer:
+    def __init__(self, analyzer=None):
+        self.analyzer = analyzer or SentimentAnalyzer()
+        a = self.analyzer
+
+        lexicon = set(a.positive_words) | set(a.negative_words) | set(a.intensifiers) | set(a.diminishers)
+        self.lemma_ids = {lemma: i for i, lemma in enumerate(sorted(lexicon), 1)}
+        size = len(self.lemma_ids) + 1
+
+        self.is_scored = np.zeros(size, dtype=bool)
+        self.polarity = np.zeros(size)
+        self.modifier = np.ones(size)
+        # Порядок заполнения повторяет приоритет проверок в calculate_sentiment_score:
+        # положительный словарь перекрывает отрицательный, усилители — ослабители
+        for words in (a.negative_words, a.positive_words):
+            for lemma, weight in words.items():
+                self.is_scored[self.lemma_ids[lemma]] = True
+                self.polarity[self.lemma_ids[lemma]] = weight
+        for words in (a.diminishers, a.intensifiers):
+            for lemma, weight in words.items():
+                self.modifier[self.lemma_ids[lemma]] = weight
+
+        # Словоформа -> id: pymorphy3 вызывается один раз на каждую новую словоформу
+        self.word_ids = {}
+
+    def word_id(self, word):
+        word_id = self.word_ids.get(word)
+        if word_id is None:
+            word_id = self.word_ids[word] = self.lemma_ids.get(self.analyzer.normalize_word(word), 0)
+        return word_id
+
+    def encode(self, texts):
+        """Тексты -> (id всех токенов подряд, число токенов в каждом тексте)"""
+        ids = []
+        lengths = np.zeros(len(texts), dtype=np.int64)
+        for i, text in enumerate(texts):
+            if not text:
+                continue
+            words = WORD_RE.findall(text.lower())
+            lengths[i] = len(words)
+            ids.extend(self.word_id(word) for word in words)
+        return np.array(ids, dtype=np.int64), lengths
+
+    def scores(self, texts):
+        """Оценки тональности текстов (массив float64)"""
+        ids, lengths = self.encode(texts)
+        result = np.zeros(len(texts))
+        if not ids.size:
+            return result
+
+        # Модификатор предыдущего токена; у первого слова текста предыдущего нет
+        starts = np.cumsum(lengths) - lengths
+        prev_modifier = np.ones(ids.size)
+        prev_modifier[1:] = self.modifier[ids[:-1]]
+        prev_modifier[starts[lengths > 0]] = 1.0
+
+        scored = self.is_scored[ids]
+        contributions = self.polarity[ids[scored]] * prev_modifier[scored]
+        text_of_token = np.repeat(np.arange(len(texts)), lengths)
+        # np.add.at складывает вклады по порядку, как цикл в calculate_sentiment_score,
+        # поэтому суммы совпадают точно (в отличие от попарного суммирования reduceat)
+        np.add.at(result, text_of_token[scored], contributions)
+
+        nonempty = lengths > 0
+        result[nonempty] /= np.sqrt(lengths[nonempty])
+        return result
+
+    def analyze(self, texts):
+        """Пакетный аналог analyze_sentiment: [(тональность, оценка), ...]"""
+        scores = self.scores(texts)
+        labels = np.where(scores > POSITIVE_THRESHOLD, "Положительный",
+                          np.where(scores < NEGATIVE_THRESHOLD, "Негативный", "Нейтральный"))
+        return [(str(label), float(score)) for label, score in zip(labels, scores)]
+
+
+def rescore_archive(conn, scorer=None, chunk_size=RESCORE_CHUNK_SIZE):
+    """Переоценивает все новости порциями по news_id; сохраняются только изменившиеся.
+    Сводки тональности обновляют триггеры news. Возвращает (просмотрено, изменено)"""
+    from psycopg2.extras import execute_values
+
+    scorer = scorer or BatchSentimentScorer()
+    last_id, seen, changed = 0, 0, 0
+    while True:
+        with conn.cursor() as cur:
+            cur.execute("""
+                SELECT news_id, title FROM news
+                WHERE news_id > %s
+                ORDER BY news_id
+                LIMIT %s
+            """, (last_id, chunk_size))
+            rows = cur.fetchall()
+        if not rows:
+            return seen, changed
+
+        results = scorer.analyze([title for _, title in rows])
+        try:
+            with conn.cursor() as cur:
+                execute_values(cur, """
+                    UPDATE news n
+                    SET sentiment = v.sentiment, sentiment_score = v.sentiment_score
+                    FROM (VALUES %s) AS v(news_id, sentiment, sentiment_score)
+                    WHERE n.news_id = v.news_id
+                    AND (n.sentiment IS DISTINCT FROM v.sentiment
+                         OR n.sentiment_score IS DISTINCT FROM v.sentiment_score)
+                """, [
+                    (news_id, sentiment, round(score, 3))
+                    for (news_id, _), (sentiment, score) in zip(rows, results)
+                ], template="(%s, %s, %s::DECIMAL(5,3))", page_size=len(rows))
+                changed += cur.rowcount
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        last_id = rows[-1][0]
+        seen += len(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rescore", action="store_true", help="переоценить архив news")
+    parser.add_argument("--chunk", type=int, default=RESCORE_CHUNK_SIZE, help="новостей за транзакцию")
+    args = parser.parse_args()
+    if not args.rescore:
+        parser.print_help()
+        return
+
+    from DATABASE.database import EducationDB
+
+    with EducationDB() as db:
+        started = time.perf_counter()
+        seen, changed = rescore_archive(db.conn, chunk_size=args.chunk)
+    print(f"Переоценено новостей: {seen}, изменилось: {changed}, время: {time.perf_counter() - started:.2f} с")
+
+
+if __name__ == "__main__":
+    main()